@@ -0,0 +1,145 @@
+"""Бенчмарк сканирования библиотеки на синтетических данных.
+
+Замеряет FileScanner.scan_by_extensions, MusicPlayer.load_folder и проход
+MainWindow.get_display_name по найденным файлам (первый проход с пустым кэшем
+метаданных, повторные — из кэша); display_many делает то же через
+MetadataEditor.get_metadata_many. Каждый этап запускается в
+отдельном процессе, поэтому пик RSS относится только к нему.
+
+Запуск из корня проекта:
+    python benchmarks/bench_library.py --depth 3 --fan-out 10 --files-per-dir 20
+    python benchmarks/bench_library.py --root ~/Music --stages scan,display
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.library_generator import DEFAULT_MIX, generate_library
+
+STAGES = ['scan', 'load_folder', 'display', 'display_many']
+EXTENSIONS = ['.mp3', '.wav', '.ogg', '.flac', '.m4a', '.aac']
+
+def peak_rss_kb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # На macOS ru_maxrss в байтах, на Linux в килобайтах
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+def run_stage(stage, root, repeat):
+    """Выполнение одного этапа в текущем процессе"""
+    from core.file_scanner import FileScanner
+
+    scanner = FileScanner()
+    scanner.configure([(root, None)], FileScanner.DEFAULT_EXCLUDE, None)
+
+    if stage == 'scan':
+        func = lambda: sum(len(paths) for paths in scanner.scan_by_extensions(EXTENSIONS).values())
+    elif stage == 'load_folder':
+        from core.player import MusicPlayer
+        # Без создания экземпляра VLC: замеряется только обход папки
+        player = SimpleNamespace(current_playlist=[])
+        func = lambda: len(MusicPlayer.load_folder(player, root))
+    elif stage in ('display', 'display_many'):
+        from core.metadata_cache import MetadataCache
+        from core.metadata_editor import MetadataEditor
+        from core.track import TrackRegistry
+        from ui.main_window import MainWindow
+        # Пустой кэш: первый проход разбирает файлы, повторные читают кэш
+        cache = MetadataCache(os.path.join(tempfile.mkdtemp(prefix="metadata_bench_"), "metadata.db"))
+        editor = MetadataEditor(cache)
+        files = [path for ext_files in scanner.scan_by_extensions(EXTENSIONS).values() for path in ext_files]
+
+        def display_names(items):
+            # Новый реестр треков на каждый проход: названия не берутся из уже заполненных Track
+            window = SimpleNamespace(metadata_editor=editor, player=SimpleNamespace(tracks=TrackRegistry()))
+            return len([MainWindow.get_display_name(window, path, metadata) for path, metadata in items])
+
+        if stage == 'display':
+            func = lambda: display_names((path, None) for path in files)
+        else:
+            # Разбор тегов в пуле процессов
+            func = lambda: display_names(editor.get_metadata_many(files))
+    else:
+        raise ValueError(f"Неизвестный этап: {stage}")
+
+    times = []
+    count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = func()
+        times.append(time.perf_counter() - start)
+    result = {'stage': stage, 'files': count, 'seconds': min(times), 'first_seconds': times[0],
+              'peak_rss_kb': peak_rss_kb()}
+    if stage in ('display', 'display_many'):
+        editor.close()
+        result['cache'] = cache.stats()
+        shutil.rmtree(os.path.dirname(cache.db_path), ignore_errors=True)
+    return result
+
+def run_in_subprocess(stage, root, repeat):
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--stage', stage, '--root', root, '--repeat', str(repeat)],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк сканирования библиотеки")
+    parser.add_argument('--root', help="Существующая папка вместо синтетической библиотеки")
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--fan-out', type=int, default=10)
+    parser.add_argument('--files-per-dir', type=int, default=20)
+    parser.add_argument('--mix', default=DEFAULT_MIX, help="Расширения с весами, например mp3:70,flac:30")
+    parser.add_argument('--symlinks', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--stages', default=','.join(STAGES))
+    parser.add_argument('--stage', help=argparse.SUPPRESS)
+    parser.add_argument('--json', action='store_true', help="Вывод результатов в JSON")
+    args = parser.parse_args()
+
+    if args.stage:
+        print(json.dumps(run_stage(args.stage, args.root, args.repeat)))
+        return
+
+    tmp_dir = None
+    root = args.root
+    if root is None:
+        tmp_dir = tempfile.mkdtemp(prefix="library_bench_")
+        root = os.path.join(tmp_dir, "library")
+        counts = generate_library(root, args.depth, args.fan_out, args.files_per_dir,
+                                  args.mix, args.symlinks, args.seed)
+        print(f"Библиотека: {sum(counts.values())} файлов в {root}")
+
+    try:
+        results = [run_in_subprocess(stage, root, args.repeat) for stage in args.stages.split(',')]
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for result in results:
+        rate = result['files'] / result['seconds'] if result['seconds'] else 0
+        rss = f"{result['peak_rss_kb'] / 1024:.1f} МБ" if result['peak_rss_kb'] else "н/д"
+        print(f"{result['stage']:<12} {result['files']:>8} файлов  {result['seconds']:.3f} с  "
+              f"(первый проход {result['first_seconds']:.3f} с)  "
+              f"{rate:>10,.0f} файлов/с  пик RSS {rss}")
+        if 'cache' in result:
+            print(f"{'':<12} кэш метаданных: {result['cache']['hits']} попаданий, "
+                  f"{result['cache']['misses']} промахов")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Бенчмарк столбцовой таблицы библиотеки.
+
+Сравнивает LibraryTable со списком словарей метаданных: расход памяти
+(tracemalloc), сортировку по нескольким ключам и фильтр по жанру и годам.
+
+Запуск из корня проекта:
+    python benchmarks/bench_library_table.py --rows 1000000
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.library_table import LibraryTable, parse_number
+from core.search_index import fold
+
+GENRES = ["Rock", "Pop", "Jazz", "Рок", "Поп", "Шансон", "Electronic", "Classical"]
+SORT_KEYS = ['artist', 'album', 'disc_number', 'track_number']
+
+def fake_rows(count, seed):
+    """Метаданные в виде, в котором их отдаёт MetadataEditor (числа — строками)"""
+    rng = random.Random(seed)
+    for number in range(count):
+        artist = rng.randrange(count // 50 + 1)
+        album = rng.randrange(count // 10 + 1)
+        yield f"/music/{artist:05d}/{album:06d}/{number:07d}.mp3", {
+            'title': f"Track {number:07d}",
+            'artist': f"Artist {artist:05d}",
+            'album': f"Album {album:06d}",
+            'album_artist': f"Artist {artist:05d}",
+            'genre': rng.choice(GENRES),
+            'year': str(rng.randint(1960, 2024)),
+            'track_number': f"{number % 20 + 1}/20",
+            'disc_number': str(rng.randint(1, 2)),
+        }
+
+def build_dicts(rows):
+    return [{'path': path, **metadata} for path, metadata in rows]
+
+def build_table(rows):
+    table = LibraryTable()
+    table.update(rows)
+    return table
+
+def measure_memory(build, count, seed):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build(fake_rows(count, seed))
+    seconds = time.perf_counter() - start
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size, seconds
+
+def best_time(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def dict_sort_key(row):
+    return (fold(row['artist']), fold(row['album']),
+            parse_number(row['disc_number']), parse_number(row['track_number']))
+
+def dict_filter(rows):
+    return [row for row in rows if row['genre'] == "Rock" and 1990 <= parse_number(row['year']) <= 1999]
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк столбцовой таблицы библиотеки")
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help="Вывод результатов в JSON")
+    args = parser.parse_args()
+
+    results = {'rows': args.rows}
+    dicts, size, seconds = measure_memory(build_dicts, args.rows, args.seed)
+    results['dicts'] = {
+        'bytes_per_row': size / args.rows,
+        'build_seconds': seconds,
+        'sort_ms': best_time(lambda: sorted(dicts, key=dict_sort_key), args.repeat) * 1000,
+        'filter_ms': best_time(lambda: dict_filter(dicts), args.repeat) * 1000,
+    }
+    del dicts
+    gc.collect()
+
+    table, size, seconds = measure_memory(build_table, args.rows, args.seed)
+    # Первая сортировка строит алфавитные ранги словарей, следующие их переиспользуют
+    start = time.perf_counter()
+    table.sort(SORT_KEYS)
+    first_sort = time.perf_counter() - start
+    results['table'] = {
+        'bytes_per_row': size / args.rows,
+        'columns_bytes_per_row': table.nbytes() / args.rows,
+        'build_seconds': seconds,
+        'first_sort_ms': first_sort * 1000,
+        'sort_ms': best_time(lambda: table.sort(SORT_KEYS), args.repeat) * 1000,
+        'filter_ms': best_time(lambda: table.equals('genre', "Rock") & table.between('year', 1990, 1999),
+                               args.repeat) * 1000,
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"Строк: {args.rows}")
+    for name, label in (('dicts', "Словари"), ('table', "Таблица")):
+        result = results[name]
+        print(f"{label:<8} {result['bytes_per_row']:>6.0f} байт/строку  "
+              f"сортировка {result['sort_ms']:>8.1f} мс  фильтр {result['filter_ms']:>7.1f} мс")
+    table_result = results['table']
+    print(f"Столбцы NumPy: {table_result['columns_bytes_per_row']:.0f} байт/строку, "
+          f"первая сортировка {table_result['first_sort_ms']:.1f} мс")
+
+if __name__ == "__main__":
+    main()
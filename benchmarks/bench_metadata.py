@@ -0,0 +1,86 @@
+"""Бенчмарк чтения тегов: полный разбор mutagen.File против чтения только заголовка.
+
+Кэш метаданных отключён, замеряется сам разбор файлов. Результаты выводятся
+по каждому расширению библиотеки.
+
+Запуск из корня проекта:
+    python benchmarks/bench_metadata.py --files-per-dir 20 --mix mp3:50,flac:30,m4a:20
+    python benchmarks/bench_metadata.py --root ~/Music
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.library_generator import MP3_FRAMES, generate_library
+from core.metadata_editor import MetadataEditor
+
+MODES = {'full': True, 'header': False}
+
+def collect_files(root):
+    files = {}
+    for dir_path, _, file_names in os.walk(root):
+        for file_name in file_names:
+            ext = os.path.splitext(file_name)[1].lower()
+            if ext in ('.mp3', '.flac', '.m4a', '.aac', '.ogg', '.wav'):
+                files.setdefault(ext, []).append(os.path.join(dir_path, file_name))
+    return files
+
+def measure(editor, paths, stream_info, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for path in paths:
+            editor._read_metadata(path, stream_info)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк чтения тегов")
+    parser.add_argument('--root', help="Существующая папка вместо синтетической библиотеки")
+    parser.add_argument('--depth', type=int, default=2)
+    parser.add_argument('--fan-out', type=int, default=10)
+    parser.add_argument('--files-per-dir', type=int, default=20)
+    parser.add_argument('--mix', default="mp3:70,flac:30", help="Расширения с весами, например mp3:70,flac:30")
+    parser.add_argument('--mp3-frames', type=int, default=MP3_FRAMES * 50, help="Число кадров MPEG в каждом MP3")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', action='store_true', help="Вывод результатов в JSON")
+    args = parser.parse_args()
+
+    tmp_dir = None
+    root = args.root
+    if root is None:
+        tmp_dir = tempfile.mkdtemp(prefix="metadata_bench_")
+        root = os.path.join(tmp_dir, "library")
+        counts = generate_library(root, args.depth, args.fan_out, args.files_per_dir,
+                                  args.mix, seed=args.seed, mp3_frames=args.mp3_frames)
+        print(f"Библиотека: {sum(counts.values())} файлов в {root}")
+
+    editor = MetadataEditor(use_cache=False)
+    results = []
+    try:
+        for ext, paths in sorted(collect_files(root).items()):
+            result = {'ext': ext, 'files': len(paths)}
+            for mode, stream_info in MODES.items():
+                result[mode] = measure(editor, paths, stream_info, args.repeat)
+            results.append(result)
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for result in results:
+        speedup = result['full'] / result['header'] if result['header'] else 0
+        print(f"{result['ext']:<6} {result['files']:>7} файлов  полный разбор {result['full']:.3f} с  "
+              f"только заголовок {result['header']:.3f} с  ускорение x{speedup:.1f}")
+
+if __name__ == "__main__":
+    main()
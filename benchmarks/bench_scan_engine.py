@@ -0,0 +1,97 @@
+"""Сравнение ScanEngine с прежним обходом через os.walk на синтетическом дереве.
+
+Запуск из корня проекта:
+    python benchmarks/bench_scan_engine.py --files 100000
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.scan_engine import ScanEngine
+
+EXTENSIONS = ['.mp3', '.wav', '.flac', '.aac', '.ogg', '.m4a', '.wma', '.aiff']
+
+def legacy_scan(roots, extensions):
+    """Прежняя реализация FileScanner.scan_by_extensions"""
+    result = {}
+    for scan_path in roots:
+        for root, dirs, files in os.walk(scan_path):
+            for file in files:
+                if Path(file).suffix.lower() in extensions:
+                    full_path = os.path.join(root, file)
+                    ext = Path(file).suffix.lower()
+
+                    if ext not in result:
+                        result[ext] = []
+                    result[ext].append(full_path)
+    return result
+
+def build_tree(root: str, total_files: int, files_per_dir: int = 50, fan_out: int = 10):
+    """Дерево пустых файлов: артисты / альбомы / треки"""
+    suffixes = ['.mp3', '.flac', '.m4a', '.ogg', '.jpg', '.txt']
+    created = 0
+    dir_index = 0
+    while created < total_files:
+        artist = dir_index // fan_out
+        album = dir_index % fan_out
+        album_dir = os.path.join(root, f"artist_{artist:05d}", f"album_{album:02d}")
+        os.makedirs(album_dir, exist_ok=True)
+        for i in range(min(files_per_dir, total_files - created)):
+            suffix = suffixes[i % len(suffixes)]
+            open(os.path.join(album_dir, f"{i:03d} track{suffix}"), 'wb').close()
+            created += 1
+        dir_index += 1
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк сканирования библиотеки")
+    parser.add_argument('--files', type=int, default=100_000)
+    parser.add_argument('--root', help="Существующая папка вместо синтетического дерева")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    tmp_dir = None
+    root = args.root
+    if root is None:
+        tmp_dir = tempfile.mkdtemp(prefix="scan_bench_")
+        root = tmp_dir
+        print(f"Создаю {args.files} файлов в {root}...")
+        build_tree(root, args.files)
+
+    try:
+        engine = ScanEngine(EXTENSIONS, max_workers=args.workers)
+        legacy_times, engine_times = [], []
+        for _ in range(args.repeat):
+            elapsed, legacy_result = timed(legacy_scan, [root], EXTENSIONS)
+            legacy_times.append(elapsed)
+            elapsed, engine_result = timed(engine.scan, [root])
+            engine_times.append(elapsed)
+
+        legacy_count = sum(len(files) for files in legacy_result.values())
+        engine_count = sum(len(files) for files in engine_result.values())
+        if legacy_count != engine_count:
+            print(f"Расхождение: os.walk нашёл {legacy_count}, ScanEngine {engine_count}")
+
+        legacy_best, engine_best = min(legacy_times), min(engine_times)
+        print(f"Найдено аудиофайлов: {engine_count}")
+        print(f"os.walk:    {legacy_best:.3f} с ({legacy_count / legacy_best:,.0f} файлов/с)")
+        print(f"ScanEngine: {engine_best:.3f} с ({engine_count / engine_best:,.0f} файлов/с, "
+              f"{engine.max_workers} потоков)")
+        print(f"Ускорение:  x{legacy_best / engine_best:.2f}")
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
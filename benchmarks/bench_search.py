@@ -0,0 +1,90 @@
+"""Бенчмарк полнотекстового поиска по библиотеке.
+
+Заполняет SearchIndex синтетическими метаданными (латиница и кириллица)
+и замеряет время ответа на запросы при наборе по буквам.
+
+Запуск из корня проекта:
+    python benchmarks/bench_search.py --tracks 200000
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.search_index import SearchIndex
+
+LATIN = ["ba", "lo", "ve", "ni", "ght", "dre", "am", "fi", "re", "ro", "ad", "he", "art", "su", "mer", "li"]
+CYRILLIC = ["но", "чь", "зве", "зда", "ёл", "ка", "до", "ро", "га", "се", "рд", "це", "ле", "то", "мо", "ре"]
+GENRES = ["Rock", "Pop", "Jazz", "Рок", "Поп", "Шансон", "Electronic", "Classical"]
+QUERIES = ["н", "но", "ноч", "ночь", "ЁЛК", "елка", "love ni", "рок звез", "summer road", "xyz"]
+
+def make_words(rng, count):
+    """Словарь из случайных слогов, как в реальной библиотеке: слов много, повторы редки"""
+    words = set()
+    while len(words) < count:
+        syllables = rng.choice([LATIN, CYRILLIC])
+        words.add("".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))).capitalize())
+    return sorted(words)
+
+def fake_metadata(rng, words, number):
+    artist = f"{rng.choice(words)} {rng.choice(words)}"
+    return {
+        'title': " ".join(rng.choice(words) for _ in range(rng.randint(1, 4))),
+        'artist': artist,
+        'album': f"{rng.choice(words)} {number % 20000}",
+        'album_artist': artist,
+        'composer': rng.choice(words),
+        'genre': rng.choice(GENRES),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк поиска по библиотеке")
+    parser.add_argument('--tracks', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--words', type=int, default=20000, help="Размер словаря названий")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help="Вывод результатов в JSON")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    words = make_words(rng, args.words)
+    tmp_dir = tempfile.mkdtemp(prefix="search_bench_")
+    try:
+        index = SearchIndex(os.path.join(tmp_dir, "search.db"))
+        start = time.perf_counter()
+        batch = []
+        for number in range(args.tracks):
+            batch.append((f"/music/{number // 1000:03d}/{number:06d} track.mp3", fake_metadata(rng, words, number)))
+            if len(batch) >= 10000:
+                index.update(batch)
+                batch = []
+        index.update(batch)
+        build_seconds = time.perf_counter() - start
+
+        results = []
+        for query in QUERIES:
+            times = []
+            found = 0
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                found = len(index.search(query))
+                times.append(time.perf_counter() - start)
+            results.append({'query': query, 'found': found, 'ms': min(times) * 1000})
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps({'tracks': args.tracks, 'build_seconds': build_seconds, 'queries': results}, indent=2))
+        return
+    print(f"Индекс на {args.tracks} треков построен за {build_seconds:.1f} с")
+    for result in results:
+        print(f"{result['query']!r:<16} {result['found']:>8} найдено  {result['ms']:.2f} мс")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Бенчмарк памяти и поиска позиции для модели треков.
+
+Сравнивает хранение библиотеки словарями (путь и теги, как их отдаёт
+MetadataEditor) с объектами Track из TrackRegistry/TrackList: расход памяти
+на трек (tracemalloc) и время поиска позиции трека в плейлисте.
+
+Запуск из корня проекта:
+    python benchmarks/bench_tracks.py --tracks 500000
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.track import TrackList, TrackRegistry
+
+def fake_rows(count, seed):
+    """Пути и теги; строки создаются заново для каждого трека, как при чтении тегов"""
+    rng = random.Random(seed)
+    for number in range(count):
+        artist = rng.randrange(count // 50 + 1)
+        album = rng.randrange(count // 10 + 1)
+        path = f"/home/user/Music/Artist {artist:05d}/Album {album:06d}/{number % 20 + 1:02d} Track {number:07d}.mp3"
+        yield path, {
+            'title': f"Track {number:07d}",
+            'artist': f"Artist {artist:05d}",
+            'album': f"Album {album:06d}",
+            'length': 180.0 + number % 120,
+        }
+
+def build_dicts(rows):
+    playlist = []
+    for path, metadata in rows:
+        playlist.append({'path': path, **metadata})
+    return playlist
+
+def build_tracks(rows):
+    registry = TrackRegistry()
+    playlist = TrackList(registry)
+    for path, metadata in rows:
+        playlist.append(registry.update(path, metadata))
+    return playlist
+
+def measure_memory(build, count, seed):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build(fake_rows(count, seed))
+    seconds = time.perf_counter() - start
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size, seconds
+
+def measure_lookup(playlist, paths, index):
+    start = time.perf_counter()
+    for path in paths:
+        index(playlist, path)
+    return (time.perf_counter() - start) / len(paths)
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк модели треков")
+    parser.add_argument('--tracks', type=int, default=500000)
+    parser.add_argument('--lookups', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help="Вывод результатов в JSON")
+    args = parser.parse_args()
+
+    results = {'tracks': args.tracks}
+    dicts, size, seconds = measure_memory(build_dicts, args.tracks, args.seed)
+    results['dicts'] = {'bytes_per_track': size / args.tracks, 'build_seconds': seconds}
+    paths = [row['path'] for row in dicts]
+    rng = random.Random(args.seed)
+    sample = [rng.choice(paths) for _ in range(args.lookups)]
+    # Старый плейлист: список путей и list.index()
+    results['dicts']['lookup_us'] = measure_lookup(paths, sample, list.index) * 1e6
+    del dicts, paths
+    gc.collect()
+
+    tracks, size, seconds = measure_memory(build_tracks, args.tracks, args.seed)
+    results['tracks_model'] = {'bytes_per_track': size / args.tracks, 'build_seconds': seconds,
+                               'lookup_us': measure_lookup(tracks, sample, TrackList.index) * 1e6}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"Треков: {args.tracks}")
+    for name, label in (('dicts', "Словари"), ('tracks_model', "Track")):
+        result = results[name]
+        print(f"{label:<10} {result['bytes_per_track']:>8.0f} байт/трек  "
+              f"построение {result['build_seconds']:.1f} с  "
+              f"поиск позиции {result['lookup_us']:.1f} мкс")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Генератор синтетической музыкальной библиотеки для бенчмарков.
+
+Дерево папок заданной глубины и ширины, в листьях — крошечные, но корректные
+MP3 (ID3v2.4 + несколько кадров MPEG) и FLAC (STREAMINFO + VORBIS_COMMENT)
+с тегами, заглушки прочих форматов и символические ссылки. При одинаковом
+seed библиотека получается одинаковой.
+
+Запуск из корня проекта:
+    python benchmarks/library_generator.py /tmp/library --depth 3 --fan-out 10
+"""
+import argparse
+import os
+import random
+import struct
+from typing import Dict, Optional
+
+DEFAULT_MIX = "mp3:60,flac:25,ogg:5,jpg:5,txt:5"
+
+# MPEG-1 Layer III, 128 кбит/с, 44100 Гц, стерео: кадр 417 байт
+MP3_FRAME = b'\xff\xfb\x90\x00' + b'\x00' * 413
+MP3_FRAMES = 8
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    """Строка вида "mp3:60,flac:30,jpg:10" в словарь весов расширений"""
+    result = {}
+    for part in mix.split(','):
+        ext, _, weight = part.strip().partition(':')
+        result['.' + ext.lstrip('.').lower()] = int(weight or 1)
+    return result
+
+def syncsafe(value: int) -> bytes:
+    return bytes([(value >> 21) & 0x7f, (value >> 14) & 0x7f, (value >> 7) & 0x7f, value & 0x7f])
+
+def id3_tag(tags: Dict[str, str]) -> bytes:
+    frames = b''
+    for frame_id, text in tags.items():
+        data = b'\x03' + text.encode('utf-8')
+        frames += frame_id.encode('ascii') + syncsafe(len(data)) + b'\x00\x00' + data
+    return b'ID3\x04\x00\x00' + syncsafe(len(frames)) + frames
+
+def mp3_bytes(title: str, artist: str, album: str, track: int, frames: int = MP3_FRAMES) -> bytes:
+    tag = id3_tag({'TIT2': title, 'TPE1': artist, 'TALB': album, 'TRCK': str(track)})
+    return tag + MP3_FRAME * frames
+
+def flac_bytes(title: str, artist: str, album: str, track: int) -> bytes:
+    # STREAMINFO: блоки 4096, 44100 Гц, 2 канала, 16 бит, 44100 сэмплов
+    sample_info = (44100 << 44) | (1 << 41) | (15 << 36) | 44100
+    streaminfo = struct.pack('>HH', 4096, 4096) + b'\x00' * 6 + sample_info.to_bytes(8, 'big') + b'\x00' * 16
+
+    vendor = b'synthetic'
+    comments = [f"TITLE={title}", f"ARTIST={artist}", f"ALBUM={album}", f"TRACKNUMBER={track}"]
+    vorbis = struct.pack('<I', len(vendor)) + vendor + struct.pack('<I', len(comments))
+    for comment in comments:
+        encoded = comment.encode('utf-8')
+        vorbis += struct.pack('<I', len(encoded)) + encoded
+
+    return (b'fLaC'
+            + bytes([0]) + len(streaminfo).to_bytes(3, 'big') + streaminfo
+            + bytes([0x80 | 4]) + len(vorbis).to_bytes(3, 'big') + vorbis)
+
+def generate_library(root: str, depth: int = 3, fan_out: int = 10, files_per_dir: int = 20,
+                     mix: str = DEFAULT_MIX, symlinks: int = 0, seed: int = 1,
+                     max_files: Optional[int] = None, mp3_frames: int = MP3_FRAMES) -> Dict[str, int]:
+    """Создание библиотеки, возвращает число созданных файлов по расширениям"""
+    rng = random.Random(seed)
+    weights = parse_mix(mix)
+    extensions = list(weights)
+    counts = {ext: 0 for ext in extensions}
+    leaves = []
+
+    def build(path, level, name):
+        os.makedirs(path, exist_ok=True)
+        if level == depth:
+            leaves.append((path, name))
+            return
+        for i in range(fan_out):
+            build(os.path.join(path, f"{'ABC'[level % 3]}{i:03d}"), level + 1, f"{name} {i}".strip())
+
+    build(root, 0, "")
+
+    created = 0
+    for leaf, name in leaves:
+        artist = f"Artist {name.split(' ')[0] if name else 0}"
+        album = f"Album {name}"
+        for track in range(1, files_per_dir + 1):
+            if max_files is not None and created >= max_files:
+                break
+            ext = rng.choices(extensions, weights=[weights[e] for e in extensions])[0]
+            title = f"Track {track} ({name})"
+            path = os.path.join(leaf, f"{track:02d} {title}{ext}")
+            with open(path, 'wb') as f:
+                if ext == '.mp3':
+                    f.write(mp3_bytes(title, artist, album, track, mp3_frames))
+                elif ext == '.flac':
+                    f.write(flac_bytes(title, artist, album, track))
+            counts[ext] += 1
+            created += 1
+
+    # Ссылки на случайные папки и файлы: проверка дедупликации при обходе
+    for i in range(min(symlinks, len(leaves))):
+        target, _ = rng.choice(leaves)
+        os.symlink(target, os.path.join(root, f"link_dir_{i:03d}"))
+        files = sorted(os.listdir(target))
+        if files:
+            file_name = rng.choice(files)
+            os.symlink(os.path.join(target, file_name),
+                       os.path.join(root, f"link_file_{i:03d}{os.path.splitext(file_name)[1]}"))
+
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Генератор синтетической библиотеки")
+    parser.add_argument('root')
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--fan-out', type=int, default=10)
+    parser.add_argument('--files-per-dir', type=int, default=20)
+    parser.add_argument('--mix', default=DEFAULT_MIX, help="Расширения с весами, например mp3:70,flac:30")
+    parser.add_argument('--symlinks', type=int, default=0)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--mp3-frames', type=int, default=MP3_FRAMES, help="Число кадров MPEG в каждом MP3")
+    args = parser.parse_args()
+
+    counts = generate_library(args.root, args.depth, args.fan_out, args.files_per_dir,
+                              args.mix, args.symlinks, args.seed, mp3_frames=args.mp3_frames)
+    print(f"Создано файлов: {sum(counts.values())} ({', '.join(f'{ext}: {n}' for ext, n in counts.items())})")
+
+if __name__ == "__main__":
+    main()
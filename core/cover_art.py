@@ -0,0 +1,213 @@
+import base64
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import mutagen
+from mutagen.flac import FLAC, Picture
+from mutagen.id3 import ID3, ID3NoHeaderError
+from mutagen.mp4 import MP4
+
+# Имена файлов обложек рядом с треками, в порядке предпочтения
+SIDECAR_NAMES = ['cover', 'folder', 'front', 'album']
+SIDECAR_EXTENSIONS = ['.jpg', '.jpeg', '.png']
+
+# Тип APIC/Picture «обложка спереди»
+FRONT_COVER = 3
+
+def _pick_picture(pictures: List[Tuple[int, bytes]]) -> Optional[bytes]:
+    """Передняя обложка, а если её нет — первая картинка"""
+    for picture_type, data in pictures:
+        if picture_type == FRONT_COVER and data:
+            return data
+    for _, data in pictures:
+        if data:
+            return data
+    return None
+
+def extract_embedded_cover(file_path: str) -> Optional[bytes]:
+    """Встроенная обложка: APIC (ID3), Picture (FLAC/Vorbis), covr (MP4)"""
+    file_ext = os.path.splitext(file_path)[1].lower()
+    try:
+        if file_ext == '.mp3':
+            try:
+                tags = ID3(file_path)
+            except ID3NoHeaderError:
+                return None
+            return _pick_picture([(frame.type, frame.data) for frame in tags.getall('APIC')])
+        if file_ext == '.flac':
+            return _pick_picture([(picture.type, picture.data) for picture in FLAC(file_path).pictures])
+        if file_ext == '.m4a':
+            tags = MP4(file_path).tags
+            covers = tags.get('covr') if tags else None
+            return bytes(covers[0]) if covers else None
+
+        audio_file = mutagen.File(file_path)
+        if audio_file is None or audio_file.tags is None:
+            return None
+        # Ogg Vorbis/Opus хранят Picture в base64 в комментарии
+        pictures = []
+        for value in audio_file.tags.get('metadata_block_picture', []):
+            picture = Picture(base64.b64decode(value))
+            pictures.append((picture.type, picture.data))
+        return _pick_picture(pictures)
+    except Exception as e:
+        print(f"Ошибка чтения обложки: {e}")
+        return None
+
+def find_sidecar_cover(file_path: str) -> Optional[str]:
+    """Файл обложки в папке трека (cover.jpg, folder.png и т.п.), регистр не важен"""
+    dir_path = os.path.dirname(file_path)
+    try:
+        names = {name.lower(): name for name in os.listdir(dir_path)}
+    except OSError:
+        return None
+    for base in SIDECAR_NAMES:
+        for ext in SIDECAR_EXTENSIONS:
+            name = names.get(base + ext)
+            if name is not None:
+                return os.path.join(dir_path, name)
+    return None
+
+def extract_cover(file_path: str) -> Optional[bytes]:
+    """Исходные байты обложки трека: встроенной или из папки"""
+    data = extract_embedded_cover(file_path)
+    if data:
+        return data
+    sidecar = find_sidecar_cover(file_path)
+    if sidecar is None:
+        return None
+    try:
+        with open(sidecar, 'rb') as f:
+            return f.read()
+    except OSError as e:
+        print(f"Ошибка чтения обложки: {e}")
+        return None
+
+def image_hash(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+class CoverCache:
+    """Миниатюры обложек на диске с ограничением размера и вытеснением давно не использованных.
+
+    Миниатюра хранится один раз на каждую уникальную картинку (ключ — хэш
+    исходных байт и размер), а треки ссылаются на неё: обложка альбома не
+    дублируется по числу треков. Связь трека с картинкой действительна,
+    пока не изменились размер и mtime файла и mtime его папки: появление
+    или удаление cover.jpg меняет папку, а не сам трек.
+    """
+
+    def __init__(self, cache_dir: str = "data/covers", max_bytes: int = 64 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.conn = sqlite3.connect(str(self.cache_dir / "covers.db"), check_same_thread=False)
+        self.lock = threading.Lock()
+        self.init_db()
+
+    def init_db(self):
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS images (
+                key TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )
+        ''')
+        # hash пустой, если у трека нет обложки: повторно файл не открываем
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS tracks (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime INTEGER NOT NULL,
+                hash TEXT,
+                dir_mtime INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        columns = [row[1] for row in cursor.execute('PRAGMA table_info(tracks)')]
+        if 'dir_mtime' not in columns:
+            # Старые записи не знают mtime папки и будут перепроверены
+            cursor.execute('ALTER TABLE tracks ADD COLUMN dir_mtime INTEGER NOT NULL DEFAULT 0')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_images_last_used ON images (last_used)')
+        self.conn.commit()
+
+    @staticmethod
+    def image_key(hash_value: str, size: int) -> str:
+        return f"{hash_value}_{size}"
+
+    def image_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.jpg"
+
+    def get_track(self, file_path: str, stat: os.stat_result, dir_mtime: int) -> Tuple[bool, Optional[str]]:
+        """(известен ли трек, хэш его обложки или None, если обложки нет)"""
+        with self.lock:
+            row = self.conn.execute('SELECT size, mtime, hash, dir_mtime FROM tracks WHERE path = ?',
+                                    (file_path,)).fetchone()
+        if row is None or row[0] != stat.st_size or row[1] != stat.st_mtime_ns or row[3] != dir_mtime:
+            return False, None
+        return True, row[2]
+
+    def set_track(self, file_path: str, stat: os.stat_result, dir_mtime: int, hash_value: Optional[str]):
+        with self.lock:
+            self.conn.execute('INSERT OR REPLACE INTO tracks (path, size, mtime, hash, dir_mtime) '
+                              'VALUES (?, ?, ?, ?, ?)',
+                              (file_path, stat.st_size, stat.st_mtime_ns, hash_value, dir_mtime))
+            self.conn.commit()
+
+    def get_image(self, key: str) -> Optional[str]:
+        """Путь к миниатюре или None; обращение продлевает её жизнь в кэше"""
+        path = self.image_path(key)
+        with self.lock:
+            cursor = self.conn.execute('UPDATE images SET last_used = ? WHERE key = ?', (time.time(), key))
+            self.conn.commit()
+        if cursor.rowcount and path.exists():
+            return str(path)
+        return None
+
+    def put_image(self, key: str, data: bytes) -> str:
+        path = self.image_path(key)
+        # Одну картинку могут сохранять сразу несколько потоков пула
+        tmp_path = path.with_suffix(f'.{threading.get_ident()}.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self.lock:
+            self.conn.execute('INSERT OR REPLACE INTO images (key, size, last_used) VALUES (?, ?, ?)',
+                              (key, len(data), time.time()))
+            self._evict()
+            self.conn.commit()
+        return str(path)
+
+    def _evict(self):
+        """Удаление самых старых миниатюр, пока кэш больше max_bytes"""
+        total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM images').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self.conn.execute('SELECT key, size FROM images ORDER BY last_used').fetchall():
+            if total <= self.max_bytes:
+                break
+            try:
+                self.image_path(key).unlink()
+            except FileNotFoundError:
+                pass
+            self.conn.execute('DELETE FROM images WHERE key = ?', (key,))
+            total -= size
+
+    def total_size(self) -> int:
+        with self.lock:
+            return self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM images').fetchone()[0]
+
+    def clear(self):
+        with self.lock:
+            for (key,) in self.conn.execute('SELECT key FROM images').fetchall():
+                try:
+                    self.image_path(key).unlink()
+                except FileNotFoundError:
+                    pass
+            self.conn.execute('DELETE FROM images')
+            self.conn.execute('DELETE FROM tracks')
+            self.conn.commit()
@@ -0,0 +1,104 @@
+import math
+import threading
+import time
+from typing import Optional
+
+def fade_in(t: float) -> float:
+    """Множитель громкости входящего трека; вместе с fade_out сохраняет суммарную мощность"""
+    return math.sin(t * math.pi / 2)
+
+def fade_out(t: float) -> float:
+    return math.cos(t * math.pi / 2)
+
+class Crossfader:
+    """Кроссфейд между треками MusicPlayer.
+
+    За duration секунд до конца трека (или до его конечной тишины, если
+    она известна по анализу громкости) следующий трек запускается на
+    втором плеере libvlc, пропуская начальную тишину, и громкости обоих
+    плееров меняются навстречу. Шаги выполняет отдельный поток по
+    монотонным часам, поэтому переход плавный при любой загрузке окна.
+    Между переходами поток спит до расчётного момента начала следующего.
+    """
+    STEP = 0.02
+    # Без новостей от плеера поток сверяется с ним не реже этого периода
+    MAX_WAIT = 2.0
+    # Если до конца трека осталось меньше, он доигрывается без наложения
+    MIN_OVERLAP = 0.3
+
+    def __init__(self, player):
+        self.player = player
+        self.duration = 0.0
+        # (затихающий плеер libvlc, его усиление, начало перехода, длительность)
+        self.fading = None
+        self.wake_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def set_duration(self, seconds: float):
+        """Длительность наложения в секундах; 0 — переход встык"""
+        self.duration = max(0.0, seconds)
+        self.wake()
+
+    def wake(self):
+        """Пересчёт момента перехода; можно вызывать из обработчиков событий libvlc"""
+        self.wake_event.set()
+
+    def _run(self):
+        timeout = None
+        while True:
+            self.wake_event.wait(timeout)
+            self.wake_event.clear()
+            try:
+                with self.player.lock:
+                    timeout = self._step()
+            except Exception as e:
+                print(f"Ошибка кроссфейда: {e}")
+                timeout = None
+
+    def _step(self) -> Optional[float]:
+        """Очередной шаг; возвращает, через сколько секунд проснуться (None — по событию)"""
+        if self.fading is not None:
+            return self._ramp()
+        player = self.player
+        if self.duration <= 0 or not player.is_playing():
+            return None
+        length = player.get_length()
+        if length <= 0:
+            return None
+        end = length
+        if player.current_trail is not None:
+            end = min(end, player.current_trail)
+        remaining = (end - max(player.get_time(), 0)) / 1000
+        # Короткий трек накладывается на соседа не больше чем половиной
+        overlap = min(self.duration, end / 2000)
+        if remaining > overlap:
+            return min(remaining - overlap, self.MAX_WAIT)
+        if remaining < self.MIN_OVERLAP:
+            return None
+        gain = player.track_gain
+        old = player.begin_crossfade()
+        if old is None:
+            return None
+        self.fading = (old, gain, time.monotonic(), remaining)
+        return self._ramp()
+
+    def _ramp(self) -> float:
+        old, gain, started, duration = self.fading
+        t = (time.monotonic() - started) / duration
+        if t >= 1:
+            self.finish()
+            return 0
+        player = self.player
+        old.audio_set_volume(int(round(player.level(gain) * fade_out(t))))
+        player.player.audio_set_volume(int(round(player.level() * fade_in(t))))
+        return self.STEP
+
+    def finish(self):
+        """Немедленное завершение перехода: старый трек останавливается, новый звучит в полную силу"""
+        if self.fading is None:
+            return
+        old = self.fading[0]
+        self.fading = None
+        old.stop()
+        self.player._apply_volume()
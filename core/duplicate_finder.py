@@ -0,0 +1,157 @@
+import hashlib
+import multiprocessing
+import os
+import struct
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+PARTIAL_SIZE = 64 * 1024
+CHUNK_SIZE = 1024 * 1024
+
+def audio_payload_range(path: str) -> Optional[Tuple[int, int]]:
+    """Границы звуковых данных без тегов ID3v2/FLAC в начале и APEv2/ID3v1 в конце"""
+    try:
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            start = 0
+            end = size
+
+            # Один или несколько тегов ID3v2 (встречаются и перед fLaC)
+            while True:
+                f.seek(start)
+                header = f.read(10)
+                if len(header) < 10 or header[:3] != b'ID3':
+                    break
+                tag_size = ((header[6] & 0x7f) << 21 | (header[7] & 0x7f) << 14 |
+                            (header[8] & 0x7f) << 7 | (header[9] & 0x7f))
+                start += 10 + tag_size + (10 if header[5] & 0x10 else 0)
+
+            f.seek(start)
+            if f.read(4) == b'fLaC':
+                # Блоки метаданных FLAC: комментарии, обложки, отступы
+                start += 4
+                while start < end:
+                    f.seek(start)
+                    block = f.read(4)
+                    if len(block) < 4:
+                        break
+                    start += 4 + int.from_bytes(block[1:4], 'big')
+                    if block[0] & 0x80:
+                        break
+
+            if end - start >= 128:
+                f.seek(end - 128)
+                if f.read(3) == b'TAG':
+                    end -= 128
+
+            if end - start >= 32:
+                f.seek(end - 32)
+                footer = f.read(32)
+                if footer[:8] == b'APETAGEX':
+                    tag_size, flags = struct.unpack('<I4xI', footer[12:24])
+                    end -= tag_size + (32 if flags & 0x80000000 else 0)
+
+            return start, max(start, end)
+    except OSError:
+        return None
+
+def _payload_ranges(paths: List[str]) -> List[Tuple[str, Optional[Tuple[int, int]]]]:
+    return [(path, audio_payload_range(path)) for path in paths]
+
+def _read_range(f, start: int, length: int):
+    f.seek(start)
+    while length > 0:
+        data = f.read(min(CHUNK_SIZE, length))
+        if not data:
+            break
+        length -= len(data)
+        yield data
+
+def _hash_payloads(items: List[Tuple[str, int, int]], partial: bool) -> List[Tuple[str, Optional[str]]]:
+    """Хэш звуковых данных: только начало и конец (partial) или целиком"""
+    result = []
+    for path, start, end in items:
+        digest = hashlib.blake2b(digest_size=20)
+        try:
+            with open(path, 'rb') as f:
+                if partial and end - start > 2 * PARTIAL_SIZE:
+                    for data in _read_range(f, start, PARTIAL_SIZE):
+                        digest.update(data)
+                    for data in _read_range(f, end - PARTIAL_SIZE, PARTIAL_SIZE):
+                        digest.update(data)
+                else:
+                    for data in _read_range(f, start, end - start):
+                        digest.update(data)
+        except OSError:
+            result.append((path, None))
+            continue
+        result.append((path, digest.hexdigest()))
+    return result
+
+class DuplicateFinder:
+    """Поиск побайтовых копий аудиофайлов.
+
+    Файлы группируются по размеру звуковых данных, затем по хэшу их начала
+    и конца, и только совпавшие хэшируются целиком. Теги в расчёт не идут,
+    поэтому копии с разными тегами тоже считаются дубликатами.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, chunk_size: int = 64):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+
+    def find(self, paths: Iterable[str], cancel_event: Optional[threading.Event] = None,
+             progress: Optional[Callable[[str, int, int], None]] = None) -> List[List[str]]:
+        """Группы одинаковых файлов (не меньше двух в группе), пустой список при отмене"""
+        paths = sorted(set(paths))
+        # spawn, как и у пула MetadataEditor: fork многопоточного процесса может унести захваченную блокировку
+        with ProcessPoolExecutor(max_workers=self.max_workers,
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            ranges = dict(self._run(pool, _payload_ranges, paths, 'size', cancel_event, progress))
+            sizes = {path: payload[1] - payload[0] for path, payload in ranges.items() if payload is not None}
+            groups = self._group_by(sizes, sizes.get)
+
+            candidates = [(path, *ranges[path]) for group in groups for path in group]
+            digests = dict(self._run(pool, _hash_payloads, candidates, 'partial', cancel_event, progress, True))
+            groups = self._group_by((path for path in digests if digests[path] is not None),
+                                    lambda path: (sizes[path], digests[path]))
+
+            # Небольшие файлы на предыдущем шаге уже хэшированы целиком
+            result = [group for group in groups if sizes[group[0]] <= 2 * PARTIAL_SIZE]
+            candidates = [(path, *ranges[path]) for group in groups
+                          if sizes[group[0]] > 2 * PARTIAL_SIZE for path in group]
+            digests = dict(self._run(pool, _hash_payloads, candidates, 'full', cancel_event, progress, False))
+            result += self._group_by((path for path in digests if digests[path] is not None),
+                                     lambda path: (sizes[path], digests[path]))
+
+            if cancel_event is not None and cancel_event.is_set():
+                return []
+        return sorted(sorted(group) for group in result)
+
+    @staticmethod
+    def _group_by(paths: Iterable[str], key: Callable) -> List[List[str]]:
+        buckets: Dict[object, List[str]] = {}
+        for path in paths:
+            buckets.setdefault(key(path), []).append(path)
+        return [group for group in buckets.values() if len(group) > 1]
+
+    def _run(self, pool, func, items, stage, cancel_event, progress, *args):
+        """Раздача задач пулу пачками, результаты по мере готовности"""
+        if not items or (cancel_event is not None and cancel_event.is_set()):
+            return
+        futures = [pool.submit(func, items[start:start + self.chunk_size], *args)
+                   for start in range(0, len(items), self.chunk_size)]
+        done = 0
+        try:
+            for future in as_completed(futures):
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                results = future.result()
+                done += len(results)
+                if progress is not None:
+                    progress(stage, done, len(items))
+                yield from results
+        finally:
+            for future in futures:
+                future.cancel()
@@ -1,15 +1,34 @@
 import os
+import threading
+import time
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from core.library_index import LibraryIndex
+from core.scan_engine import ScanEngine
 
 class FileScanner:
+    BATCH_INTERVAL = 0.1
+    # Служебные папки, которые не содержат музыки, но бывают огромными
+    DEFAULT_EXCLUDE = ['.git', '.hg', '.svn', 'node_modules', '__pycache__', '.venv', 'venv',
+                       '.tox', 'site-packages', '.cache', '.Trash*']
+
     def __init__(self):
         self.audio_extensions = {'.mp3', '.wav', '.flac', '.aac', '.ogg', '.m4a', '.wma', '.aiff'}
-    
-    def scan_by_extensions(self, extensions: List[str]) -> Dict[str, List[str]]:
-        result = {}
+        self.index: Optional[LibraryIndex] = None
+        # Корни с необязательной глубиной обхода, шаблоны исключений и лимит треков
+        self.scan_roots: List[Tuple[str, Optional[int]]] = [
+            (str(path), None) for path in self.get_default_scan_paths()
+        ]
+        self.exclude_patterns: List[str] = list(self.DEFAULT_EXCLUDE)
+        self.library_limit: Optional[int] = None
+        # Счётчики последнего обхода: папки и пропущенные повторы (корни, папки, файлы)
+        self.last_stats: Dict[str, int] = {}
 
-        scan_paths = [
+    @staticmethod
+    def get_default_scan_paths() -> List[Path]:
+        """Папки, в которых музыка ищется по умолчанию"""
+        return [
             Path.home() / "Music",
             Path.home() / "Desktop",
             Path.home() / "Downloads",
@@ -18,18 +37,107 @@ class FileScanner:
             Path.cwd() / "audio"
         ]
 
-        for scan_path in scan_paths:
-            if not scan_path.exists():
-                continue
+    def get_scan_paths(self) -> List[Path]:
+        """Папки, в которых ищется музыка"""
+        return [Path(root) for root, _ in self.scan_roots]
 
-            for root, dirs, files in os.walk(scan_path):
-                for file in files:
-                    if Path(file).suffix.lower() in extensions:
-                        full_path = os.path.join(root, file)
-                        ext = Path(file).suffix.lower()
+    def configure(self, roots: List[Tuple[str, Optional[int]]], exclude: List[str],
+                  library_limit: Optional[int]):
+        """Настройка корней (путь, глубина), исключений и лимита библиотеки"""
+        self.scan_roots = [(str(root), depth) for root, depth in roots]
+        self.exclude_patterns = list(exclude)
+        self.library_limit = library_limit or None
 
-                        if ext not in result:
-                            result[ext] = []
-                        result[ext].append(full_path)
+    def create_engine(self, extensions) -> ScanEngine:
+        max_depth = {root: depth for root, depth in self.scan_roots if depth is not None}
+        return ScanEngine(extensions, exclude=self.exclude_patterns, max_depth=max_depth,
+                          limit=self.library_limit)
 
+    def scan_by_extensions(self, extensions: List[str]) -> Dict[str, List[str]]:
+        roots = [str(path) for path in self.get_scan_paths() if path.exists()]
+        engine = self.create_engine(extensions)
+        result = engine.scan(roots)
+        self.last_stats = dict(engine.stats, limit_reached=engine.limit_reached)
         return result
+
+    def describe_scan_stats(self) -> str:
+        """Краткая сводка последнего обхода: пропущенные повторы и лимит"""
+        stats = self.last_stats
+        parts = []
+        if any(stats.get(key) for key in ('roots_skipped', 'dirs_skipped', 'files_skipped')):
+            parts.append(f"пропущено повторов: корней {stats.get('roots_skipped', 0)}, "
+                         f"папок {stats.get('dirs_skipped', 0)}, файлов {stats.get('files_skipped', 0)}")
+        if stats.get('dirs_excluded'):
+            parts.append(f"исключено папок: {stats['dirs_excluded']}")
+        if stats.get('limit_reached'):
+            parts.append(f"достигнут лимит библиотеки ({self.library_limit} треков)")
+        return "; ".join(parts)
+
+    def get_index(self) -> LibraryIndex:
+        if self.index is None:
+            self.index = LibraryIndex()
+        return self.index
+
+    def scan_changes(self, extensions: List[str]) -> Dict[str, List[str]]:
+        """Инкрементальное сканирование: только изменения с прошлого раза"""
+        delta = {'added': [], 'removed': [], 'modified': []}
+        for batch in self.iter_scan(extensions):
+            for change in delta:
+                delta[change].extend(batch[change])
+        return delta
+
+    def iter_scan(self, extensions: List[str], batch_size: int = 200,
+                  cancel_event: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
+        """Потоковое сканирование: изменения выдаются пачками по мере обхода.
+
+        Каждая пачка содержит списки added/removed/modified и счётчики
+        dirs (обработано папок) и found (всего добавлено файлов).
+        Первая найденная пачка отдаётся сразу, дальше не реже BATCH_INTERVAL.
+        """
+        extensions = {ext.lower() for ext in extensions}
+        roots = [str(path) for path in self.get_scan_paths()]
+        batch = {'added': [], 'removed': [], 'modified': []}
+        pending = 0
+        dirs = 0
+        found = 0
+        last_flush = None
+
+        def flush():
+            nonlocal batch, pending, last_flush
+            result = dict(batch, dirs=dirs, found=found)
+            batch = {'added': [], 'removed': [], 'modified': []}
+            pending = 0
+            last_flush = time.monotonic()
+            return result
+
+        engine = self.create_engine(self.audio_extensions)
+        for changes in self.get_index().iter_update(roots, self.audio_extensions, cancel_event, engine=engine):
+            dirs += 1
+            for change, paths in changes.items():
+                matched = [path for path in paths if os.path.splitext(path)[1].lower() in extensions]
+                batch[change].extend(matched)
+                pending += len(matched)
+                if change == 'added':
+                    found += len(matched)
+
+            if pending and (last_flush is None or pending >= batch_size
+                            or time.monotonic() - last_flush >= self.BATCH_INTERVAL):
+                yield flush()
+
+        self.last_stats = dict(self.get_index().last_stats)
+        if pending:
+            yield flush()
+
+    def refresh_dirs(self, dirs: List[str], extensions: Optional[List[str]] = None) -> Dict[str, List[str]]:
+        """Перечитать только указанные папки (например, по событию наблюдателя)"""
+        extensions = {ext.lower() for ext in (extensions or self.audio_extensions)}
+        delta = {'added': [], 'removed': [], 'modified': []}
+        engine = self.create_engine(self.audio_extensions)
+        for changes in self.get_index().iter_update(dirs, self.audio_extensions, partial=True, engine=engine):
+            for change, paths in changes.items():
+                delta[change].extend(path for path in paths if os.path.splitext(path)[1].lower() in extensions)
+        return delta
+
+    def get_indexed_files(self, extensions: List[str]) -> Dict[str, List[str]]:
+        """Файлы из индекса без обращения к диску"""
+        return self.get_index().get_files(extensions)
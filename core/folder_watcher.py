@@ -0,0 +1,214 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from core.scan_engine import ScanEngine
+
+# Флаги inotify из <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE |
+              IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+EVENT_HEADER = struct.Struct('iIII')
+
+class FolderWatcher:
+    """Отслеживание изменений в папках библиотеки.
+
+    На Linux используется inotify, в остальных случаях (или если inotify
+    недоступен) папки периодически опрашиваются. Изменения копятся и
+    передаются в on_change списком «грязных» папок, которые нужно перечитать.
+    """
+
+    def __init__(self, roots: Iterable[str], extensions: Iterable[str],
+                 on_change: Callable[[List[str]], None],
+                 debounce: float = 1.0, poll_interval: float = 30.0, exclude: Iterable[str] = ()):
+        # Те же канонические пути и исключения, что и при сканировании
+        self.engine = ScanEngine([], exclude=exclude)
+        self.roots = self.engine.canonical_roots(str(root) for root in roots if os.path.isdir(str(root)))
+        self.extensions = {ext.lower() for ext in extensions}
+        self.on_change = on_change
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+
+        self.mode = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._libc = None
+        self._fd = -1
+        self._watches: Dict[int, str] = {}
+        self._dirty: Set[str] = set()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        if self._init_inotify():
+            self.mode = 'inotify'
+            target = self._inotify_run
+        else:
+            self.mode = 'polling'
+            target = self._polling_loop
+        self._thread = threading.Thread(target=target, name="FolderWatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+        self._watches.clear()
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _init_inotify(self) -> bool:
+        if not sys.platform.startswith('linux') or not self.roots:
+            return False
+        try:
+            self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+            self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError):
+            return False
+        return self._fd >= 0
+
+    def _inotify_run(self):
+        # Обход дерева папок может быть долгим, поэтому он идёт в потоке наблюдения, а не в start()
+        for root in self.roots:
+            if not self._add_tree(root):
+                if self._stop.is_set():
+                    return
+                # Закончился лимит fs.inotify.max_user_watches
+                print("inotify: недостаточно дескрипторов наблюдения, перехожу на опрос папок")
+                os.close(self._fd)
+                self._fd = -1
+                self._watches.clear()
+                self.mode = 'polling'
+                self._polling_loop()
+                return
+        self._inotify_loop()
+
+    def _add_tree(self, top: str) -> bool:
+        """Добавление наблюдения за папкой и всеми вложенными"""
+        for root, dirs, files in os.walk(top):
+            if self._stop.is_set():
+                return False
+            dirs[:] = [name for name in dirs if not self.engine.is_excluded(os.path.join(root, name))]
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(root), WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err == errno.ENOSPC:
+                    return False
+                continue
+            self._watches[wd] = root
+        return True
+
+    def _forget_tree(self, top: str):
+        prefix = top + os.sep
+        for wd, path in list(self._watches.items()):
+            if path == top or path.startswith(prefix):
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._watches[wd]
+
+    def _is_audio(self, name: str) -> bool:
+        return os.path.splitext(name)[1].lower() in self.extensions
+
+    def _inotify_loop(self):
+        last_event = None
+        first_event = None
+        while not self._stop.is_set():
+            readable, _, _ = select.select([self._fd], [], [], 0.5)
+            if readable:
+                try:
+                    data = os.read(self._fd, 64 * 1024)
+                except BlockingIOError:
+                    data = b''
+                if data and self._handle_events(data):
+                    last_event = time.monotonic()
+                    first_event = first_event or last_event
+
+            # Ждём затишья, но не дольше 5 интервалов при непрерывном потоке событий
+            if self._dirty and last_event is not None:
+                now = time.monotonic()
+                if now - last_event >= self.debounce or now - first_event >= self.debounce * 5:
+                    self._flush()
+                    last_event = first_event = None
+
+    def _handle_events(self, data: bytes) -> bool:
+        changed = False
+        moved_from = {}
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                # Очередь переполнена: перечитываем все корни
+                self._dirty.update(self.roots)
+                changed = True
+                continue
+
+            dir_path = self._watches.get(wd)
+            if dir_path is None:
+                continue
+            if mask & IN_IGNORED:
+                del self._watches[wd]
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                continue
+
+            path = os.path.join(dir_path, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    old_path = moved_from.pop(cookie, None)
+                    if old_path is not None:
+                        self._forget_tree(old_path)
+                    if not self.engine.is_excluded(path):
+                        self._add_tree(path)
+                elif mask & IN_MOVED_FROM:
+                    moved_from[cookie] = path
+                self._dirty.add(dir_path)
+                changed = True
+            elif self._is_audio(name):
+                self._dirty.add(dir_path)
+                changed = True
+
+        # Папки, перенесённые за пределы наблюдаемых корней
+        for old_path in moved_from.values():
+            self._forget_tree(old_path)
+        return changed
+
+    def _polling_loop(self):
+        while not self._stop.wait(self.poll_interval):
+            self._dirty.update(self.roots)
+            self._flush()
+
+    def _flush(self):
+        dirty = sorted(self._dirty)
+        self._dirty.clear()
+        try:
+            self.on_change(dirty)
+        except Exception as e:
+            print(f"Ошибка обработки изменений в папках: {e}")
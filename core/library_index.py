@@ -0,0 +1,335 @@
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Iterable, Iterator, Optional, Tuple
+
+from core.scan_engine import ScanEngine
+
+class LibraryIndex:
+    # Каталоги, изменённые позже этого порога, не запоминаются: на ФС с грубым
+    # mtime (FAT, SMB) второе изменение в ту же секунду иначе будет пропущено
+    MTIME_SAFETY_NS = 2_000_000_000
+
+    def __init__(self, db_path: str = "data/library/index.db"):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.lock = threading.Lock()
+        self.update_lock = threading.Lock()
+        self.last_stats = {}
+        self.init_db()
+
+    def init_db(self):
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS dirs (
+                path TEXT PRIMARY KEY,
+                parent TEXT,
+                mtime INTEGER NOT NULL,
+                link INTEGER NOT NULL DEFAULT 0,
+                tracks INTEGER NOT NULL DEFAULT 0,
+                size INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        columns = [row[1] for row in cursor.execute('PRAGMA table_info(dirs)')]
+        # tracks и size — итоги по всему поддереву папки
+        missing = [column for column in ('link', 'tracks', 'size') if column not in columns]
+        for column in missing:
+            cursor.execute(f'ALTER TABLE dirs ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                dir TEXT NOT NULL,
+                ext TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime INTEGER NOT NULL,
+                inode INTEGER NOT NULL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_files_dir ON files (dir)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_dirs_parent ON dirs (parent)')
+        cursor.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        if 'tracks' in missing:
+            self._aggregate(cursor)
+        self.conn.commit()
+
+    def update(self, roots: Iterable[str], extensions: Iterable[str]) -> Dict[str, List[str]]:
+        """Инкрементальное обновление индекса, возвращает добавленные, удалённые и изменённые файлы"""
+        delta = {'added': [], 'removed': [], 'modified': []}
+        for changes in self.iter_update(roots, extensions):
+            for change, paths in changes.items():
+                delta[change].extend(paths)
+        return delta
+
+    def iter_update(self, roots: Iterable[str], extensions: Iterable[str],
+                    cancel_event: Optional[threading.Event] = None,
+                    partial: bool = False,
+                    engine: Optional[ScanEngine] = None) -> Iterator[Dict[str, List[str]]]:
+        """Инкрементальное обновление с выдачей изменений по каждой посещённой папке.
+
+        При отмене сохраняются только полностью обработанные папки (без mtime,
+        чтобы следующий проход перечитал их и нашёл непосещённые подпапки),
+        а удаление непосещённых откладывается до следующего полного прохода.
+        В режиме partial перечитываются только переданные папки (даже если их
+        mtime не изменился), а удаляются записи лишь внутри них.
+        engine задаёт исключения, глубину и лимит обхода; если его настройки
+        отличаются от прошлого полного прохода, все папки перечитываются.
+        """
+        extensions = {ext.lower() for ext in extensions}
+        roots = [os.path.realpath(str(root)) for root in roots]
+        forced = set(roots) if partial else set()
+
+        # Параллельные обновления (сканирование и наблюдатель) выполняются по очереди
+        with self.update_lock:
+            yield from self._iter_update(roots, extensions, cancel_event, partial, forced,
+                                         engine or ScanEngine(extensions))
+
+    def _iter_update(self, roots, extensions, cancel_event, partial, forced, engine):
+        with self.lock:
+            known_dirs, children, known_files = self._load()
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'config'").fetchone()
+        config = engine.config_key()
+        # Изменились исключения, глубина или лимит: mtime папок больше не показатель
+        relist = not partial and (row is None or row[0] != config)
+        if partial and engine.limit is not None:
+            # Лимит относится ко всей библиотеке, а не к перечитываемым папкам
+            outside = sum(len(files) for dir_path, files in known_files.items()
+                          if not self._is_within(dir_path, roots))
+            engine.limit = max(0, engine.limit - outside)
+
+        def visit(dir_path, dir_stat):
+            dir_mtime = dir_stat.st_mtime_ns
+
+            if not relist and dir_path not in forced and known_dirs.get(dir_path) == dir_mtime:
+                # Состав каталога не менялся: спускаемся только в известные подкаталоги,
+                # а файлы отмечаем посещёнными, чтобы их копии по ссылкам не задвоились
+                old_files = known_files.get(dir_path, {})
+                kept = engine.claim_files([((dir_stat.st_dev, record[2]), file_path)
+                                           for file_path, record in old_files.items()])
+                files = None
+                if len(kept) < len(old_files):
+                    # Жёсткая ссылка уже найдена под другим путём — эта копия выбывает
+                    files = {file_path: (os.path.splitext(file_path)[1].lower(),) + old_files[file_path]
+                             for file_path in kept}
+                subdirs, linked = [], []
+                for child, link in children.get(dir_path, ()):
+                    (linked if link else subdirs).append(child)
+                return (dir_mtime, files), subdirs, linked
+
+            candidates = []
+            records = {}
+            subdirs = []
+            linked = []
+            try:
+                with os.scandir(dir_path) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir():
+                                (linked if entry.is_symlink() else subdirs).append(entry.path)
+                                continue
+                            ext = os.path.splitext(entry.name)[1].lower()
+                            if ext not in extensions or not entry.is_file():
+                                continue
+                            if entry.is_symlink() and engine.is_alias(entry.path):
+                                continue
+                            stat = entry.stat()
+                        except OSError:
+                            continue
+                        candidates.append(((stat.st_dev, stat.st_ino), entry.path))
+                        records[entry.path] = (ext, stat.st_size, stat.st_mtime_ns, stat.st_ino)
+            except OSError as e:
+                print(f"Ошибка чтения папки {dir_path}: {e}")
+                unreadable.add(dir_path)
+                return None, [], []
+
+            files = {file_path: records[file_path] for file_path in engine.claim_files(candidates)}
+            return (dir_mtime, files), subdirs, linked
+
+        seen_dirs = set()
+        unreadable = set()
+        # Изменение числа треков и размера по папкам файлов: итоги правятся только у них и их предков
+        deltas = {}
+
+        def count(dir_path, tracks, size):
+            total = deltas.setdefault(dir_path, [0, 0])
+            total[0] += tracks
+            total[1] += size
+
+        dir_rows = []
+        file_rows = []
+        removed_files = []
+        now_ns = time.time_ns()
+
+        # При частичном обновлении ссылки проверяются относительно всей библиотеки,
+        # иначе результат расходился бы с полным проходом
+        library_roots = None
+        if partial:
+            library_roots = [path for path in known_dirs if os.path.dirname(path) not in known_dirs]
+
+        for dir_path, payload in engine.iter_dirs(roots, visit=visit, cancel_event=cancel_event,
+                                                  library_roots=library_roots):
+            seen_dirs.add(dir_path)
+            dir_mtime, files = payload
+            changes = {'added': [], 'removed': [], 'modified': []}
+            if files is None:
+                yield changes
+                continue
+
+            old_files = known_files.get(dir_path, {})
+            for file_path, (ext, size, mtime, inode) in files.items():
+                old_record = old_files.get(file_path)
+                if old_record == (size, mtime, inode):
+                    continue
+                changes['added' if old_record is None else 'modified'].append(file_path)
+                file_rows.append((file_path, dir_path, ext, size, mtime, inode))
+                count(dir_path, 1 if old_record is None else 0, size - (old_record[0] if old_record else 0))
+
+            for file_path, (size, _, _) in old_files.items():
+                if file_path not in files:
+                    changes['removed'].append(file_path)
+                    count(dir_path, -1, -size)
+            removed_files.extend(changes['removed'])
+
+            stored_mtime = dir_mtime if now_ns - dir_mtime > self.MTIME_SAFETY_NS else -1
+            dir_rows.append((dir_path, os.path.dirname(dir_path), stored_mtime,
+                             int(dir_path in engine.linked_dirs)))
+
+            yield changes
+
+        cancelled = cancel_event is not None and cancel_event.is_set()
+        if engine.limit_reached or cancelled:
+            # Часть подпапок не вошла в лимит или не была посещена до отмены:
+            # при следующем проходе читаем всё заново, иначе новые подпапки не найдутся
+            dir_rows = [(path, parent, -1, link) for path, parent, _, link in dir_rows]
+        elif unreadable:
+            # Папку с непрочитанной подпапкой перечитываем, пока та не откроется
+            retry = {os.path.dirname(path) for path in unreadable}
+            dir_rows = [(path, parent, -1 if path in retry else mtime, link)
+                        for path, parent, mtime, link in dir_rows]
+
+        removed_dirs = []
+        # Обход, остановленный лимитом, как и отменённый, не дошёл до части папок:
+        # непосещённые папки не считаются удалёнными
+        if not cancelled and not engine.limit_reached:
+            removed_dirs = [path for path in known_dirs
+                            if path not in seen_dirs and (not partial or self._is_within(path, roots))]
+            gone = []
+            for dir_path in removed_dirs:
+                old_files = known_files.get(dir_path, {})
+                gone.extend(old_files)
+                count(dir_path, -len(old_files), -sum(size for size, _, _ in old_files.values()))
+            removed_files.extend(gone)
+            if gone:
+                yield {'added': [], 'removed': gone, 'modified': []}
+
+        self.last_stats = dict(engine.stats, limit_reached=engine.limit_reached)
+        all_dirs = set(known_dirs).union(row[0] for row in dir_rows) if deltas else set()
+        with self.lock:
+            cursor = self.conn.cursor()
+            cursor.executemany('DELETE FROM dirs WHERE path = ?', ((path,) for path in removed_dirs))
+            cursor.executemany('DELETE FROM files WHERE path = ?', ((path,) for path in removed_files))
+            cursor.executemany('''
+                INSERT INTO dirs (path, parent, mtime, link) VALUES (?, ?, ?, ?)
+                ON CONFLICT (path) DO UPDATE SET parent = excluded.parent, mtime = excluded.mtime, link = excluded.link
+            ''', dir_rows)
+            cursor.executemany('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)', file_rows)
+            if deltas:
+                self._add_totals(cursor, deltas, all_dirs)
+            if not partial and not cancelled:
+                cursor.execute("INSERT OR REPLACE INTO meta VALUES ('config', ?)", (config,))
+            self.conn.commit()
+
+    def _aggregate(self, cursor):
+        """Пересчёт числа треков и размера по поддеревьям снизу вверх"""
+        totals = {path: [0, 0] for path, in cursor.execute('SELECT path FROM dirs')}
+        for dir_path, tracks, size in cursor.execute('SELECT dir, COUNT(*), SUM(size) FROM files GROUP BY dir'):
+            if dir_path in totals:
+                totals[dir_path] = [tracks, size]
+
+        parents = dict(cursor.execute('SELECT path, parent FROM dirs').fetchall())
+        for dir_path in sorted(totals, key=lambda path: path.count(os.sep), reverse=True):
+            parent = parents.get(dir_path)
+            if parent in totals and parent != dir_path:
+                totals[parent][0] += totals[dir_path][0]
+                totals[parent][1] += totals[dir_path][1]
+
+        cursor.executemany('UPDATE dirs SET tracks = ?, size = ? WHERE path = ?',
+                           ((tracks, size, path) for path, (tracks, size) in totals.items()))
+
+    @staticmethod
+    def _add_totals(cursor, deltas, dirs):
+        """Прибавление изменений к итогам папок и всех их предков"""
+        totals = {}
+        for dir_path, (tracks, size) in deltas.items():
+            while True:
+                total = totals.setdefault(dir_path, [0, 0])
+                total[0] += tracks
+                total[1] += size
+                parent = os.path.dirname(dir_path)
+                if parent == dir_path or parent not in dirs:
+                    break
+                dir_path = parent
+        cursor.executemany('UPDATE dirs SET tracks = tracks + ?, size = size + ? WHERE path = ?',
+                           ((tracks, size, path) for path, (tracks, size) in totals.items()
+                            if tracks or size))
+
+    @staticmethod
+    def _is_within(path: str, roots: List[str]) -> bool:
+        return any(path == root or path.startswith(root + os.sep) for root in roots)
+
+    def _load(self):
+        """Загрузка индекса в память"""
+        known_dirs = {}
+        children = {}
+        for path, parent, mtime, link in self.conn.execute('SELECT path, parent, mtime, link FROM dirs'):
+            known_dirs[path] = mtime
+            children.setdefault(parent, []).append((path, link))
+
+        known_files = {}
+        for path, dir_path, size, mtime, inode in self.conn.execute(
+                'SELECT path, dir, size, mtime, inode FROM files'):
+            known_files.setdefault(dir_path, {})[path] = (size, mtime, inode)
+
+        return known_dirs, children, known_files
+
+    def get_files(self, extensions: Iterable[str]) -> Dict[str, List[str]]:
+        """Получение проиндексированных файлов, сгруппированных по расширению"""
+        extensions = [ext.lower() for ext in extensions]
+        result = {}
+        placeholders = ', '.join('?' * len(extensions))
+        with self.lock:
+            rows = self.conn.execute(
+                f'SELECT path, ext FROM files WHERE ext IN ({placeholders}) ORDER BY path', extensions).fetchall()
+        for path, ext in rows:
+            result.setdefault(ext, []).append(path)
+        return result
+
+    def get_folder_roots(self) -> List[Tuple[str, int, int]]:
+        """Верхние папки библиотеки: (путь, треков, размер)"""
+        with self.lock:
+            return self.conn.execute(
+                'SELECT path, tracks, size FROM dirs WHERE tracks > 0 AND parent NOT IN (SELECT path FROM dirs) '
+                'ORDER BY path').fetchall()
+
+    def get_subfolders(self, dir_path: str) -> List[Tuple[str, int, int]]:
+        """Вложенные папки с треками: (путь, треков, размер)"""
+        with self.lock:
+            return self.conn.execute(
+                'SELECT path, tracks, size FROM dirs WHERE parent = ? AND path != ? AND tracks > 0 ORDER BY path',
+                (dir_path, dir_path)).fetchall()
+
+    def get_folder_files(self, dir_path: str) -> List[Tuple[str, int]]:
+        """Треки непосредственно в папке: (путь, размер)"""
+        with self.lock:
+            return self.conn.execute(
+                'SELECT path, size FROM files WHERE dir = ? ORDER BY path', (dir_path,)).fetchall()
+
+    def clear(self):
+        """Полная очистка индекса"""
+        with self.lock:
+            self.conn.execute('DELETE FROM dirs')
+            self.conn.execute('DELETE FROM files')
+            self.conn.execute('DELETE FROM meta')
+            self.conn.commit()
@@ -0,0 +1,53 @@
+import json
+import os
+from pathlib import Path
+from typing import Iterable, List, Optional, Set, Tuple
+
+class LibrarySnapshot:
+    """Последний показанный список треков с готовыми названиями для быстрого старта"""
+
+    VERSION = 1
+
+    def __init__(self, snapshot_path: str = "data/library/snapshot.json"):
+        self.snapshot_path = Path(snapshot_path)
+        self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+
+    def save(self, extensions: Iterable[str], tracks: List[Tuple[str, str]]) -> bool:
+        """Сохранение списка (путь, название); запись атомарная"""
+        data = {
+            'version': self.VERSION,
+            'extensions': sorted(extensions),
+            # Пути и названия отдельными списками: так файл компактнее и быстрее читается
+            'paths': [path for path, _ in tracks],
+            'names': [name for _, name in tracks],
+        }
+        tmp_path = self.snapshot_path.with_suffix('.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, self.snapshot_path)
+            return True
+        except Exception as e:
+            print(f"Ошибка сохранения снимка библиотеки: {e}")
+            return False
+
+    def load(self) -> Optional[Tuple[Set[str], List[Tuple[str, str]]]]:
+        """Расширения и список (путь, название) или None, если снимка нет"""
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Ошибка загрузки снимка библиотеки: {e}")
+            return None
+
+        if data.get('version') != self.VERSION or len(data['paths']) != len(data['names']):
+            return None
+        return set(data['extensions']), list(zip(data['paths'], data['names']))
+
+    def clear(self):
+        try:
+            self.snapshot_path.unlink()
+        except FileNotFoundError:
+            pass
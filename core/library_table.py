@@ -0,0 +1,233 @@
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.search_index import fold
+
+# Числовые поля: пропущенное или нечисловое значение хранится как 0.
+# Длины и битрейта нет: таблица заполняется тегами без разбора аудиопотока
+NUMERIC_COLUMNS = {
+    'year': np.int16,
+    'track_number': np.int16,
+    'disc_number': np.int16,
+}
+# Строковые поля кодируются номерами в словаре значений
+STRING_COLUMNS = ['title', 'artist', 'album', 'album_artist', 'genre']
+
+def parse_number(value: Any) -> int:
+    """Число в начале тега: '3/12' -> 3, '1999-05-01' -> 1999, '' -> 0"""
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = re.match(r'\s*(\d+)', str(value or ''))
+    return min(int(match.group(1)), 32767) if match else 0
+
+class StringDictionary:
+    """Словарное кодирование: каждая строка хранится один раз, в столбце — её номер"""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+        self._ranks = None
+
+    def __len__(self):
+        return len(self.values)
+
+    def encode(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self.codes[value] = code
+            self._ranks = None
+        return code
+
+    def find(self, value: str) -> Optional[int]:
+        return self.codes.get(value)
+
+    def ranks(self) -> np.ndarray:
+        """Место каждого кода в алфавитном порядке (без регистра, пустые значения в конце)"""
+        if self._ranks is None or len(self._ranks) != len(self.values):
+            order = sorted(range(len(self.values)),
+                           key=lambda code: (not self.values[code], fold(self.values[code])))
+            ranks = np.empty(len(self.values), dtype=np.int32)
+            ranks[order] = np.arange(len(self.values), dtype=np.int32)
+            self._ranks = ranks
+        return self._ranks
+
+class LibraryTable:
+    """Библиотека в столбцах NumPy: сортировка и фильтры без обхода объектов Python.
+
+    Строка таблицы — трек. Числовые поля лежат в массивах фиксированного
+    типа, строковые — в массивах кодов StringDictionary. Сортировка по
+    нескольким ключам выполняется одним np.lexsort, фильтры — булевыми
+    масками, которые можно комбинировать через & и |.
+    """
+    INITIAL_CAPACITY = 1024
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.paths: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.dictionaries = {name: StringDictionary() for name in STRING_COLUMNS}
+        self.data: Dict[str, np.ndarray] = {}
+        for name, dtype in NUMERIC_COLUMNS.items():
+            self.data[name] = np.zeros(self.INITIAL_CAPACITY, dtype=dtype)
+        for name in STRING_COLUMNS:
+            self.data[name] = np.zeros(self.INITIAL_CAPACITY, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __contains__(self, file_path: str) -> bool:
+        return file_path in self.rows
+
+    def _reserve(self, size: int):
+        capacity = len(self.data['year'])
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        for name, array in self.data.items():
+            grown = np.zeros(capacity, dtype=array.dtype)
+            grown[:len(self.paths)] = array[:len(self.paths)]
+            self.data[name] = grown
+
+    def update(self, items: Iterable[Tuple[str, Dict[str, Any]]]):
+        """Добавление или замена строк (путь, метаданные MetadataEditor)"""
+        with self.lock:
+            for file_path, metadata in items:
+                row = self.rows.get(file_path)
+                if row is None:
+                    row = len(self.paths)
+                    self._reserve(row + 1)
+                    self.paths.append(file_path)
+                    self.rows[file_path] = row
+                for name in NUMERIC_COLUMNS:
+                    self.data[name][row] = parse_number(metadata.get(name))
+                for name in STRING_COLUMNS:
+                    value = str(metadata.get(name) or '').strip()
+                    self.data[name][row] = self.dictionaries[name].encode(value)
+
+    def remove(self, paths: Iterable[str]):
+        with self.lock:
+            rows = [self.rows[file_path] for file_path in paths if file_path in self.rows]
+            if not rows:
+                return
+            keep = np.ones(len(self.paths), dtype=bool)
+            keep[rows] = False
+            for name, array in self.data.items():
+                kept = array[:len(self.paths)][keep]
+                array[:len(kept)] = kept
+            self.paths = [file_path for file_path, kept in zip(self.paths, keep) if kept]
+            self.rows = {file_path: row for row, file_path in enumerate(self.paths)}
+
+    def sync(self, paths: Iterable[str], metadata_editor, cancel_event=None):
+        """Приведение таблицы к списку путей: недостающие добавляются, лишние удаляются"""
+        paths = set(paths)
+        with self.lock:
+            known = set(self.rows)
+        self.remove(known - paths)
+        missing = sorted(paths - known)
+        if missing:
+            self.update(list(metadata_editor.get_metadata_many(missing, cancel_event, stream_info=False)))
+
+    def column(self, name: str) -> np.ndarray:
+        """Значения (для строковых полей — коды) всех строк; это представление, не копия"""
+        return self.data[name][:len(self.paths)]
+
+    def sort_key(self, name: str, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Ключ сортировки поля: для строк — алфавитный ранг кода"""
+        values = self.column(name) if rows is None else self.data[name][rows]
+        if name in self.dictionaries:
+            return self.dictionaries[name].ranks()[values]
+        return values
+
+    def equals(self, name: str, value: Any) -> np.ndarray:
+        """Маска строк, где поле равно значению"""
+        if name in self.dictionaries:
+            code = self.dictionaries[name].find(str(value))
+            if code is None:
+                return np.zeros(len(self.paths), dtype=bool)
+            return self.column(name) == code
+        return self.column(name) == value
+
+    def between(self, name: str, low: Any, high: Any) -> np.ndarray:
+        """Маска строк с числовым полем в диапазоне [low, high]"""
+        values = self.column(name)
+        return (values >= low) & (values <= high)
+
+    def sort(self, keys: Sequence[str], rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Номера строк в порядке сортировки по ключам ('artist', '-year', ...).
+
+        Минус перед именем поля — по убыванию. Сортировка устойчива: при
+        равных ключах сохраняется порядок добавления. rows ограничивает
+        сортировку подмножеством строк (например, результатом фильтра).
+        """
+        with self.lock:
+            return self._sort(keys, rows)
+
+    def _sort(self, keys, rows):
+        if rows is None:
+            rows = np.arange(len(self.paths))
+        elif rows.dtype == bool:
+            rows = np.flatnonzero(rows)
+        if not keys or not len(rows):
+            return rows
+        sort_keys = []
+        for key in keys:
+            values = self.sort_key(key.lstrip('-'), rows)
+            if key.startswith('-'):
+                values = values.max() - values
+            sort_keys.append(values)
+
+        packed = self._pack(sort_keys)
+        if packed is not None:
+            return rows[np.argsort(packed, kind='stable')]
+        # lexsort сортирует по последнему ключу как по главному
+        return rows[np.lexsort(sort_keys[::-1])]
+
+    @staticmethod
+    def _pack(sort_keys) -> Optional[np.ndarray]:
+        """Целые ключи в одном int64, если хватает бит: одна сортировка вместо нескольких"""
+        packed = np.zeros(len(sort_keys[0]), dtype=np.int64)
+        bits_used = 0
+        for values in sort_keys:
+            if values.dtype.kind not in 'iu':
+                return None
+            low = int(values.min())
+            bits = max(int(values.max()) - low, 0).bit_length()
+            bits_used += bits
+            if bits_used > 63:
+                return None
+            packed = (packed << bits) | (values.astype(np.int64) - low)
+        return packed
+
+    def rows_for(self, paths: Iterable[str]) -> np.ndarray:
+        """Номера строк путей; -1 для путей, которых нет в таблице"""
+        with self.lock:
+            return np.array([self.rows.get(file_path, -1) for file_path in paths], dtype=np.int64)
+
+    def paths_for(self, rows: Iterable[int]) -> List[str]:
+        with self.lock:
+            return [self.paths[row] for row in rows]
+
+    def order(self, paths: Sequence[str], keys: Sequence[str]) -> List[str]:
+        """Пути, упорядоченные по ключам; отсутствующие в таблице идут в конце в исходном порядке"""
+        with self.lock:
+            rows = np.array([self.rows.get(file_path, -1) for file_path in paths], dtype=np.int64)
+            known = rows >= 0
+            ordered = [self.paths[row] for row in self._sort(keys, rows[known])]
+        ordered.extend(file_path for file_path, found in zip(paths, known) if not found)
+        return ordered
+
+    def nbytes(self) -> int:
+        """Объём столбцов NumPy (без путей и словарей строк)"""
+        return sum(array[:len(self.paths)].nbytes for array in self.data.values())
+
+    def clear(self):
+        with self.lock:
+            self.paths = []
+            self.rows = {}
+            self.dictionaries = {name: StringDictionary() for name in STRING_COLUMNS}
@@ -0,0 +1,254 @@
+import math
+import os
+import re
+import shutil
+import sqlite3
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+# Целевая громкость ReplayGain 2.0, LUFS
+REFERENCE_LOUDNESS = -18.0
+# Тишина для кроссфейда: уровень ниже порога (дБ) не короче заданного (с)
+SILENCE_THRESHOLD = -60
+SILENCE_MIN_DURATION = 0.5
+# Как часто идущий анализ проверяет отмену, с
+CANCEL_POLL_INTERVAL = 0.2
+
+def parse_ebur128(output: str) -> Optional[Dict[str, float]]:
+    """Итог фильтра ebur128 из вывода ffmpeg: интегральная громкость (LUFS) и пик (линейный)"""
+    summary = output.rpartition('Summary:')[2]
+    loudness = re.search(r'I:\s*(-?[\d.]+|-inf) LUFS', summary)
+    if loudness is None:
+        return None
+    peak = re.search(r'Peak:\s*(-?[\d.]+|-inf) dBFS', summary)
+    peak_db = float(peak.group(1)) if peak else 0.0
+    return {
+        'loudness': float(loudness.group(1)),
+        'peak': 10 ** (peak_db / 20) if math.isfinite(peak_db) else 0.0,
+    }
+
+def parse_silence(output: str) -> Dict[str, Optional[float]]:
+    """Тишина по выводу silencedetect: lead — где кончается начальная, trail — где начинается конечная (с)"""
+    starts = [float(value) for value in re.findall(r'silence_start:\s*(-?[\d.]+)', output)]
+    ends = [float(value) for value in re.findall(r'silence_end:\s*([\d.]+)', output)]
+    duration = re.search(r'Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)', output)
+    total = None
+    if duration:
+        total = int(duration.group(1)) * 3600 + int(duration.group(2)) * 60 + float(duration.group(3))
+
+    lead = 0.0
+    trail = None
+    if starts and starts[0] <= 0.01 and ends:
+        lead = ends[0]
+    # Последняя тишина без конца или с концом в конце файла — конечная
+    if starts and (len(ends) < len(starts) or (total is not None and ends[-1] >= total - 0.05)):
+        trail = starts[-1] if starts[-1] > lead else None
+    return {'lead': lead, 'trail': trail}
+
+def analyze_file(file_path: str, ffmpeg: str = 'ffmpeg',
+                 cancel_event: Optional[threading.Event] = None) -> Optional[Dict[str, float]]:
+    """Громкость по EBU R128 (интегральная и true peak) и тишина в начале и конце за один проход ffmpeg.
+
+    При установке cancel_event процесс ffmpeg завершается, не дожидаясь конца файла.
+    """
+    filters = (f"ebur128=peak=true:framelog=verbose,"
+               f"silencedetect=noise={SILENCE_THRESHOLD}dB:duration={SILENCE_MIN_DURATION}")
+    cmd = [
+        ffmpeg, '-nostdin', '-hide_banner', '-nostats', '-i', file_path,
+        '-map', '0:a:0', '-af', filters, '-f', 'null', '-',
+    ]
+    # Задача могла дождаться очереди в пуле уже после отмены
+    if cancel_event is not None and cancel_event.is_set():
+        return None
+    try:
+        process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                   text=True, errors='replace')
+    except OSError as e:
+        print(f"Ошибка анализа громкости: {e}")
+        return None
+    with process:
+        while True:
+            try:
+                _, stderr = process.communicate(timeout=CANCEL_POLL_INTERVAL)
+                break
+            except subprocess.TimeoutExpired:
+                if cancel_event is not None and cancel_event.is_set():
+                    process.terminate()
+                    process.communicate()
+                    return None
+    if process.returncode != 0:
+        return None
+    loudness = parse_ebur128(stderr)
+    if loudness is not None:
+        loudness.update(parse_silence(stderr))
+    return loudness
+
+def track_gain(loudness: float, peak: float, target: float = REFERENCE_LOUDNESS) -> float:
+    """Усиление в дБ до целевой громкости, но не выше того, при котором пик начнёт клиппировать"""
+    gain = target - loudness
+    if peak > 0:
+        gain = min(gain, -20 * math.log10(peak))
+    return gain
+
+def parse_replaygain(metadata: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """(усиление дБ, пик) из тегов ReplayGain, например '-6.48 dB' и '0.988'"""
+    gain = re.match(r'\s*([-+]?\d+(?:\.\d+)?)', str(metadata.get('replaygain_track_gain') or ''))
+    if gain is None:
+        return None
+    peak = re.match(r'\s*(\d+(?:\.\d+)?)', str(metadata.get('replaygain_track_peak') or ''))
+    return float(gain.group(1)), float(peak.group(1)) if peak else 0.0
+
+def replaygain_tags(result: Dict[str, float]) -> Dict[str, str]:
+    """Значения тегов ReplayGain для MetadataEditor по результату анализа"""
+    return {
+        'replaygain_track_gain': f"{track_gain(result['loudness'], 0.0):+.2f} dB",
+        'replaygain_track_peak': f"{result['peak']:.6f}",
+    }
+
+class LoudnessCache:
+    """Результаты анализа громкости; запись действительна, пока не изменились размер и mtime файла"""
+
+    def __init__(self, db_path: str = "data/library/loudness.db"):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.lock = threading.Lock()
+        self.init_db()
+
+    def init_db(self):
+        cursor = self.conn.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        # loudness пустой, если файл не удалось разобрать: повторно не анализируем
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS loudness (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime INTEGER NOT NULL,
+                loudness REAL,
+                peak REAL,
+                lead REAL,
+                trail REAL
+            )
+        ''')
+        columns = [row[1] for row in cursor.execute('PRAGMA table_info(loudness)')]
+        # lead и trail — границы тишины в секундах; у старых записей пусты
+        for column in ('lead', 'trail'):
+            if column not in columns:
+                cursor.execute(f'ALTER TABLE loudness ADD COLUMN {column} REAL')
+        self.conn.commit()
+
+    def get(self, file_path: str, stat: os.stat_result) -> Tuple[bool, Optional[Dict[str, float]]]:
+        """(известен ли файл, результат анализа или None, если файл не разобрался)"""
+        with self.lock:
+            row = self.conn.execute('SELECT size, mtime, loudness, peak, lead, trail FROM loudness WHERE path = ?',
+                                    (file_path,)).fetchone()
+        if row is None or row[0] != stat.st_size or row[1] != stat.st_mtime_ns:
+            return False, None
+        if row[2] is None:
+            return True, None
+        return True, {'loudness': row[2], 'peak': row[3], 'lead': row[4], 'trail': row[5]}
+
+    def put(self, file_path: str, stat: os.stat_result, result: Optional[Dict[str, float]]):
+        with self.lock:
+            result = result or {}
+            self.conn.execute(
+                'INSERT OR REPLACE INTO loudness (path, size, mtime, loudness, peak, lead, trail) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (file_path, stat.st_size, stat.st_mtime_ns, result.get('loudness'), result.get('peak'),
+                 result.get('lead'), result.get('trail'))
+            )
+            self.conn.commit()
+
+    def count(self) -> int:
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM loudness WHERE loudness IS NOT NULL').fetchone()[0]
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute('DELETE FROM loudness')
+            self.conn.commit()
+
+class LoudnessAnalyzer:
+    """Пакетный анализ громкости библиотеки и усиление трека для воспроизведения.
+
+    Каждый файл разбирает отдельный процесс ffmpeg; пул потоков только
+    ограничивает число одновременно запущенных процессов. При воспроизведении
+    анализ не выполняется: усиление берётся из кэша или тегов ReplayGain.
+    """
+
+    def __init__(self, cache: Optional[LoudnessCache] = None, max_workers: Optional[int] = None,
+                 ffmpeg: str = 'ffmpeg'):
+        self.cache = cache if cache is not None else LoudnessCache()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.ffmpeg = ffmpeg
+
+    def is_available(self) -> bool:
+        return shutil.which(self.ffmpeg) is not None
+
+    def analyze_many(self, paths: Iterable[str],
+                     cancel_event: Optional[threading.Event] = None) -> Iterator[Tuple[str, Optional[Dict[str, float]], bool]]:
+        """(путь, результат, новый ли это анализ) по мере готовности; проанализированные ранее — из кэша"""
+        pending = []
+        for file_path in paths:
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            known, result = self.cache.get(file_path, stat)
+            if known:
+                yield file_path, result, False
+            else:
+                pending.append((file_path, stat))
+
+        if not pending or (cancel_event is not None and cancel_event.is_set()):
+            return
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(analyze_file, file_path, self.ffmpeg, cancel_event): (file_path, stat)
+                       for file_path, stat in pending}
+            try:
+                for future in as_completed(futures):
+                    if cancel_event is not None and cancel_event.is_set():
+                        break
+                    file_path, stat = futures[future]
+                    result = future.result()
+                    self.cache.put(file_path, stat, result)
+                    yield file_path, result, True
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def remember(self, file_path: str, result: Optional[Dict[str, float]]):
+        """Повторное сохранение результата после записи тегов: у файла новый mtime"""
+        try:
+            self.cache.put(file_path, os.stat(file_path), result)
+        except OSError:
+            pass
+
+    def get_silence(self, file_path: str) -> Optional[Tuple[float, Optional[float]]]:
+        """(конец начальной тишины, начало конечной или None) в секундах; None, если трек не анализировался"""
+        try:
+            _, result = self.cache.get(file_path, os.stat(file_path))
+        except OSError:
+            return None
+        if result is None or result['lead'] is None:
+            return None
+        return result['lead'], result['trail']
+
+    def get_gain(self, file_path: str, metadata: Optional[Dict[str, Any]] = None,
+                 target: float = REFERENCE_LOUDNESS) -> Optional[float]:
+        """Усиление трека в дБ по кэшу анализа или тегам ReplayGain; None, если громкость неизвестна"""
+        try:
+            _, result = self.cache.get(file_path, os.stat(file_path))
+        except OSError:
+            return None
+        if result is not None:
+            return track_gain(result['loudness'], result['peak'], target)
+        replaygain = parse_replaygain(metadata or {})
+        if replaygain is None:
+            return None
+        gain, peak = replaygain
+        # Теги рассчитаны на -18 LUFS; другой целевой уровень — сдвиг
+        return track_gain(REFERENCE_LOUDNESS - gain, peak, target)
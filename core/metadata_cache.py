@@ -0,0 +1,104 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+class MetadataCache:
+    """Разобранные теги файлов; запись считается верной, пока не изменились размер и mtime.
+
+    Записи без технической информации (full = 0) получены быстрым чтением
+    только тегов и не подходят запросам, которым нужна длительность.
+    """
+
+    # Новые записи копятся в памяти и пишутся пачкой, чтобы не делать commit на каждый файл
+    FLUSH_COUNT = 500
+    FLUSH_INTERVAL = 5.0
+
+    def __init__(self, db_path: str = "data/library/metadata.db"):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.last_flush = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        self.init_db()
+
+    def init_db(self):
+        cursor = self.conn.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS metadata (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                full INTEGER NOT NULL DEFAULT 1
+            )
+        ''')
+        columns = [row[1] for row in cursor.execute('PRAGMA table_info(metadata)')]
+        if 'full' not in columns:
+            cursor.execute('ALTER TABLE metadata ADD COLUMN full INTEGER NOT NULL DEFAULT 1')
+        self.conn.commit()
+
+    def get(self, file_path: str, stat: os.stat_result, full: bool = True) -> Optional[Dict[str, Any]]:
+        """Метаданные из кэша или None, если записи нет, файл изменился или нужна полная запись"""
+        with self.lock:
+            row = self.pending.get(file_path)
+            if row is None:
+                row = self.conn.execute(
+                    'SELECT size, mtime, data, full FROM metadata WHERE path = ?', (file_path,)
+                ).fetchone()
+            if (row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime_ns
+                    and (row[3] or not full)):
+                self.hits += 1
+                return json.loads(row[2])
+            self.misses += 1
+            return None
+
+    def put(self, file_path: str, stat: os.stat_result, metadata: Dict[str, Any], full: bool = True):
+        with self.lock:
+            self.pending[file_path] = (stat.st_size, stat.st_mtime_ns,
+                                       json.dumps(metadata, ensure_ascii=False), int(full))
+            if (len(self.pending) >= self.FLUSH_COUNT
+                    or time.monotonic() - self.last_flush >= self.FLUSH_INTERVAL):
+                self._flush()
+
+    def invalidate(self, file_path: str):
+        with self.lock:
+            self.pending.pop(file_path, None)
+            # Удаление видно этому соединению сразу, commit — вместе с очередной пачкой
+            self.conn.execute('DELETE FROM metadata WHERE path = ?', (file_path,))
+            if time.monotonic() - self.last_flush >= self.FLUSH_INTERVAL:
+                self._flush()
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def _flush(self):
+        try:
+            if self.pending:
+                self.conn.executemany(
+                    'INSERT OR REPLACE INTO metadata (path, size, mtime, data, full) VALUES (?, ?, ?, ?, ?)',
+                    [(path, *row) for path, row in self.pending.items()]
+                )
+            self.conn.commit()
+        except sqlite3.Error as e:
+            print(f"Ошибка записи кэша метаданных: {e}")
+        self.pending.clear()
+        self.last_flush = time.monotonic()
+
+    def stats(self) -> Dict[str, int]:
+        """Счётчики попаданий и промахов с момента создания"""
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def clear(self):
+        with self.lock:
+            self.pending.clear()
+            self.conn.execute('DELETE FROM metadata')
+            self.conn.commit()
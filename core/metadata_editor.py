@@ -1,33 +1,247 @@
 import mutagen
-from mutagen.id3 import ID3, TIT2, TPE1, TALB, TDRC, TCON, COMM, TPE2, TCOM, TXXX, USLT, APIC
-from mutagen.flac import FLAC, Picture
-from mutagen.mp4 import MP4, MP4Cover
+from mutagen.id3 import ID3, ID3NoHeaderError, TIT2, TPE1, TALB, TDRC, TCON, COMM, TPE2, TCOM, TRCK, TPOS, TXXX, USLT
+from mutagen.flac import FLAC
+from mutagen.mp4 import MP4, MP4FreeForm
+import multiprocessing
 import os
-from typing import Dict, Any
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+from core.metadata_cache import MetadataCache
+
+def _read_metadata_chunk(paths: List[str], stream_info: bool) -> List[Tuple[str, Dict[str, Any]]]:
+    """Разбор пачки файлов в процессе пула"""
+    reader = MetadataEditor(use_cache=False)
+    return [(path, reader._read_metadata(path, stream_info)) for path in paths]
+
+# Способы сохранения тегов
+WRITE_MODES = {
+    'in_place': "на месте",
+    'rewrite': "с перезаписью файла",
+    'unchanged': "без изменений",
+}
+
+ID3_FRAMES = {
+    'title': TIT2, 'artist': TPE1, 'album': TALB, 'album_artist': TPE2, 'composer': TCOM,
+    'year': TDRC, 'genre': TCON, 'comment': COMM, 'track_number': TRCK, 'disc_number': TPOS,
+}
+VORBIS_FIELDS = {
+    'title': 'title', 'artist': 'artist', 'album': 'album', 'album_artist': 'albumartist',
+    'composer': 'composer', 'year': 'date', 'genre': 'genre', 'comment': 'comment',
+    'track_number': 'tracknumber', 'disc_number': 'discnumber',
+}
+MP4_FIELDS = {
+    'title': '\xa9nam', 'artist': '\xa9ART', 'album': '\xa9alb', 'album_artist': 'aART',
+    'composer': '\xa9wrt', 'year': '\xa9day', 'genre': '\xa9gen', 'comment': '\xa9cmt',
+}
+
+# ReplayGain: одно имя для TXXX (ID3), комментариев Vorbis и свободных атомов MP4
+REPLAYGAIN_FIELDS = {
+    'replaygain_track_gain': 'REPLAYGAIN_TRACK_GAIN',
+    'replaygain_track_peak': 'REPLAYGAIN_TRACK_PEAK',
+}
+MP4_FREEFORM = '----:com.apple.iTunes:'
+
+def _update_metadata_chunk(paths: List[str], changes: Dict[str, str]) -> List[Tuple[str, Optional[str]]]:
+    """Запись изменений тегов для пачки файлов в процессе пула; способ записи или None при ошибке"""
+    writer = MetadataEditor(use_cache=False)
+    return [(path, writer.last_write_mode if writer.update_metadata(path, changes) else None)
+            for path in paths]
 
 class MetadataEditor:
-    def __init__(self):
+    # Меньше этого числа непрочитанных файлов разбираем в текущем процессе:
+    # запуск пула обходится дороже
+    POOL_THRESHOLD = 64
+    # Запас места под теги при вынужденной перезаписи файла
+    TAG_PADDING = 8192
+
+    def __init__(self, cache: Optional[MetadataCache] = None, use_cache: bool = True,
+                 max_workers: Optional[int] = None, chunk_size: int = 32):
         self.supported_formats = {'.mp3', '.flac', '.m4a', '.aac'}
+        self.cache = (cache if cache is not None else MetadataCache()) if use_cache else None
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.pool = None
+        self.pool_lock = threading.Lock()
+        self.last_write_mode = None
+        self.write_stats = {mode: 0 for mode in WRITE_MODES}
     
-    def get_metadata(self, file_path: str) -> Dict[str, Any]:
-        """Получение метаданных трека"""
+    def get_metadata(self, file_path: str, stream_info: bool = True) -> Dict[str, Any]:
+        """Получение метаданных трека (из кэша, если файл не менялся).
+
+        При stream_info=False читаются только теги из заголовка файла, без
+        длительности и битрейта: этого достаточно для названий в списке.
+        """
+        stat = self._stat(file_path)
+        if stat is not None:
+            metadata = self.cache.get(file_path, stat, stream_info)
+            if metadata is not None:
+                return metadata
+
+        metadata = self._read_metadata(file_path, stream_info)
+        # Пустой результат не запоминаем: ошибка чтения могла быть временной (права, сетевой диск)
+        if stat is not None and metadata:
+            self.cache.put(file_path, stat, metadata, stream_info)
+        return metadata
+
+    def get_metadata_many(self, paths: Iterable[str], cancel_event: Optional[threading.Event] = None,
+                          stream_info: bool = True) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Метаданные пачки файлов в порядке готовности: сначала из кэша, остальные из пула процессов.
+
+        Ошибка в отдельном файле даёт для него пустой словарь и не прерывает пачку.
+        """
+        missing = []
+        for file_path in paths:
+            stat = self._stat(file_path)
+            metadata = self.cache.get(file_path, stat, stream_info) if stat is not None else None
+            if metadata is not None:
+                yield file_path, metadata
+            else:
+                missing.append((file_path, stat))
+
+        if self.max_workers == 1 or len(missing) < self.POOL_THRESHOLD:
+            for file_path, stat in missing:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                metadata = self._read_metadata(file_path, stream_info)
+                if stat is not None and metadata:
+                    self.cache.put(file_path, stat, metadata, stream_info)
+                yield file_path, metadata
+            return
+
+        stats = dict(missing)
+        paths = [file_path for file_path, _ in missing]
+        chunks = [paths[start:start + self.chunk_size] for start in range(0, len(paths), self.chunk_size)]
+        pool = self._get_pool()
+        futures = {pool.submit(_read_metadata_chunk, chunk, stream_info): chunk for chunk in chunks}
         try:
+            for future in as_completed(futures):
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                try:
+                    results = future.result()
+                except Exception as e:
+                    # Упал процесс пула: файлы пачки отдаём пустыми и не кэшируем
+                    print(f"Ошибка чтения метаданных: {e}")
+                    self._reset_pool(pool)
+                    for file_path in futures[future]:
+                        yield file_path, {}
+                    continue
+                for file_path, metadata in results:
+                    if stats[file_path] is not None and metadata:
+                        self.cache.put(file_path, stats[file_path], metadata, stream_info)
+                    yield file_path, metadata
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def update_metadata(self, file_path: str, changes: Dict[str, str]) -> bool:
+        """Изменение только перечисленных полей, остальные теги файла сохраняются"""
+        return self.set_metadata(file_path, changes)
+
+    def update_metadata_many(self, paths: Iterable[str], changes: Dict[str, str],
+                             cancel_event: Optional[threading.Event] = None
+                             ) -> Iterator[Tuple[str, bool, Optional[str]]]:
+        """Одинаковые изменения полей для многих файлов.
+
+        Выдаёт (путь, успех, способ записи из WRITE_MODES) в порядке готовности.
+        """
+        paths = list(paths)
+        try:
+            if self.max_workers == 1 or len(paths) < self.POOL_THRESHOLD:
+                for file_path in paths:
+                    if cancel_event is not None and cancel_event.is_set():
+                        return
+                    success = self.update_metadata(file_path, changes)
+                    yield file_path, success, self.last_write_mode if success else None
+                return
+
+            # Пачки мельче, чем при чтении: запись дольше, а прогресс нужен чаще
+            chunk_size = max(1, self.chunk_size // 4)
+            pool = self._get_pool()
+            futures = {pool.submit(_update_metadata_chunk, paths[start:start + chunk_size], changes):
+                       paths[start:start + chunk_size] for start in range(0, len(paths), chunk_size)}
+            try:
+                for future in as_completed(futures):
+                    if cancel_event is not None and cancel_event.is_set():
+                        return
+                    try:
+                        results = future.result()
+                    except Exception as e:
+                        print(f"Ошибка записи метаданных: {e}")
+                        self._reset_pool(pool)
+                        results = [(file_path, None) for file_path in futures[future]]
+                    for file_path, mode in results:
+                        if self.cache is not None:
+                            self.cache.invalidate(file_path)
+                        if mode is not None:
+                            self.write_stats[mode] += 1
+                        yield file_path, mode is not None, mode
+            finally:
+                for future in futures:
+                    future.cancel()
+        finally:
+            if self.cache is not None:
+                self.cache.flush()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self.pool_lock:
+            if self.pool is None:
+                # spawn, а не fork: процесс многопоточный (сканирование, наблюдатель, libvlc),
+                # и fork мог бы унести в дочерний процесс чужую захваченную блокировку
+                self.pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                mp_context=multiprocessing.get_context('spawn'))
+            return self.pool
+
+    def _reset_pool(self, pool):
+        with self.pool_lock:
+            if self.pool is pool:
+                self.pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def close(self):
+        """Остановка пула процессов и запись кэша на диск"""
+        with self.pool_lock:
+            pool, self.pool = self.pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        if self.cache is not None:
+            self.cache.flush()
+
+    def _stat(self, file_path: str) -> Optional[os.stat_result]:
+        """stat файла, если кэш включён и файл доступен"""
+        if self.cache is None:
+            return None
+        try:
+            return os.stat(file_path)
+        except OSError:
+            return None
+
+    def _read_metadata(self, file_path: str, stream_info: bool = True) -> Dict[str, Any]:
+        """Разбор тегов и, если stream_info, технической информации файла"""
+        try:
+            if not stream_info:
+                metadata = self._read_header_tags(file_path)
+                if metadata is not None:
+                    return metadata
+
             audio_file = mutagen.File(file_path, easy=False)  # Используем easy=False для полных тегов
             if audio_file is None:
                 return {}
             
             metadata = {}
             
-            if hasattr(audio_file, 'tags'):
+            if getattr(audio_file, 'tags', None) is not None:
                 if file_path.lower().endswith('.mp3'):
-                    metadata = self._get_id3_metadata(audio_file)
+                    metadata = self._get_id3_metadata(audio_file.tags)
                 elif file_path.lower().endswith('.flac'):
-                    metadata = self._get_flac_metadata(audio_file)
+                    metadata = self._get_flac_metadata(audio_file.tags)
                 elif file_path.lower().endswith(('.m4a', '.aac')):
-                    metadata = self._get_mp4_metadata(audio_file)
+                    metadata = self._get_mp4_metadata(audio_file.tags)
             
             # Добавляем техническую информацию
-            if hasattr(audio_file, 'info'):
+            if stream_info and hasattr(audio_file, 'info'):
                 metadata['length'] = audio_file.info.length
                 metadata['bitrate'] = getattr(audio_file.info, 'bitrate', 0)
                 metadata['sample_rate'] = getattr(audio_file.info, 'sample_rate', 0)
@@ -38,11 +252,27 @@ class MetadataEditor:
         except Exception as e:
             print(f"Ошибка чтения метаданных: {e}")
             return {}
+
+    def _read_header_tags(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """Только теги из заголовка файла, без разбора аудиопотока; None для прочих форматов"""
+        file_ext = os.path.splitext(file_path)[1].lower()
+        if file_ext == '.mp3':
+            # ID3 читает тег в начале (и ID3v1 в конце), до кадров MPEG не доходит
+            try:
+                return self._get_id3_metadata(ID3(file_path))
+            except ID3NoHeaderError:
+                return {}
+        elif file_ext == '.flac':
+            # Блоки метаданных FLAC идут перед аудиоданными
+            return self._get_flac_metadata(FLAC(file_path).tags)
+        elif file_ext == '.m4a':
+            # Атомы moov/udta/meta/ilst, сэмплы не читаются
+            return self._get_mp4_metadata(MP4(file_path).tags)
+        return None
     
-    def _get_id3_metadata(self, audio_file) -> Dict[str, Any]:
+    def _get_id3_metadata(self, tags) -> Dict[str, Any]:
         """Получение ID3 метаданных"""
         metadata = {}
-        tags = audio_file.tags
         
         if not tags:
             return metadata
@@ -59,18 +289,25 @@ class MetadataEditor:
         metadata['date'] = metadata['year']
         
         metadata['genre'] = self._get_tag_value(tags, 'TCON')
-        metadata['comment'] = self._get_tag_value(tags, 'COMM')
+        # Комментарии хранятся с языком и описанием (COMM::eng)
+        comments = tags.getall('COMM')
+        metadata['comment'] = str(comments[0]) if comments else ''
         
         # Дополнительные теги
         metadata['track_number'] = self._get_track_number(tags)
         metadata['disc_number'] = self._get_disc_number(tags)
+
+        # ReplayGain в TXXX; регистр описания у разных программ разный
+        for frame in tags.getall('TXXX'):
+            for key, name in REPLAYGAIN_FIELDS.items():
+                if frame.desc.upper() == name and frame.text:
+                    metadata[key] = str(frame.text[0])
         
         return metadata
     
-    def _get_flac_metadata(self, audio_file) -> Dict[str, Any]:
+    def _get_flac_metadata(self, tags) -> Dict[str, Any]:
         """Получение FLAC метаданных"""
         metadata = {}
-        tags = audio_file.tags
         
         if not tags:
             return metadata
@@ -87,13 +324,15 @@ class MetadataEditor:
         metadata['comment'] = tags.get('comment', [''])[0] if tags.get('comment') else ''
         metadata['track_number'] = tags.get('tracknumber', [''])[0] if tags.get('tracknumber') else ''
         metadata['disc_number'] = tags.get('discnumber', [''])[0] if tags.get('discnumber') else ''
+        for key, name in REPLAYGAIN_FIELDS.items():
+            if tags.get(name.lower()):
+                metadata[key] = tags.get(name.lower())[0]
         
         return metadata
     
-    def _get_mp4_metadata(self, audio_file) -> Dict[str, Any]:
+    def _get_mp4_metadata(self, tags) -> Dict[str, Any]:
         """Получение MP4 метаданных"""
         metadata = {}
-        tags = audio_file.tags
         
         if not tags:
             return metadata
@@ -117,6 +356,12 @@ class MetadataEditor:
         disk = tags.get('disk')
         if disk:
             metadata['disc_number'] = f"{disk[0][0]}/{disk[0][1]}" if disk[0][1] else str(disk[0][0])
+
+        for key, name in REPLAYGAIN_FIELDS.items():
+            for atom in (MP4_FREEFORM + name.lower(), MP4_FREEFORM + name):
+                if tags.get(atom):
+                    metadata[key] = bytes(tags[atom][0]).decode('utf-8', 'replace')
+                    break
         
         return metadata
     
@@ -146,156 +391,213 @@ class MetadataEditor:
             return ''
     
     def set_metadata(self, file_path: str, metadata: Dict[str, str]) -> bool:
-        """Установка метаданных трека"""
+        """Установка метаданных трека.
+
+        Записываются только поля, отличающиеся от текущих; пустое значение
+        удаляет тег, поля, которых нет в metadata, не трогаются. Способ записи
+        (на месте, с перезаписью файла или без изменений) сохраняется в
+        last_write_mode и счётчиках write_stats.
+        """
         try:
             if not os.path.exists(file_path):
                 print(f"Файл не существует: {file_path}")
                 return False
 
             file_ext = os.path.splitext(file_path)[1].lower()
+            # mtime на некоторых ФС грубый: запись в кэше сбрасываем явно
+            if self.cache is not None:
+                self.cache.invalidate(file_path)
             
             if file_ext == '.mp3':
-                return self._set_id3_metadata(file_path, metadata)
+                mode = self._set_id3_metadata(file_path, metadata)
             elif file_ext == '.flac':
-                return self._set_flac_metadata(file_path, metadata)
+                mode = self._set_flac_metadata(file_path, metadata)
             elif file_ext in ('.m4a', '.aac'):
-                return self._set_mp4_metadata(file_path, metadata)
+                mode = self._set_mp4_metadata(file_path, metadata)
             else:
                 print(f"Неподдерживаемый формат: {file_ext}")
                 return False
 
+            if mode is None:
+                return False
+            self.last_write_mode = mode
+            self.write_stats[mode] += 1
+            print(f"Метаданные успешно сохранены для {file_path} ({WRITE_MODES[mode]})")
+            return True
+
         except Exception as e:
             print(f"Ошибка записи метаданных: {e}")
             return False
+
+    def _padding(self, result: Dict[str, str]):
+        """Политика отступа для mutagen: свободное место тега сохраняется,
+        а при нехватке резервируется с запасом для следующих правок"""
+        def padding(info):
+            if info.padding >= 0:
+                result['mode'] = 'in_place'
+                return info.padding
+            result['mode'] = 'rewrite'
+            return max(info.get_default_padding(), self.TAG_PADDING)
+        return padding
     
-    def _set_id3_metadata(self, file_path: str, metadata: Dict[str, str]) -> bool:
+    def _set_id3_metadata(self, file_path: str, metadata: Dict[str, str]) -> Optional[str]:
         """Установка ID3 метаданных"""
         try:
             # Загружаем или создаем новые теги
             try:
                 tags = ID3(file_path)
-            except:
+            except ID3NoHeaderError:
                 tags = ID3()
             
             # Кодировка 3 = UTF-8
             encoding = 3
-            
-            if metadata.get('title'):
-                tags['TIT2'] = TIT2(encoding=encoding, text=metadata['title'])
-            if metadata.get('artist'):
-                tags['TPE1'] = TPE1(encoding=encoding, text=metadata['artist'])
-            if metadata.get('album'):
-                tags['TALB'] = TALB(encoding=encoding, text=metadata['album'])
-            if metadata.get('album_artist'):
-                tags['TPE2'] = TPE2(encoding=encoding, text=metadata['album_artist'])
-            if metadata.get('composer'):
-                tags['TCOM'] = TCOM(encoding=encoding, text=metadata['composer'])
-            if metadata.get('year'):
-                tags['TDRC'] = TDRC(encoding=encoding, text=metadata['year'])
-            if metadata.get('genre'):
-                tags['TCON'] = TCON(encoding=encoding, text=metadata['genre'])
-            if metadata.get('comment'):
-                tags['COMM'] = COMM(encoding=encoding, text=metadata['comment'])
-            
-            # Номер трека и диска
-            if metadata.get('track_number'):
-                tags['TRCK'] = mutagen.id3.TRCK(encoding=encoding, text=metadata['track_number'])
-            if metadata.get('disc_number'):
-                tags['TPOS'] = mutagen.id3.TPOS(encoding=encoding, text=metadata['disc_number'])
+            changed = False
+
+            for key, frame_class in ID3_FRAMES.items():
+                if key not in metadata:
+                    continue
+                value = metadata[key] or ''
+                frame_id = frame_class.__name__
+                if key == 'comment':
+                    # Комментарии хранятся с языком и описанием (COMM::eng)
+                    current = str(tags.getall('COMM')[0]) if tags.getall('COMM') else ''
+                else:
+                    current = self._get_tag_value(tags, frame_id)
+                if value == current:
+                    continue
+                changed = True
+                tags.delall(frame_id)
+                if value:
+                    if key == 'comment':
+                        tags.add(COMM(encoding=encoding, lang='eng', desc='', text=value))
+                    else:
+                        tags.add(frame_class(encoding=encoding, text=value))
+
+            for key, name in REPLAYGAIN_FIELDS.items():
+                if key not in metadata:
+                    continue
+                value = metadata[key] or ''
+                frames = [frame for frame in tags.getall('TXXX') if frame.desc.upper() == name]
+                current = str(frames[0].text[0]) if frames and frames[0].text else ''
+                if value == current and len(frames) <= 1:
+                    continue
+                changed = True
+                for frame in frames:
+                    tags.delall(frame.HashKey)
+                if value:
+                    tags.add(TXXX(encoding=encoding, desc=name, text=value))
+
+            if not changed:
+                return 'unchanged'
             
             # Сохраняем теги
-            tags.save(file_path)
-            print(f"Метаданные успешно сохранены для {file_path}")
-            return True
+            result = {}
+            tags.save(file_path, padding=self._padding(result))
+            return result.get('mode', 'rewrite')
             
         except Exception as e:
             print(f"Ошибка записи ID3: {e}")
-            return False
+            return None
 
-    def _set_flac_metadata(self, file_path: str, metadata: Dict[str, str]) -> bool:
+    def _set_flac_metadata(self, file_path: str, metadata: Dict[str, str]) -> Optional[str]:
         """Установка FLAC метаданных"""
         try:
             audio = FLAC(file_path)
+            if audio.tags is None:
+                audio.add_tags()
+            changed = False
+
+            fields = dict(VORBIS_FIELDS)
+            fields.update((key, name.lower()) for key, name in REPLAYGAIN_FIELDS.items())
+            for key, comment_name in fields.items():
+                if key not in metadata:
+                    continue
+                value = metadata[key] or ''
+                current = audio.tags.get(comment_name, [''])[0] if audio.tags.get(comment_name) else ''
+                if value == current:
+                    continue
+                changed = True
+                if value:
+                    audio.tags[comment_name] = value
+                elif comment_name in audio.tags:
+                    del audio.tags[comment_name]
+
+            if not changed:
+                return 'unchanged'
             
-            # Очищаем старые теги перед установкой новых
-            audio.delete()
-            
-            if metadata.get('title'):
-                audio['title'] = metadata['title']
-            if metadata.get('artist'):
-                audio['artist'] = metadata['artist']
-            if metadata.get('album'):
-                audio['album'] = metadata['album']
-            if metadata.get('album_artist'):
-                audio['albumartist'] = metadata['album_artist']
-            if metadata.get('composer'):
-                audio['composer'] = metadata['composer']
-            if metadata.get('year'):
-                audio['date'] = metadata['year']
-            if metadata.get('genre'):
-                audio['genre'] = metadata['genre']
-            if metadata.get('comment'):
-                audio['comment'] = metadata['comment']
-            if metadata.get('track_number'):
-                audio['tracknumber'] = metadata['track_number']
-            if metadata.get('disc_number'):
-                audio['discnumber'] = metadata['disc_number']
-            
-            audio.save()
-            print(f"Метаданные успешно сохранены для {file_path}")
-            return True
+            result = {}
+            audio.save(padding=self._padding(result))
+            return result.get('mode', 'rewrite')
 
         except Exception as e:
             print(f"Ошибка записи FLAC: {e}")
-            return False
+            return None
 
-    def _set_mp4_metadata(self, file_path: str, metadata: Dict[str, str]) -> bool:
+    def _set_mp4_metadata(self, file_path: str, metadata: Dict[str, str]) -> Optional[str]:
         """Установка MP4 метаданных"""
         try:
             audio = MP4(file_path)
-            
-            # Очищаем старые теги
-            audio.clear()
-            
-            if metadata.get('title'):
-                audio['\xa9nam'] = metadata['title']
-            if metadata.get('artist'):
-                audio['\xa9ART'] = metadata['artist']
-            if metadata.get('album'):
-                audio['\xa9alb'] = metadata['album']
-            if metadata.get('album_artist'):
-                audio['aART'] = metadata['album_artist']
-            if metadata.get('composer'):
-                audio['\xa9wrt'] = metadata['composer']
-            if metadata.get('year'):
-                audio['\xa9day'] = metadata['year']
-            if metadata.get('genre'):
-                audio['\xa9gen'] = metadata['genre']
-            if metadata.get('comment'):
-                audio['\xa9cmt'] = metadata['comment']
-            
+            if audio.tags is None:
+                audio.add_tags()
+            changed = False
+
+            for key, atom in MP4_FIELDS.items():
+                if key not in metadata:
+                    continue
+                value = metadata[key] or ''
+                current = audio.tags.get(atom, [''])[0] if audio.tags.get(atom) else ''
+                if value == current:
+                    continue
+                changed = True
+                if value:
+                    audio.tags[atom] = value
+                elif atom in audio.tags:
+                    del audio.tags[atom]
+
+            for key, name in REPLAYGAIN_FIELDS.items():
+                if key not in metadata:
+                    continue
+                value = metadata[key] or ''
+                atoms = [atom for atom in (MP4_FREEFORM + name.lower(), MP4_FREEFORM + name) if atom in audio.tags]
+                current = bytes(audio.tags[atoms[0]][0]).decode('utf-8', 'replace') if atoms else ''
+                if value == current and len(atoms) <= 1:
+                    continue
+                changed = True
+                for atom in atoms:
+                    del audio.tags[atom]
+                if value:
+                    audio.tags[MP4_FREEFORM + name.lower()] = [MP4FreeForm(value.encode('utf-8'))]
+
             # Номер трека и диска
-            if metadata.get('track_number'):
-                try:
-                    track_num = int(metadata['track_number'].split('/')[0])
-                    audio['trkn'] = [(track_num, 0)]
-                except:
-                    pass
-            
-            if metadata.get('disc_number'):
-                try:
-                    disc_num = int(metadata['disc_number'].split('/')[0])
-                    audio['disk'] = [(disc_num, 0)]
-                except:
-                    pass
+            for key, atom in (('track_number', 'trkn'), ('disc_number', 'disk')):
+                if key not in metadata:
+                    continue
+                value = metadata[key] or ''
+                current = audio.tags.get(atom)
+                if value:
+                    try:
+                        number, _, total = value.partition('/')
+                        pair = (int(number), int(total) if total else 0)
+                    except ValueError:
+                        continue
+                    if current and tuple(current[0]) == pair:
+                        continue
+                    audio.tags[atom] = [pair]
+                    changed = True
+                elif current:
+                    del audio.tags[atom]
+                    changed = True
+
+            if not changed:
+                return 'unchanged'
             
-            audio.save()
-            print(f"Метаданные успешно сохранены для {file_path}")
-            return True
+            result = {}
+            audio.save(padding=self._padding(result))
+            return result.get('mode', 'rewrite')
 
         except Exception as e:
             print(f"Ошибка записи MP4: {e}")
-            return False
+            return None
 
     def get_supported_formats(self):
         """Получить список поддерживаемых форматов"""
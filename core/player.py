@@ -1,29 +1,118 @@
-import os
+import threading
 import vlc
 from pathlib import Path
 from typing import List, Optional, Dict
 import json
 
+from core.crossfade import Crossfader
+from core.scan_engine import ScanEngine
+from core.track import Track, TrackList, TrackRegistry
+
+_vlc_instance = None
+_vlc_lock = threading.Lock()
+
+def vlc_instance() -> vlc.Instance:
+    """Общий экземпляр libvlc: модули и аудиовывод загружаются один раз на процесс"""
+    global _vlc_instance
+    with _vlc_lock:
+        if _vlc_instance is None:
+            _vlc_instance = vlc.Instance()
+        return _vlc_instance
+
+class PreparedTrack:
+    """Следующий трек, открытый заранее: media уже разбирается, усиление и тишина известны"""
+    __slots__ = ('path', 'media', 'gain', 'lead', 'trail')
+
+    def __init__(self, path, media, gain, lead=0, trail=None):
+        self.path = path
+        self.media = media
+        self.gain = gain
+        # Конец начальной и начало конечной тишины, мс
+        self.lead = lead
+        self.trail = trail
+
 class MusicPlayer:
+    # Верхний предел громкости VLC: выше 100 — программное усиление для тихих треков
+    MAX_VOLUME = 200
+    # События для add_listener и аргументы их обработчиков:
+    # track_changed(путь), length_changed(мс),
+    # finished() — плейлист доигран, error(путь) — трек не воспроизводится,
+    # state_changed(играет ли) — запуск, пауза или остановка
+    # Позицию окна читают таймером: событие MediaPlayerTimeChanged не слушаем,
+    # оно приходит несколько раз в секунду от каждого плеера
+    EVENTS = ('track_changed', 'length_changed', 'finished', 'error', 'state_changed')
+    _shared = None
+    _shared_lock = threading.Lock()
+
     def __init__(self):
-        self.instance = vlc.Instance()
+        self.instance = vlc_instance()
         self.player = self.instance.media_player_new()
-        self.current_playlist = []
+        # Второй плеер для кроссфейда: следующий трек начинается на нём, пока текущий затихает.
+        # После перехода плееры меняются ролями
+        self.spare_player = self.instance.media_player_new()
+        self.tracks = TrackRegistry()
+        self._playlist = TrackList(self.tracks)
         self.current_index = 0
         self.volume = 50
+        # Усиление текущего трека в дБ (выравнивание громкости)
+        self.track_gain = 0.0
+        # Функция путь -> усиление в дБ или None; задаётся окном
+        self.gain_lookup = None
+        # Функция путь -> (конец начальной, начало конечной тишины в с) или None
+        self.silence_lookup = None
         self.player.audio_set_volume(self.volume)
+        # Путь играющего трека: по нему находим позицию, даже если плейлист пересобран
+        self.current_path = None
+        self.current_trail = None
+        self.prepared = None
+        self.lock = threading.RLock()
+        self.listeners = {event: [] for event in self.EVENTS}
+
+        # Конец трека приходит событием libvlc, а не опросом позиции. Из
+        # обработчика события вызывать функции плеера нельзя, поэтому
+        # переключение делает отдельный поток
+        self.end_reached = threading.Event()
+        self.switch_thread = threading.Thread(target=self._switch_loop, daemon=True)
+        self.switch_thread.start()
+        self.crossfader = Crossfader(self)
+        # События слушаем у обоих плееров, но учитываем только у играющего
+        for media_player in (self.player, self.spare_player):
+            events = media_player.event_manager()
+            events.event_attach(vlc.EventType.MediaPlayerEndReached, self._on_end_reached, media_player)
+            events.event_attach(vlc.EventType.MediaPlayerEncounteredError, self._on_error, media_player)
+            events.event_attach(vlc.EventType.MediaPlayerLengthChanged, self._on_length_changed, media_player)
+            events.event_attach(vlc.EventType.MediaPlayerPlaying, self._on_state_changed, media_player, True)
+            events.event_attach(vlc.EventType.MediaPlayerPaused, self._on_state_changed, media_player, False)
+            events.event_attach(vlc.EventType.MediaPlayerStopped, self._on_state_changed, media_player, False)
+
+    @classmethod
+    def shared(cls) -> 'MusicPlayer':
+        """Плеер процесса: окна сменяют друг друга, а очередь, позиция и громкость остаются"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @property
+    def current_playlist(self) -> TrackList:
+        return self._playlist
+
+    @current_playlist.setter
+    def current_playlist(self, tracks):
+        """Принимает TrackList, пути или объекты Track.
+
+        Список собирается до захвата lock, а подменяется под ним одним
+        присваиванием: поток переключения треков видит либо старый, либо новый.
+        """
+        if not isinstance(tracks, TrackList):
+            tracks = TrackList(self.tracks, tracks)
+        with self.lock:
+            self._playlist = tracks
         
     def load_folder(self, folder_path: str) -> List[str]:
         """Загрузка всех аудиофайлов из папки"""
         audio_extensions = {'.mp3', '.wav', '.flac', '.aac', '.ogg', '.m4a', '.wma', '.aiff'}
-        audio_files = []
-
-        for root, dirs, files in os.walk(folder_path):
-            audio_files.extend(
-                os.path.join(root, file)
-                for file in files
-                if Path(file).suffix.lower() in audio_extensions
-            )
+        audio_files = ScanEngine(audio_extensions).list_files([folder_path])
         self.current_playlist = audio_files
         return audio_files
     
@@ -33,43 +122,182 @@ class MusicPlayer:
             with open(playlist_path, 'r', encoding='utf-8') as f:
                 playlist_data = json.load(f)
                 self.current_playlist = playlist_data.get('tracks', [])
-                return self.current_playlist
+                return self.current_playlist.paths()
         except Exception as e:
             print(f"Ошибка загрузки плейлиста: {e}")
             return []
     
-    def play(self, track_path: Optional[str] = None):
-        """Воспроизведение трека"""
-        if track_path:
-            media = self.instance.media_new(track_path)
-            self.player.set_media(media)
-        
+    def play(self, track=None):
+        """Воспроизведение трека (путь или Track)"""
+        with self.lock:
+            self.crossfader.finish()
+            if track:
+                track_path = track.path if isinstance(track, Track) else track
+                prepared = self.prepared
+                if prepared is None or prepared.path != track_path:
+                    prepared = self._prepare(track_path)
+                self._start(prepared)
+                self._prepare_next()
+            else:
+                self.player.play()
+                self._apply_volume()
+
+    def _prepare(self, track_path: str) -> PreparedTrack:
+        media = self.instance.media_new(track_path)
+        # Асинхронный разбор заголовков: к концу текущего трека он уже готов
+        media.parse_with_options(vlc.MediaParseFlag.local, 0)
+        # Усиление известно заранее: при старте трека ничего не анализируется
+        gain = self.gain_lookup(track_path) if self.gain_lookup else None
+        silence = self.silence_lookup(track_path) if self.silence_lookup else None
+        if silence is None:
+            return PreparedTrack(track_path, media, gain or 0.0)
+        lead, trail = silence
+        return PreparedTrack(track_path, media, gain or 0.0, int(lead * 1000),
+                             int(trail * 1000) if trail is not None else None)
+
+    def _start(self, prepared: PreparedTrack, fade_in: bool = False):
+        self.player.set_media(prepared.media)
+        self.track_gain = prepared.gain
+        self.current_path = prepared.path
+        self.current_trail = prepared.trail
+        if fade_in:
+            self.player.audio_set_volume(0)
         self.player.play()
+        if not fade_in:
+            self._apply_volume()
+        self._notify('track_changed', prepared.path)
+        self.crossfader.wake()
+
+    def begin_crossfade(self):
+        """Запуск следующего трека на втором плеере без звука; возвращает затихающий плеер или None"""
+        self._prepare_next()
+        prepared = self.prepared
+        if prepared is None:
+            return None
+        if prepared.lead:
+            prepared.media.add_option(f"start-time={prepared.lead / 1000:.3f}")
+        self.current_index = self._position() + 1
+        old = self.player
+        self.player, self.spare_player = self.spare_player, self.player
+        self._start(prepared, fade_in=True)
+        self._prepare_next()
+        return old
+
+    def _position(self) -> int:
+        """Позиция играющего трека в плейлисте"""
+        if self.current_path is not None and self.current_path in self.current_playlist:
+            return self.current_playlist.index(self.current_path)
+        return self.current_index
+
+    def _prepare_next(self):
+        """Открытие следующего трека, пока играет текущий"""
+        position = self._position() + 1
+        if position >= len(self.current_playlist):
+            self.prepared = None
+            return
+        track_path = self.current_playlist[position].path
+        if self.prepared is None or self.prepared.path != track_path:
+            self.prepared = self._prepare(track_path)
+
+    def add_listener(self, event: str, callback):
+        """Подписка на событие из EVENTS.
+
+        Обработчик вызывается из потока libvlc или потока переключения
+        треков и не должен обращаться к плееру: только передать событие
+        дальше (например, сигналом Qt).
+        """
+        self.listeners[event].append(callback)
+
+    def remove_listener(self, event: str, callback):
+        if callback in self.listeners[event]:
+            self.listeners[event].remove(callback)
+
+    def _notify(self, event: str, *args):
+        for callback in list(self.listeners[event]):
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Ошибка обработчика события {event}: {e}")
+
+    def _on_end_reached(self, event, media_player):
+        # Поток libvlc: только будим поток переключения
+        if media_player is self.player:
+            self.end_reached.set()
+
+    def _on_error(self, event, media_player):
+        # Нечитаемый файл пропускаем, как доигранный
+        if media_player is self.player:
+            self._notify('error', self.current_path or '')
+            self.end_reached.set()
+
+    def _on_length_changed(self, event, media_player):
+        if media_player is self.player:
+            self._notify('length_changed', event.u.new_length)
+            self.crossfader.wake()
+
+    def _on_state_changed(self, event, media_player, playing):
+        if media_player is self.player:
+            self._notify('state_changed', playing)
+            self.crossfader.wake()
+
+    def _switch_loop(self):
+        while True:
+            self.end_reached.wait()
+            self.end_reached.clear()
+            try:
+                if not self.advance():
+                    self._notify('finished')
+            except Exception as e:
+                print(f"Ошибка переключения трека: {e}")
+
+    def advance(self) -> bool:
+        """Переход к следующему треку плейлиста; False, если он был последним"""
+        with self.lock:
+            position = self._position() + 1
+            if position >= len(self.current_playlist):
+                return False
+            self.current_index = position
+            self.play(self.current_playlist[position])
+            return True
     
     def pause(self):
         """Пауза"""
-        self.player.pause()
+        with self.lock:
+            self.crossfader.finish()
+            self.player.pause()
     
     def stop(self):
         """Остановка"""
-        self.player.stop()
+        with self.lock:
+            self.crossfader.finish()
+            self.player.stop()
     
     def next_track(self):
         """Следующий трек"""
-        if self.current_playlist and self.current_index < len(self.current_playlist) - 1:
-            self.current_index += 1
-            self.play(self.current_playlist[self.current_index])
+        self.advance()
     
     def previous_track(self):
         """Предыдущий трек"""
-        if self.current_playlist and self.current_index > 0:
-            self.current_index -= 1
-            self.play(self.current_playlist[self.current_index])
+        with self.lock:
+            position = self._position()
+            if self.current_playlist and position > 0:
+                self.current_index = position - 1
+                self.play(self.current_playlist[self.current_index])
     
     def set_volume(self, volume: int):
         """Установка громкости"""
         self.volume = max(0, min(100, volume))
-        self.player.audio_set_volume(self.volume)
+        self._apply_volume()
+
+    def level(self, gain: Optional[float] = None) -> float:
+        """Громкость VLC: уровень пользователя с поправкой на усиление трека"""
+        gain = self.track_gain if gain is None else gain
+        return min(self.volume * 10 ** (gain / 20), self.MAX_VOLUME)
+
+    def _apply_volume(self):
+        # Во время кроссфейда громкость ведёт Crossfader
+        if self.crossfader.fading is None:
+            self.player.audio_set_volume(int(round(self.level())))
     
     def get_position(self) -> float:
         """Получение текущей позиции"""
@@ -77,12 +305,19 @@ class MusicPlayer:
     
     def set_position(self, position: float):
         """Установка позиции"""
-        self.player.set_position(max(0, min(1, position)))
+        with self.lock:
+            self.crossfader.finish()
+            self.player.set_position(max(0, min(1, position)))
+        self.crossfader.wake()
     
     def get_length(self) -> int:
         """Получение длительности трека"""
         return self.player.get_length()
     
+    def get_time(self) -> int:
+        """Текущее время трека в мс"""
+        return self.player.get_time()
+    
     def is_playing(self) -> bool:
         """Проверка воспроизведения"""
         return self.player.is_playing()
\ No newline at end of file
@@ -0,0 +1,29 @@
+import time
+
+class ProgressClock:
+    """Время трека между редкими синхронизациями с плеером.
+
+    sync() запоминает время трека и момент по монотонным часам; пока трек
+    играет, time() прибавляет к нему прошедшее с тех пор время, не
+    обращаясь к libvlc. На паузе время стоит на месте.
+    """
+
+    def __init__(self):
+        self.anchor_time = 0
+        self.anchor_clock = time.monotonic()
+        self.running = False
+
+    def sync(self, track_time: int, running: bool):
+        """Точное время трека в мс и состояние воспроизведения"""
+        self.anchor_time = max(track_time, 0)
+        self.anchor_clock = time.monotonic()
+        self.running = running
+
+    def time(self) -> int:
+        if not self.running:
+            return self.anchor_time
+        return self.anchor_time + int((time.monotonic() - self.anchor_clock) * 1000)
+
+    def since_sync(self) -> float:
+        """Секунды с последней синхронизации"""
+        return time.monotonic() - self.anchor_clock
@@ -0,0 +1,296 @@
+import fnmatch
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Iterable, Iterator, Optional, Tuple
+
+class ScanEngine:
+    def __init__(self, extensions: Iterable[str], max_workers: Optional[int] = None,
+                 follow_symlinks: bool = True, exclude: Iterable[str] = (),
+                 max_depth: Optional[Dict[str, Optional[int]]] = None,
+                 limit: Optional[int] = None):
+        self.extensions = {ext.lower() for ext in extensions}
+        # Потоки в основном ждут stat/readdir, поэтому их больше, чем ядер
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+        self.follow_symlinks = follow_symlinks
+        # Шаблоны имён или полных путей папок, которые не обходятся вовсе
+        self.exclude = list(exclude)
+        # Глубина обхода для отдельных корней: 0 — только сам корень
+        self.max_depth = {os.path.realpath(str(root)): depth for root, depth in (max_depth or {}).items()}
+        self.limit = limit
+        self.limit_reached = False
+        self.linked_dirs = set()
+        self.stats = {}
+        self._lock = threading.Lock()
+        self._visited_dirs = set()
+        self._visited_files = set()
+        self._library_roots = []
+        self._top_roots = []
+        self.reset()
+
+    def reset(self):
+        """Сброс счётчиков и посещённых (device, inode) перед новым обходом"""
+        self.stats = {'dirs': 0, 'files': 0, 'roots_skipped': 0, 'dirs_skipped': 0,
+                      'files_skipped': 0, 'dirs_excluded': 0}
+        self.limit_reached = False
+        self.linked_dirs = set()
+        self._visited_dirs = set()
+        self._visited_files = set()
+
+    def config_key(self) -> str:
+        """Строка с параметрами, влияющими на состав результата"""
+        return repr((sorted(self.extensions), self.follow_symlinks, self.exclude,
+                     sorted(self.max_depth.items()), self.limit))
+
+    def canonical_roots(self, roots: Iterable[str]) -> List[str]:
+        """Реальные пути корней без повторов.
+
+        Вложенный корень отбрасывается, если внешний обходится без ограничения
+        глубины; иначе он обходится отдельно со своей глубиной.
+        """
+        roots = [str(root) for root in roots]
+        resolved = sorted({os.path.realpath(root) for root in roots})
+        self.stats['roots_skipped'] += len(roots) - len(resolved)
+
+        result = []
+        for path in resolved:
+            if any(self.max_depth.get(root) is None
+                   and path.startswith(root if root.endswith(os.sep) else root + os.sep) for root in result):
+                self.stats['roots_skipped'] += 1
+                continue
+            result.append(path)
+        return result
+
+    def is_excluded(self, dir_path: str) -> bool:
+        name = os.path.basename(dir_path)
+        return any(fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(dir_path, pattern)
+                   for pattern in self.exclude)
+
+    def _root_depth(self, dir_path: str) -> Tuple[bool, Optional[int]]:
+        """Можно ли обходить папку как корень и сколько уровней под ней осталось"""
+        depth = None
+        for root in sorted(set(self._top_roots) | set(self.max_depth), key=len, reverse=True):
+            if dir_path != root and not dir_path.startswith(root + os.sep):
+                continue
+            # Папка внутри корня (частичное обновление): проверяем промежуточные папки
+            relative = os.path.relpath(dir_path, root)
+            parts = [] if relative == '.' else relative.split(os.sep)
+            current = root
+            for part in parts:
+                current = os.path.join(current, part)
+                if self.is_excluded(current):
+                    return False, None
+            limit = self.max_depth.get(root)
+            if limit is not None:
+                depth = limit - len(parts)
+                if depth < 0:
+                    return False, None
+            break
+        return True, depth
+
+    def claim_dir(self, dir_stat: os.stat_result) -> bool:
+        """True, если папка с таким (device, inode) ещё не посещалась"""
+        key = (dir_stat.st_dev, dir_stat.st_ino)
+        with self._lock:
+            if key in self._visited_dirs:
+                self.stats['dirs_skipped'] += 1
+                return False
+            self._visited_dirs.add(key)
+            return True
+
+    def _inside_library(self, link_path: str) -> bool:
+        target = os.path.realpath(link_path)
+        return any(target == root or target.startswith(root + os.sep) for root in self._library_roots)
+
+    def is_alias(self, link_path: str) -> bool:
+        """True для ссылки на файл, который и так встретится при обходе реального дерева"""
+        if not self._inside_library(link_path):
+            return False
+        with self._lock:
+            self.stats['files_skipped'] += 1
+        return True
+
+    def claim_files(self, candidates: List[Tuple[Tuple[int, int], str]]) -> List[str]:
+        """Отбор файлов, которые ещё не встречались под другим путём (жёсткие и символические ссылки)"""
+        kept = []
+        with self._lock:
+            for key, file_path in candidates:
+                if key in self._visited_files:
+                    self.stats['files_skipped'] += 1
+                    continue
+                if self.limit is not None and self.stats['files'] >= self.limit:
+                    self.limit_reached = True
+                    break
+                self._visited_files.add(key)
+                self.stats['files'] += 1
+                kept.append(file_path)
+        return kept
+
+    def _scan_dir(self, dir_path: str, dir_stat: os.stat_result) -> Tuple[List[str], List[str], List[str]]:
+        """Чтение одной папки: подходящие файлы, подпапки и подпапки-ссылки"""
+        candidates = []
+        subdirs = []
+        linked = []
+        extensions = self.extensions
+
+        try:
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    name = entry.name
+                    try:
+                        if entry.is_dir():
+                            if not entry.is_symlink():
+                                subdirs.append(entry.path)
+                            elif self.follow_symlinks:
+                                linked.append(entry.path)
+                            continue
+
+                        dot = name.rfind('.')
+                        if dot <= 0 or name[dot:].lower() not in extensions:
+                            continue
+                        if entry.is_symlink():
+                            if self.is_alias(entry.path):
+                                continue
+                            stat = entry.stat()
+                            key = (stat.st_dev, stat.st_ino)
+                        else:
+                            # inode() берётся из readdir без дополнительного stat
+                            key = (dir_stat.st_dev, entry.inode())
+                    except OSError:
+                        continue
+                    candidates.append((key, entry.path))
+        except OSError:
+            pass
+
+        return self.claim_files(candidates), subdirs, linked
+
+    def iter_dirs(self, roots: Iterable[str],
+                  visit: Optional[Callable[[str, os.stat_result], Tuple[Any, List[str], List[str]]]] = None,
+                  cancel_event: Optional[threading.Event] = None,
+                  library_roots: Optional[Iterable[str]] = None) -> Iterator[Tuple[str, Any]]:
+        """Параллельный обход: выдаёт (папка, результат visit) по мере готовности.
+
+        visit(папка, stat) возвращает (результат, подпапки, подпапки-ссылки);
+        по умолчанию результат — список подходящих файлов. Каждая физическая
+        папка посещается один раз; папки по ссылкам обходятся после основного
+        дерева, чтобы при совпадении побеждал реальный путь.
+        Ссылки на файлы и папки внутри library_roots (по умолчанию — самих корней)
+        пропускаются: реальный файл будет найден под своим путём.
+        Исключённые папки и папки глубже max_depth не открываются. Обход
+        прерывается, как только выставлен cancel_event; когда найдено limit
+        файлов, новые папки не открываются, а уже прочитанные выдаются.
+        """
+        self.reset()
+        roots = self.canonical_roots(roots)
+        self._top_roots = (roots if library_roots is None
+                           else [os.path.realpath(str(root)) for root in library_roots])
+        self._library_roots = sorted(set(self._top_roots) | set(roots))
+        visit = visit or self._scan_dir
+        results = queue.Queue()
+        outstanding = 0
+        deferred = []
+        pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        walk_roots = set(roots)
+
+        def run(dir_path, dir_stat):
+            if full():
+                # Папка стояла в очереди, когда набрался лимит: её не открываем
+                return None, [], []
+            if dir_stat is None:
+                try:
+                    dir_stat = os.stat(dir_path)
+                except OSError:
+                    return None, [], []
+                if not self.claim_dir(dir_stat):
+                    return None, [], []
+            return visit(dir_path, dir_stat)
+
+        def submit(dir_path, depth, dir_stat=None):
+            nonlocal outstanding
+            outstanding += 1
+            future = pool.submit(run, dir_path, dir_stat)
+            future.dir_path = dir_path
+            future.depth = depth
+            future.add_done_callback(results.put)
+
+        def full():
+            if self.limit is not None and self.stats['files'] >= self.limit:
+                self.limit_reached = True
+            return self.limit_reached
+
+        def allowed(dir_path):
+            # Вложенный корень обходится сам по себе, исключённые папки не открываются вовсе
+            if dir_path in walk_roots:
+                return False
+            if self.exclude and self.is_excluded(dir_path):
+                self.stats['dirs_excluded'] += 1
+                return False
+            return True
+
+        try:
+            for root in roots:
+                permitted, depth = self._root_depth(root)
+                if permitted:
+                    submit(root, depth)
+                else:
+                    self.stats['dirs_excluded'] += 1
+
+            while outstanding or deferred:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+
+                if not outstanding:
+                    if full():
+                        break
+                    # Ссылки разрешаются в главном потоке в стабильном порядке
+                    for link_path, depth in sorted(deferred, key=lambda item: item[0]):
+                        if self._inside_library(link_path):
+                            self.stats['dirs_skipped'] += 1
+                            continue
+                        try:
+                            link_stat = os.stat(link_path)
+                        except OSError:
+                            continue
+                        if self.claim_dir(link_stat):
+                            self.linked_dirs.add(link_path)
+                            submit(link_path, depth, link_stat)
+                    deferred = []
+                    continue
+
+                future = results.get()
+                outstanding -= 1
+                payload, subdirs, linked = future.result()
+                # После лимита библиотеки новые папки не ставятся в очередь, но уже
+                # прочитанные выдаются: их файлы вошли в лимит в claim_files
+                if future.depth != 0 and (subdirs or linked) and not full():
+                    depth = None if future.depth is None else future.depth - 1
+                    for subdir in subdirs:
+                        if allowed(subdir):
+                            submit(subdir, depth)
+                    deferred.extend((link_path, depth) for link_path in linked if allowed(link_path))
+                if payload is not None:
+                    self.stats['dirs'] += 1
+                    yield future.dir_path, payload
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def scan(self, roots: Iterable[str]) -> Dict[str, List[str]]:
+        """Файлы, сгруппированные по расширению, как в FileScanner.scan_by_extensions"""
+        result = {}
+        for _, files in self.iter_dirs(roots):
+            for file_path in files:
+                ext = file_path[file_path.rfind('.'):].lower()
+                result.setdefault(ext, []).append(file_path)
+
+        for files in result.values():
+            files.sort()
+        return result
+
+    def list_files(self, roots: Iterable[str]) -> List[str]:
+        """Плоский отсортированный список найденных файлов"""
+        files = []
+        for _, dir_files in self.iter_dirs(roots):
+            files.extend(dir_files)
+        files.sort()
+        return files
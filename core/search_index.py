@@ -0,0 +1,112 @@
+import os
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+# Поля метаданных, по которым идёт поиск, плюс имя файла
+SEARCH_FIELDS = ['title', 'artist', 'album', 'album_artist', 'composer', 'genre']
+
+def fold(text: str) -> str:
+    """Приведение к виду для поиска: без регистра, ё = е"""
+    return text.casefold().replace('ё', 'е')
+
+class SearchIndex:
+    """Полнотекстовый поиск по тегам и именам файлов библиотеки (SQLite FTS5)"""
+
+    def __init__(self, db_path: str = "data/library/search.db"):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.lock = threading.Lock()
+        self.init_db()
+
+    def init_db(self):
+        cursor = self.conn.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        # rowid записи FTS совпадает с id пути: удаление без полного просмотра
+        cursor.execute('CREATE TABLE IF NOT EXISTS paths (id INTEGER PRIMARY KEY, path TEXT NOT NULL UNIQUE)')
+        columns = ', '.join(SEARCH_FIELDS + ['filename'])
+        # Префиксные индексы ускоряют поиск по началу слова при наборе;
+        # позиции слов не хранятся (detail=column), фразовые запросы не нужны
+        cursor.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS tracks USING fts5(
+                {columns}, tokenize = 'unicode61 remove_diacritics 2', prefix = '1 2 3',
+                detail = column, columnsize = 0
+            )
+        ''')
+        self.conn.commit()
+
+    def update(self, items: Iterable[Tuple[str, Dict[str, Any]]]):
+        """Добавление или замена записей (путь, метаданные)"""
+        with self.lock:
+            cursor = self.conn.cursor()
+            for file_path, metadata in items:
+                row = cursor.execute('SELECT id FROM paths WHERE path = ?', (file_path,)).fetchone()
+                if row is None:
+                    cursor.execute('INSERT INTO paths (path) VALUES (?)', (file_path,))
+                    track_id = cursor.lastrowid
+                else:
+                    track_id = row[0]
+                    cursor.execute('DELETE FROM tracks WHERE rowid = ?', (track_id,))
+                values = [fold(str(metadata.get(field) or '')) for field in SEARCH_FIELDS]
+                values.append(fold(os.path.splitext(os.path.basename(file_path))[0]))
+                cursor.execute(f'INSERT INTO tracks (rowid, {", ".join(SEARCH_FIELDS)}, filename) '
+                               f'VALUES (?, {", ".join("?" * (len(SEARCH_FIELDS) + 1))})',
+                               [track_id] + values)
+            self.conn.commit()
+
+    def remove(self, paths: Iterable[str]):
+        with self.lock:
+            cursor = self.conn.cursor()
+            for file_path in paths:
+                row = cursor.execute('SELECT id FROM paths WHERE path = ?', (file_path,)).fetchone()
+                if row is not None:
+                    cursor.execute('DELETE FROM tracks WHERE rowid = ?', (row[0],))
+                    cursor.execute('DELETE FROM paths WHERE id = ?', (row[0],))
+            self.conn.commit()
+
+    def sync(self, paths: Iterable[str], metadata_editor, cancel_event=None):
+        """Приведение индекса к списку путей: недостающие добавляются, лишние удаляются"""
+        paths = set(paths)
+        with self.lock:
+            known = {row[0] for row in self.conn.execute('SELECT path FROM paths')}
+        self.remove(known - paths)
+
+        batch = []
+        for item in metadata_editor.get_metadata_many(sorted(paths - known), cancel_event, stream_info=False):
+            batch.append(item)
+            if len(batch) >= 1000:
+                self.update(batch)
+                batch = []
+        if batch:
+            self.update(batch)
+
+    def search(self, query: str) -> List[str]:
+        """Пути треков, где каждое слово запроса встречается как начало слова в каком-либо поле"""
+        # Те же границы слов, что у токенизатора unicode61: подчёркивание — разделитель
+        words = re.findall(r'[^\W_]+', fold(query))
+        if not words:
+            return []
+        match = ' '.join(f'"{word}"*' for word in words)
+        with self.lock:
+            try:
+                rows = self.conn.execute(
+                    'SELECT paths.path FROM tracks JOIN paths ON paths.id = tracks.rowid WHERE tracks MATCH ?',
+                    (match,)
+                ).fetchall()
+            except sqlite3.Error as e:
+                print(f"Ошибка поиска: {e}")
+                return []
+        return [row[0] for row in rows]
+
+    def count(self) -> int:
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM paths').fetchone()[0]
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute('DELETE FROM tracks')
+            self.conn.execute('DELETE FROM paths')
+            self.conn.commit()
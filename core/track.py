@@ -0,0 +1,143 @@
+import os
+import sys
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+class Track:
+    """Трек библиотеки: путь, теги для отображения и длительность.
+
+    Путь интернируется и служит ключом трека в реестре и списках, а
+    исполнитель и альбом общие у всех треков альбома. Название у каждого
+    трека своё и не интернируется. title равен None, пока теги трека ещё
+    не читались.
+    """
+    __slots__ = ('path', 'title', 'artist', 'album', 'duration')
+
+    def __init__(self, path: str):
+        self.path = sys.intern(path)
+        self.title = None
+        self.artist = ''
+        self.album = ''
+        self.duration = 0.0
+
+    def __repr__(self):
+        return f"Track({self.path!r})"
+
+    @property
+    def loaded(self) -> bool:
+        return self.title is not None
+
+    def update(self, metadata: Dict[str, Any]):
+        """Обновление полей из метаданных MetadataEditor"""
+        self.title = str(metadata.get('title') or '').strip()
+        self.artist = sys.intern(str(metadata.get('artist') or '').strip())
+        self.album = sys.intern(str(metadata.get('album') or '').strip())
+        if metadata.get('length'):
+            self.duration = float(metadata['length'])
+
+    @property
+    def display_name(self) -> str:
+        title = self.title or ''
+        if title and self.artist:
+            return f"{title} - {self.artist}"
+        elif title:
+            return title
+        elif self.artist:
+            return f"Неизвестно - {self.artist}"
+        else:
+            return os.path.splitext(os.path.basename(self.path))[0]
+
+TrackLike = Union[Track, str]
+
+class TrackRegistry:
+    """Единственный объект Track на каждый путь: его разделяют плеер, плейлисты и списки"""
+
+    def __init__(self):
+        self.by_path: Dict[str, Track] = {}
+        # Треки создаются и из потоков сканирования
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.by_path)
+
+    def get(self, item: TrackLike) -> Track:
+        """Трек по пути (создаётся при первом обращении) или сам трек"""
+        if isinstance(item, Track):
+            return self.adopt(item)
+        track = self.by_path.get(item)
+        if track is None:
+            with self.lock:
+                track = self.by_path.get(item)
+                if track is None:
+                    track = Track(item)
+                    self.by_path[track.path] = track
+        return track
+
+    def find(self, file_path: str) -> Optional[Track]:
+        return self.by_path.get(file_path)
+
+    def adopt(self, track: Track) -> Track:
+        """Трек из другого реестра: если путь уже известен, остаётся свой объект"""
+        with self.lock:
+            return self.by_path.setdefault(track.path, track)
+
+    def update(self, file_path: str, metadata: Dict[str, Any]) -> Track:
+        track = self.get(file_path)
+        track.update(metadata)
+        return track
+
+class TrackList:
+    """Упорядоченный список треков с поиском позиции за O(1).
+
+    Принимает как пути, так и объекты Track; элементы всегда Track.
+    Если трек встречается несколько раз, index() возвращает первую позицию,
+    как list.index(). Позиции хранятся по пути трека: путь однозначно
+    определяет трек реестра, и для поиска реестр не нужен.
+    """
+
+    def __init__(self, registry: TrackRegistry, items: Iterable[TrackLike] = ()):
+        self.registry = registry
+        self.tracks: List[Track] = []
+        self.positions: Dict[str, int] = {}
+        self.extend(items)
+
+    def __len__(self):
+        return len(self.tracks)
+
+    def __iter__(self) -> Iterator[Track]:
+        return iter(self.tracks)
+
+    def __getitem__(self, index):
+        return self.tracks[index]
+
+    def __contains__(self, item) -> bool:
+        return self._position(item) is not None
+
+    def _position(self, item) -> Optional[int]:
+        return self.positions.get(item.path if isinstance(item, Track) else item)
+
+    def index(self, item: TrackLike) -> int:
+        position = self._position(item)
+        if position is None:
+            raise ValueError(f"{item!r} нет в списке")
+        return position
+
+    def append(self, item: TrackLike):
+        track = self.registry.get(item)
+        self.positions.setdefault(track.path, len(self.tracks))
+        self.tracks.append(track)
+
+    def extend(self, items: Iterable[TrackLike]):
+        for item in items:
+            self.append(item)
+
+    def remove_paths(self, paths: Iterable[str]):
+        """Удаление треков по путям с сохранением порядка остальных"""
+        paths = set(paths)
+        self.tracks = [track for track in self.tracks if track.path not in paths]
+        self.positions = {}
+        for position, track in enumerate(self.tracks):
+            self.positions.setdefault(track.path, position)
+
+    def paths(self) -> List[str]:
+        return [track.path for track in self.tracks]
@@ -1,9 +1,10 @@
 import os
-import vlc
+
+from core.player import vlc_instance
 
 class TransitPlayer:
     def __init__(self):
-        self.instance = vlc.Instance()
+        self.instance = vlc_instance()
         self.player = self.instance.media_player_new()
         self.current_file = None
         
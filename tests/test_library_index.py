@@ -0,0 +1,107 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.library_index import LibraryIndex
+
+EXTENSIONS = {'.mp3'}
+
+def touch(path, mtime):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'w').close()
+    os.utime(path, (mtime, mtime))
+
+def set_dir_mtime(path, mtime):
+    os.utime(path, (mtime, mtime))
+
+def test_cancelled_pass_does_not_hide_new_subfolder(tmp_path):
+    """Новая подпапка находится после отменённого прохода, дошедшего только до её родителя"""
+    lib = tmp_path / "lib"
+    old = time.time() - 3600
+    touch(str(lib / "a" / "x.mp3"), old)
+    set_dir_mtime(str(lib / "a"), old)
+    set_dir_mtime(str(lib), old)
+    index = LibraryIndex(str(tmp_path / "index.db"))
+    assert index.update([str(lib)], EXTENSIONS)['added'] == [str(lib / "a" / "x.mp3")]
+
+    touch(str(lib / "a" / "new" / "z.mp3"), old)
+    set_dir_mtime(str(lib / "a" / "new"), old)
+    set_dir_mtime(str(lib / "a"), old + 60)
+
+    # Отмена сразу после того, как выдана папка lib/a: lib/a/new не посещается
+    cancel_event = threading.Event()
+    visited = 0
+    for changes in index.iter_update([str(lib)], EXTENSIONS, cancel_event):
+        visited += 1
+        if visited == 2:
+            cancel_event.set()
+    assert cancel_event.is_set()
+
+    delta = index.update([str(lib)], EXTENSIONS)
+    assert delta['added'] == [str(lib / "a" / "new" / "z.mp3")]
+    assert sorted(index.get_files(EXTENSIONS)['.mp3']) == [str(lib / "a" / "new" / "z.mp3"),
+                                                            str(lib / "a" / "x.mp3")]
+
+@pytest.mark.skipif(not hasattr(os, 'geteuid') or os.geteuid() == 0,
+                    reason="нужны права, которые chmod действительно ограничивает")
+def test_unreadable_subfolder_is_retried(tmp_path):
+    """Папка, подпапку которой не удалось прочитать, перечитывается при следующем проходе"""
+    lib = tmp_path / "lib"
+    old = time.time() - 3600
+    touch(str(lib / "a" / "x.mp3"), old)
+    locked = lib / "a" / "locked"
+    touch(str(locked / "z.mp3"), old)
+    set_dir_mtime(str(locked), old)
+    set_dir_mtime(str(lib / "a"), old)
+    set_dir_mtime(str(lib), old)
+    index = LibraryIndex(str(tmp_path / "index.db"))
+
+    os.chmod(str(locked), 0)
+    try:
+        assert index.update([str(lib)], EXTENSIONS)['added'] == [str(lib / "a" / "x.mp3")]
+    finally:
+        os.chmod(str(locked), 0o755)
+    set_dir_mtime(str(locked), old)
+    assert index.update([str(lib)], EXTENSIONS)['added'] == [str(locked / "z.mp3")]
+
+def write(path, data, mtime):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(data)
+    os.utime(path, (mtime, mtime))
+
+def totals(index):
+    return dict((path, (tracks, size)) for path, tracks, size in
+                index.conn.execute('SELECT path, tracks, size FROM dirs'))
+
+def test_folder_totals_match_full_recount(tmp_path):
+    """Итоги папок после инкрементальных обновлений совпадают с полным пересчётом"""
+    lib = tmp_path / "lib"
+    old = time.time() - 3600
+    write(str(lib / "a" / "1.mp3"), "x" * 10, old)
+    write(str(lib / "a" / "b" / "2.mp3"), "x" * 20, old)
+    write(str(lib / "a" / "b" / "c" / "3.mp3"), "x" * 30, old)
+    write(str(lib / "d" / "4.mp3"), "x" * 40, old)
+    index = LibraryIndex(str(tmp_path / "index.db"))
+    index.update([str(lib)], EXTENSIONS)
+    assert totals(index)[str(lib)] == (4, 100)
+
+    os.remove(str(lib / "a" / "b" / "c" / "3.mp3"))
+    os.rmdir(str(lib / "a" / "b" / "c"))
+    write(str(lib / "a" / "b" / "2.mp3"), "x" * 25, old + 10)
+    write(str(lib / "d" / "e" / "5.mp3"), "x" * 50, old)
+    index.update([str(lib)], EXTENSIONS)
+    # Частичное обновление, как у наблюдателя за папками
+    write(str(lib / "d" / "6.mp3"), "x" * 60, old)
+    list(index.iter_update([str(lib / "d")], EXTENSIONS, partial=True))
+
+    incremental = totals(index)
+    with index.lock:
+        index._aggregate(index.conn.cursor())
+    assert incremental == totals(index)
+    assert incremental[str(lib)] == (5, 10 + 25 + 50 + 60 + 40)
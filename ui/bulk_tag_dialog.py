@@ -0,0 +1,237 @@
+import os
+import sys
+import threading
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QLabel,
+                            QPushButton, QLineEdit, QCheckBox, QTreeWidget, QTreeWidgetItem,
+                            QProgressBar, QHeaderView)
+from PyQt5.QtCore import QThread, pyqtSignal
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from core.metadata_editor import WRITE_MODES
+
+# Поля, которые имеет смысл менять сразу у многих треков
+BULK_FIELDS = [
+    ('artist', "Исполнитель"),
+    ('album', "Альбом"),
+    ('album_artist', "Исполнитель альбома"),
+    ('composer', "Композитор"),
+    ('year', "Год"),
+    ('genre', "Жанр"),
+    ('comment', "Комментарий"),
+    ('disc_number', "Номер диска"),
+]
+
+class CommonTagsWorker(QThread):
+    """Чтение тегов выбранных файлов в фоне: значения, одинаковые у всех"""
+    values_ready = pyqtSignal(object)
+
+    def __init__(self, metadata_editor, paths, keys):
+        super().__init__()
+        self.metadata_editor = metadata_editor
+        self.paths = paths
+        self.keys = keys
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        common = None
+        try:
+            for file_path, metadata in self.metadata_editor.get_metadata_many(
+                    self.paths, self.cancel_event, stream_info=False):
+                values = {key: metadata.get(key, '') for key in self.keys}
+                if common is None:
+                    common = values
+                else:
+                    common = {key: value for key, value in common.items() if values[key] == value}
+                if not common:
+                    break
+        except Exception as e:
+            print(f"Ошибка чтения метаданных: {e}")
+            return
+        if not self.cancel_event.is_set():
+            self.values_ready.emit(common or {})
+
+class BulkTagWorker(QThread):
+    """Запись тегов в фоне с результатом по каждому файлу"""
+    progress = pyqtSignal(int, int)
+    file_done = pyqtSignal(str, bool, str)
+
+    def __init__(self, metadata_editor, paths, changes):
+        super().__init__()
+        self.metadata_editor = metadata_editor
+        self.paths = paths
+        self.changes = changes
+        # Теги записанных файлов, прочитанные здесь же, чтобы окно не читало их в потоке GUI
+        self.metadata = {}
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        done = 0
+        written = []
+        try:
+            for file_path, success, mode in self.metadata_editor.update_metadata_many(
+                    self.paths, self.changes, self.cancel_event):
+                done += 1
+                if success:
+                    written.append(file_path)
+                self.file_done.emit(file_path, success, mode or '')
+                self.progress.emit(done, len(self.paths))
+            self.metadata = dict(self.metadata_editor.get_metadata_many(written, self.cancel_event, stream_info=False))
+        except Exception as e:
+            print(f"Ошибка записи метаданных: {e}")
+
+class BulkTagDialog(QDialog):
+    """Изменение выбранных полей сразу у нескольких треков"""
+    tags_updated = pyqtSignal(object)
+
+    def __init__(self, paths, metadata_editor, parent=None):
+        super().__init__(parent)
+        self.paths = paths
+        self.metadata_editor = metadata_editor
+        self.worker = None
+        self.loader = None
+        self.updated = []
+        self.failed = 0
+        self.modes = {}
+        self.setWindowTitle("Изменение тегов")
+        self.setGeometry(300, 300, 600, 500)
+        self.setup_ui()
+        self.load_common_values()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        layout.addWidget(QLabel(f"Выбрано треков: {len(self.paths)}. "
+                                f"Изменятся только отмеченные поля."))
+
+        form = QFormLayout()
+        self.fields = {}
+        for key, label in BULK_FIELDS:
+            check = QCheckBox(label)
+            edit = QLineEdit()
+            # Правка поля сразу отмечает его для записи
+            edit.textEdited.connect(lambda text, check=check: check.setChecked(True))
+            form.addRow(check, edit)
+            self.fields[key] = (check, edit)
+        layout.addLayout(form)
+
+        self.status_label = QLabel("")
+        layout.addWidget(self.status_label)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setMaximum(len(self.paths))
+        self.progress_bar.hide()
+        layout.addWidget(self.progress_bar)
+
+        self.results = QTreeWidget()
+        self.results.setHeaderLabels(["Файл", "Результат"])
+        self.results.header().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.results.hide()
+        layout.addWidget(self.results)
+
+        button_layout = QHBoxLayout()
+        self.apply_btn = QPushButton("Применить")
+        self.apply_btn.clicked.connect(self.apply_changes)
+        self.close_btn = QPushButton("Закрыть")
+        self.close_btn.clicked.connect(self.close)
+        button_layout.addStretch()
+        button_layout.addWidget(self.apply_btn)
+        button_layout.addWidget(self.close_btn)
+        layout.addLayout(button_layout)
+
+    def load_common_values(self):
+        """Подстановка значений, одинаковых у всех выбранных треков; теги читаются в фоне"""
+        self.loader = CommonTagsWorker(self.metadata_editor, self.paths, list(self.fields))
+        self.loader.values_ready.connect(self.on_common_values)
+        # Ссылку снимаем по finished: после ошибки чтения values_ready не придёт, а поток будет удалён
+        self.loader.finished.connect(self.on_loader_finished)
+        self.loader.finished.connect(self.loader.deleteLater)
+        self.loader.start()
+
+    def on_loader_finished(self):
+        self.loader = None
+
+    def on_common_values(self, common):
+        for key, value in common.items():
+            check, edit = self.fields[key]
+            # Поле, которое пользователь уже начал править, не перезаписываем
+            if not check.isChecked():
+                edit.setText(value)
+
+    def get_changes(self):
+        return {key: edit.text().strip() for key, (check, edit) in self.fields.items() if check.isChecked()}
+
+    def apply_changes(self):
+        changes = self.get_changes()
+        if not changes:
+            self.status_label.setText("Не отмечено ни одного поля")
+            return
+
+        self.stop_loader()
+        self.apply_btn.setEnabled(False)
+        for check, edit in self.fields.values():
+            check.setEnabled(False)
+            edit.setEnabled(False)
+        self.updated = []
+        self.failed = 0
+        self.modes = {}
+        self.results.clear()
+        self.results.show()
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        self.status_label.setText(f"Записываю теги в {len(self.paths)} файлов...")
+
+        self.worker = BulkTagWorker(self.metadata_editor, self.paths, changes)
+        self.worker.progress.connect(self.on_progress)
+        self.worker.file_done.connect(self.on_file_done)
+        self.worker.finished.connect(self.on_finished)
+        self.worker.finished.connect(self.worker.deleteLater)
+        self.worker.start()
+
+    def on_progress(self, done, total):
+        self.progress_bar.setMaximum(total)
+        self.progress_bar.setValue(done)
+
+    def on_file_done(self, file_path, success, mode):
+        result = f"Сохранено {WRITE_MODES[mode]}" if success else "Ошибка"
+        QTreeWidgetItem(self.results, [file_path, result])
+        if success:
+            self.updated.append(file_path)
+            self.modes[mode] = self.modes.get(mode, 0) + 1
+        else:
+            self.failed += 1
+
+    def on_finished(self):
+        metadata = self.worker.metadata
+        self.worker = None
+        self.progress_bar.hide()
+        message = f"Сохранено: {len(self.updated)}"
+        if self.modes:
+            message += " (" + ", ".join(f"{WRITE_MODES[mode]}: {count}" for mode, count in self.modes.items()) + ")"
+        if self.failed:
+            message += f", ошибок: {self.failed}"
+        skipped = len(self.paths) - len(self.updated) - self.failed
+        if skipped:
+            message += f", пропущено: {skipped}"
+        self.status_label.setText(message)
+        if metadata:
+            self.tags_updated.emit(metadata)
+
+    def stop_loader(self):
+        if self.loader is not None:
+            self.loader.cancel()
+            self.loader.wait()
+            self.loader = None
+
+    def closeEvent(self, event):
+        self.stop_loader()
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker.wait()
+        super().closeEvent(event)
@@ -0,0 +1,159 @@
+import os
+import sys
+from PyQt5.QtCore import (Qt, QObject, QRunnable, QThreadPool, QTimer, QBuffer, QIODevice,
+                          QPoint, QSize, pyqtSignal)
+from PyQt5.QtGui import QImage, QIcon, QPixmap
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from core.cover_art import CoverCache, extract_cover, image_hash
+
+# Роль элемента списка: обложка уже запрошена (есть она или нет)
+COVER_ROLE = Qt.ItemDataRole.UserRole + 2
+ICON_SIZE = 32
+
+class CoverTask(QRunnable):
+    def __init__(self, loader, file_path, size):
+        super().__init__()
+        self.loader = loader
+        self.file_path = file_path
+        self.size = size
+        # Задачу держит loader до завершения, иначе tryTake обратился бы к удалённому объекту
+        self.setAutoDelete(False)
+
+    def run(self):
+        image = None
+        try:
+            image = self.loader.load_image(self.file_path, self.size)
+        except Exception as e:
+            print(f"Ошибка загрузки обложки: {e}")
+        self.loader.task_done.emit(self.file_path, self.size, image)
+
+class CoverLoader(QObject):
+    """Фоновая загрузка обложек: извлечение, декодирование и уменьшение в пуле потоков"""
+    cover_ready = pyqtSignal(str, int, object)
+    task_done = pyqtSignal(str, int, object)
+
+    def __init__(self, cache=None, parent=None):
+        super().__init__(parent)
+        self.cache = cache if cache is not None else CoverCache()
+        self.pool = QThreadPool(self)
+        self.tasks = {}
+        self.lists = []
+        self.task_done.connect(self.on_task_done)
+
+    def request(self, file_path, size):
+        """Запрос обложки; результат придёт сигналом cover_ready (QImage или None)"""
+        key = (file_path, size)
+        if key in self.tasks:
+            return
+        task = CoverTask(self, file_path, size)
+        self.tasks[key] = task
+        self.pool.start(task)
+
+    def cancel_pending(self, keep=()):
+        """Снятие ещё не начатых задач, кроме перечисленных (путь, размер)"""
+        keep = set(keep)
+        for key, task in list(self.tasks.items()):
+            if key not in keep and self.pool.tryTake(task):
+                del self.tasks[key]
+
+    def on_task_done(self, file_path, size, image):
+        self.tasks.pop((file_path, size), None)
+        for list_widget, list_size in self.lists:
+            if list_size == size:
+                self.set_list_icon(list_widget, file_path, image)
+        self.cover_ready.emit(file_path, size, image)
+
+    def load_image(self, file_path, size):
+        """Выполняется в потоке пула: миниатюра из кэша или из исходной картинки"""
+        try:
+            stat = os.stat(file_path)
+            # Обложка из папки (cover.jpg) могла появиться или исчезнуть без изменения самого трека
+            dir_mtime = os.stat(os.path.dirname(file_path)).st_mtime_ns
+        except OSError:
+            return None
+
+        known, hash_value = self.cache.get_track(file_path, stat, dir_mtime)
+        if known and hash_value is None:
+            return None
+        if known:
+            cached = self.cache.get_image(CoverCache.image_key(hash_value, size))
+            if cached is not None:
+                return QImage(cached)
+
+        data = extract_cover(file_path)
+        hash_value = image_hash(data) if data else None
+        image = None
+        if hash_value is not None:
+            key = CoverCache.image_key(hash_value, size)
+            cached = self.cache.get_image(key)
+            if cached is not None:
+                image = QImage(cached)
+            else:
+                image = QImage.fromData(data)
+                if image.isNull():
+                    hash_value = None
+                    image = None
+                else:
+                    image = image.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+                    buffer = QBuffer()
+                    buffer.open(QIODevice.WriteOnly)
+                    image.save(buffer, "JPG", 85)
+                    self.cache.put_image(key, bytes(buffer.data()))
+        self.cache.set_track(file_path, stat, dir_mtime, hash_value)
+        return image
+
+    def watch_list(self, list_widget, size=ICON_SIZE):
+        """Иконки-обложки для видимых строк списка; невидимые не загружаются.
+
+        Подходит любой QListView (в том числе QListWidget): строки читаются
+        и помечаются через модель ролями Qt.UserRole, COVER_ROLE и DecorationRole.
+        """
+        list_widget.setIconSize(QSize(size, size))
+        timer = QTimer(list_widget)
+        timer.setSingleShot(True)
+        timer.setInterval(100)
+        timer.timeout.connect(lambda: self.request_visible(list_widget, size))
+        list_widget.verticalScrollBar().valueChanged.connect(timer.start)
+        list_widget.model().rowsInserted.connect(timer.start)
+        list_widget.model().layoutChanged.connect(timer.start)
+        list_widget.model().modelReset.connect(timer.start)
+        self.lists.append((list_widget, size))
+
+    @staticmethod
+    def visible_indexes(list_widget):
+        model = list_widget.model()
+        viewport = list_widget.viewport()
+        first = list_widget.indexAt(QPoint(0, 0)).row()
+        if first < 0:
+            return []
+        last = list_widget.indexAt(QPoint(0, viewport.height() - 1)).row()
+        if last < 0:
+            last = model.rowCount() - 1
+        return [model.index(row, 0) for row in range(first, last + 1)
+                if not list_widget.isRowHidden(row)]
+
+    def request_visible(self, list_widget, size):
+        wanted = []
+        for index in self.visible_indexes(list_widget):
+            if index.data(COVER_ROLE) is None:
+                wanted.append((index.data(Qt.UserRole), size))
+        # Задачи для строк, которые уже прокручены мимо, не нужны
+        keep = set(wanted)
+        keep.update(key for key in self.tasks if key[1] != size)
+        self.cancel_pending(keep)
+        for file_path, _ in wanted:
+            self.request(file_path, size)
+
+    def set_list_icon(self, list_widget, file_path, image):
+        model = list_widget.model()
+        for index in self.visible_indexes(list_widget):
+            if index.data(Qt.UserRole) == file_path:
+                model.setData(index, image is not None, COVER_ROLE)
+                if image is not None:
+                    model.setData(index, QIcon(QPixmap.fromImage(image)), Qt.DecorationRole)
+
+    def shutdown(self):
+        self.pool.clear()
+        self.pool.waitForDone(2000)
@@ -0,0 +1,172 @@
+import os
+import sys
+import threading
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
+                            QPushButton, QTreeWidget, QTreeWidgetItem,
+                            QProgressBar, QMessageBox, QHeaderView)
+from PyQt5.QtCore import Qt, QThread, QFile, pyqtSignal
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from core.duplicate_finder import DuplicateFinder
+from utils.file_utils import format_size
+
+STAGE_NAMES = {
+    'size': "Сравнение размеров",
+    'partial': "Быстрое сравнение",
+    'full': "Полное сравнение",
+}
+
+class DuplicateWorker(QThread):
+    """Поиск дубликатов в фоне"""
+    progress = pyqtSignal(str, int, int)
+    groups_ready = pyqtSignal(object)
+
+    def __init__(self, paths):
+        super().__init__()
+        self.paths = paths
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        groups = []
+        try:
+            groups = DuplicateFinder().find(self.paths, self.cancel_event, self.progress.emit)
+        except Exception as e:
+            print(f"Ошибка поиска дубликатов: {e}")
+        self.groups_ready.emit(groups)
+
+class DuplicatesDialog(QDialog):
+    """Найденные копии файлов: отмеченные остаются, остальные отправляются в корзину"""
+    files_removed = pyqtSignal(object)
+
+    def __init__(self, paths, parent=None):
+        super().__init__(parent)
+        self.paths = paths
+        self.worker = None
+        self.setWindowTitle("Дубликаты")
+        self.setGeometry(300, 300, 700, 500)
+        self.setup_ui()
+        self.start_search()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.status_label = QLabel("")
+        layout.addWidget(self.status_label)
+
+        self.progress_bar = QProgressBar()
+        layout.addWidget(self.progress_bar)
+
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels(["Оставить", "Размер"])
+        self.tree.header().setSectionResizeMode(0, QHeaderView.Stretch)
+        layout.addWidget(self.tree)
+
+        button_layout = QHBoxLayout()
+        self.remove_btn = QPushButton("Удалить лишние копии")
+        self.remove_btn.setEnabled(False)
+        self.remove_btn.clicked.connect(self.remove_duplicates)
+        close_btn = QPushButton("Закрыть")
+        close_btn.clicked.connect(self.close)
+        button_layout.addStretch()
+        button_layout.addWidget(self.remove_btn)
+        button_layout.addWidget(close_btn)
+        layout.addLayout(button_layout)
+
+    def start_search(self):
+        self.status_label.setText(f"Проверяю {len(self.paths)} файлов...")
+        self.worker = DuplicateWorker(self.paths)
+        self.worker.progress.connect(self.on_progress)
+        self.worker.groups_ready.connect(self.show_groups)
+        self.worker.finished.connect(self.worker.deleteLater)
+        self.worker.start()
+
+    def on_progress(self, stage, done, total):
+        self.status_label.setText(f"{STAGE_NAMES.get(stage, stage)}: {done} из {total}")
+        self.progress_bar.setMaximum(total)
+        self.progress_bar.setValue(done)
+
+    def show_groups(self, groups):
+        self.worker = None
+        self.progress_bar.hide()
+        self.tree.clear()
+
+        wasted = 0
+        for number, group in enumerate(groups, 1):
+            size = self.file_size(group[0])
+            wasted += size * (len(group) - 1)
+            group_item = QTreeWidgetItem(self.tree, [f"Группа {number} (копий: {len(group)})", format_size(size)])
+            for index, file_path in enumerate(group):
+                child = QTreeWidgetItem(group_item, [file_path, format_size(self.file_size(file_path))])
+                child.setData(0, Qt.UserRole, file_path)
+                # По умолчанию остаётся первая копия
+                child.setCheckState(0, Qt.Checked if index == 0 else Qt.Unchecked)
+            group_item.setExpanded(True)
+
+        if groups:
+            self.status_label.setText(f"Найдено групп: {len(groups)}, можно освободить {format_size(wasted)}")
+        else:
+            self.status_label.setText("Дубликаты не найдены")
+        self.remove_btn.setEnabled(bool(groups))
+
+    @staticmethod
+    def file_size(file_path):
+        try:
+            return os.path.getsize(file_path)
+        except OSError:
+            return 0
+
+    def remove_duplicates(self):
+        to_remove = []
+        skipped_groups = 0
+        for row in range(self.tree.topLevelItemCount()):
+            group_item = self.tree.topLevelItem(row)
+            children = [group_item.child(i) for i in range(group_item.childCount())]
+            unchecked = [child for child in children if child.checkState(0) != Qt.Checked]
+            if len(unchecked) == len(children):
+                # Хотя бы одна копия должна остаться
+                skipped_groups += 1
+                continue
+            to_remove.extend(child.data(0, Qt.UserRole) for child in unchecked)
+
+        if not to_remove:
+            QMessageBox.information(self, "Дубликаты", "Не отмечено ни одной лишней копии")
+            return
+
+        message = f"Переместить в корзину {len(to_remove)} файлов?"
+        if skipped_groups:
+            message += f"\nГруппы без отмеченной копии ({skipped_groups}) будут пропущены."
+        if QMessageBox.question(self, "Удаление дубликатов", message) != QMessageBox.Yes:
+            return
+
+        removed = []
+        for file_path in to_remove:
+            if QFile.moveToTrash(file_path):
+                removed.append(file_path)
+            else:
+                print(f"Ошибка удаления файла {file_path}")
+
+        if removed:
+            self.files_removed.emit(removed)
+        if len(removed) < len(to_remove):
+            QMessageBox.warning(self, "Ошибка", f"Не удалось удалить {len(to_remove) - len(removed)} файлов")
+        self.remove_checked_rows(set(removed))
+
+    def remove_checked_rows(self, removed):
+        for row in range(self.tree.topLevelItemCount() - 1, -1, -1):
+            group_item = self.tree.topLevelItem(row)
+            for i in range(group_item.childCount() - 1, -1, -1):
+                if group_item.child(i).data(0, Qt.UserRole) in removed:
+                    group_item.takeChild(i)
+            if group_item.childCount() < 2:
+                self.tree.takeTopLevelItem(row)
+        self.remove_btn.setEnabled(self.tree.topLevelItemCount() > 0)
+
+    def closeEvent(self, event):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker.wait()
+        super().closeEvent(event)
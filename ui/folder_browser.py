@@ -1,35 +1,101 @@
 from PyQt5.QtWidgets import (QTreeWidget, QTreeWidgetItem, QHeaderView)
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, pyqtSignal
 import os
 
+from utils.file_utils import format_size
+
+# Роль с путём папки, содержимое которой ещё не загружено из индекса
+PENDING_ROLE = Qt.ItemDataRole.UserRole + 1
+
 class FolderBrowser(QTreeWidget):
+    file_activated = pyqtSignal(str)
+
     def __init__(self):
         super().__init__()
-        self.setHeaderLabel("Музыкальные папки")
-        self.setColumnCount(2)
+        self.setHeaderLabels(["Музыкальные папки", "", "Треков", "Размер"])
+        self.setColumnCount(4)
         self.header().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
         self.setColumnHidden(1, True)
-        
+
         self.audio_files = {}
-    
+        self.index = None
+        self.itemExpanded.connect(self.on_item_expanded)
+        self.itemDoubleClicked.connect(self.on_item_double_clicked)
+
     def load_folders(self, audio_files_dict: dict):
         self.audio_files = audio_files_dict
+        self.index = None
         self.clear()
-        
+
         for folder_path, files in audio_files_dict.items():
             folder_name = os.path.basename(folder_path)
             if not folder_name:
                 folder_name = folder_path
-                
-            folder_item = QTreeWidgetItem([folder_name, folder_path])
+
+            folder_item = QTreeWidgetItem([folder_name, folder_path, str(len(files))])
             folder_item.setData(0, Qt.ItemDataRole.UserRole, files)
-            
+
             for file_path in files:
                 file_name = os.path.basename(file_path)
                 file_item = QTreeWidgetItem([file_name, file_path])
                 file_item.setData(0, Qt.ItemDataRole.UserRole, file_path)
                 folder_item.addChild(file_item)
-            
+
             self.addTopLevelItem(folder_item)
-        
-        self.expandAll()
\ No newline at end of file
+
+        self.expandAll()
+
+    def load_index(self, index):
+        """Папки из индекса библиотеки: итоги сразу, содержимое — при раскрытии"""
+        expanded = self.expanded_paths()
+        self.index = index
+        self.audio_files = {}
+        self.clear()
+
+        for folder_path, tracks, size in index.get_folder_roots():
+            self.addTopLevelItem(self.create_folder_item(folder_path, tracks, size, root=True))
+
+        # Восстанавливаем раскрытые папки после обновления
+        pending = [self.topLevelItem(row) for row in range(self.topLevelItemCount())]
+        while pending:
+            item = pending.pop()
+            if item.text(1) in expanded:
+                item.setExpanded(True)
+                pending.extend(item.child(row) for row in range(item.childCount()))
+
+    def create_folder_item(self, folder_path, tracks, size, root=False):
+        folder_name = folder_path if root else os.path.basename(folder_path)
+        item = QTreeWidgetItem([folder_name, folder_path, str(tracks), format_size(size)])
+        item.setData(0, PENDING_ROLE, folder_path)
+        # Заглушка, чтобы у папки была стрелка раскрытия
+        item.addChild(QTreeWidgetItem([""]))
+        return item
+
+    def on_item_expanded(self, item):
+        folder_path = item.data(0, PENDING_ROLE)
+        if folder_path is None or self.index is None:
+            return
+        item.setData(0, PENDING_ROLE, None)
+        item.takeChildren()
+
+        for subfolder, tracks, size in self.index.get_subfolders(folder_path):
+            item.addChild(self.create_folder_item(subfolder, tracks, size))
+        for file_path, size in self.index.get_folder_files(folder_path):
+            file_item = QTreeWidgetItem([os.path.basename(file_path), file_path, "", format_size(size)])
+            file_item.setData(0, Qt.ItemDataRole.UserRole, file_path)
+            item.addChild(file_item)
+
+    def on_item_double_clicked(self, item, column):
+        file_path = item.data(0, Qt.ItemDataRole.UserRole)
+        if isinstance(file_path, str):
+            self.file_activated.emit(file_path)
+
+    def expanded_paths(self):
+        paths = set()
+        pending = [self.topLevelItem(row) for row in range(self.topLevelItemCount())]
+        while pending:
+            item = pending.pop()
+            if item.isExpanded():
+                paths.add(item.text(1))
+                pending.extend(item.child(row) for row in range(item.childCount()))
+        return paths
@@ -0,0 +1,61 @@
+from PyQt5.QtCore import QObject, QSettings, pyqtSignal
+
+from core.folder_watcher import FolderWatcher
+
+class LibraryWatcher(QObject):
+    """Связывает FolderWatcher с окном: изменения в папках приходят сигналом"""
+    changes_ready = pyqtSignal(object)
+
+    def __init__(self, scanner, display_name, parent=None, metadata_editor=None, search_index=None,
+                 library_table=None):
+        super().__init__(parent)
+        self.scanner = scanner
+        self.display_name = display_name
+        self.metadata_editor = metadata_editor
+        self.search_index = search_index
+        self.library_table = library_table
+        self.watcher = None
+
+    @staticmethod
+    def is_enabled() -> bool:
+        settings = QSettings("MusicPlayer", "Settings")
+        return settings.value("watch_folder", False, type=bool)
+
+    def apply_settings(self):
+        """Запуск или остановка наблюдения согласно настройке watch_folder"""
+        # Перезапуск нужен и при смене корней или исключений
+        self.stop()
+        if self.is_enabled():
+            self.start()
+
+    def start(self):
+        if self.watcher is not None:
+            return
+        roots = [str(path) for path in self.scanner.get_scan_paths()]
+        self.watcher = FolderWatcher(roots, self.scanner.audio_extensions, self.on_dirs_changed,
+                                     exclude=self.scanner.exclude_patterns)
+        self.watcher.start()
+
+    def stop(self):
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+
+    def on_dirs_changed(self, dirs):
+        # Вызывается из потока наблюдателя: индекс и теги читаем здесь, а не в GUI
+        delta = self.scanner.refresh_dirs(dirs)
+        if not any(delta.values()):
+            return
+        paths = delta['added'] + delta['modified']
+        if self.metadata_editor is not None:
+            results = list(self.metadata_editor.get_metadata_many(paths, stream_info=False))
+            delta['names'] = {file_path: self.display_name(file_path, metadata) for file_path, metadata in results}
+            if self.search_index is not None:
+                self.search_index.update(results)
+                self.search_index.remove(delta['removed'])
+            if self.library_table is not None:
+                self.library_table.update(results)
+                self.library_table.remove(delta['removed'])
+        else:
+            delta['names'] = {file_path: self.display_name(file_path) for file_path in paths}
+        self.changes_ready.emit(delta)
@@ -0,0 +1,45 @@
+import os
+import sys
+import threading
+from PyQt5.QtCore import QThread, pyqtSignal
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from core.loudness import replaygain_tags
+
+class LoudnessWorker(QThread):
+    """Анализ громкости библиотеки в фоне; по желанию результаты пишутся в теги ReplayGain"""
+    progress = pyqtSignal(int, int)
+    analysis_finished = pyqtSignal(int, int, bool)
+
+    def __init__(self, analyzer, paths, metadata_editor=None, write_tags=False):
+        super().__init__()
+        self.analyzer = analyzer
+        self.paths = paths
+        self.metadata_editor = metadata_editor
+        self.write_tags = write_tags
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        done = 0
+        analyzed = 0
+        failed = 0
+        try:
+            for file_path, result, fresh in self.analyzer.analyze_many(self.paths, self.cancel_event):
+                done += 1
+                if fresh:
+                    if result is None:
+                        failed += 1
+                    else:
+                        analyzed += 1
+                        if self.write_tags and self.metadata_editor is not None:
+                            if self.metadata_editor.update_metadata(file_path, replaygain_tags(result)):
+                                self.analyzer.remember(file_path, result)
+                self.progress.emit(done, len(self.paths))
+        except Exception as e:
+            print(f"Ошибка анализа громкости: {e}")
+        finally:
+            self.analysis_finished.emit(analyzed, failed, self.cancel_event.is_set())
@@ -1,20 +1,36 @@
 import os
 from PyQt5.QtWidgets import (QMainWindow, QVBoxLayout, QHBoxLayout,
-                            QPushButton, QListWidget, QSlider, QLabel,
+                            QPushButton, QListWidget, QListView, QSlider, QLabel,
                             QWidget, QMessageBox, QTextEdit, QLineEdit, QFormLayout,
-                            QListWidgetItem, QMenu, QAction,
-                            QGroupBox, QApplication)
+                            QMenu, QAction, QAbstractItemView,
+                            QGroupBox, QApplication, QTabWidget, QComboBox)
 from PyQt5.QtCore import Qt, QTimer, QSize, QSettings
-from PyQt5.QtGui import QIcon
+from PyQt5.QtGui import QIcon, QPixmap
 import sys
 
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from core.player import MusicPlayer
+from core.track import TrackList
 from core.playlist_manager import PlaylistManager
 from core.metadata_editor import MetadataEditor
 from core.lyrics_manager import LyricsManager
 from core.file_scanner import FileScanner
+from core.library_snapshot import LibrarySnapshot
+from core.search_index import SearchIndex
+from core.library_table import LibraryTable
+from core.loudness import LoudnessAnalyzer
+from ui.scan_worker import ScanWorker, TableFillWorker
+from ui.track_list_model import TrackListModel
+from ui.library_watcher import LibraryWatcher
+from ui.cover_loader import CoverLoader
+from ui.player_events import PlayerEvents
+from ui.progress_scheduler import ProgressScheduler
+from ui.loudness_worker import LoudnessWorker
+from ui.scan_settings import ScanSettings
+from ui.duplicates_dialog import DuplicatesDialog
+from ui.bulk_tag_dialog import BulkTagDialog
+from ui.folder_browser import FolderBrowser
 from auth.payment_verifier import PaymentVerifier
 from ui.subscription_dialog import SubscriptionDialog
 from ui.account_window import AccountWindow
@@ -23,16 +39,43 @@ from auth.account_manager import AccountManager
 from ui.themes import ThemeManager
 
 class MainWindow(QMainWindow):
+    MIN_SEARCH_LENGTH = 2
+    COVER_SIZE = 200
+    # Варианты сортировки списка: подпись и ключи LibraryTable.sort
+    SORT_ORDERS = [
+        ("Порядок сканирования", []),
+        ("Исполнитель, альбом", ['artist', 'album', 'disc_number', 'track_number']),
+        ("Название", ['title']),
+        ("Альбом", ['album', 'disc_number', 'track_number']),
+        ("Год, новые сверху", ['-year', 'artist', 'album', 'track_number']),
+        ("Жанр", ['genre', 'artist', 'album', 'track_number']),
+    ]
+
     def __init__(self):
         super().__init__()
-        self.player = MusicPlayer()
+        self.player = MusicPlayer.shared()
         self.playlist_manager = PlaylistManager()
         self.metadata_editor = MetadataEditor()
         self.lyrics_manager = LyricsManager()
         self.scanner = FileScanner()
+        ScanSettings.apply(self.scanner)
+        self.snapshot = LibrarySnapshot()
+        self.cover_loader = CoverLoader(parent=self)
+        self.cover_loader.cover_ready.connect(self.on_cover_ready)
+        self.search_index = SearchIndex()
+        self.library_table = LibraryTable()
+        self.loudness = LoudnessAnalyzer()
+        self.player.gain_lookup = self.get_track_gain
+        self.player.silence_lookup = self.loudness.get_silence
+        self.apply_crossfade_settings()
+        self.loudness_worker = None
 
         self.current_track = None
+        self.scanned_extensions = None
+        self.scan_worker = None
+        self.table_worker = None
         self._slider_pressed = False
+        self.track_length = 0
         self.metadata_visible = False
         self.lyrics_visible = False
         
@@ -40,8 +83,10 @@ class MainWindow(QMainWindow):
         
         self.load_icons()
         self.setup_ui()
-        self.setup_timer()
         self.setup_player_connections()
+        self.setup_library_watcher()
+        # После конструктора: окно, открытое из мини-плеера, уже получит его список
+        QTimer.singleShot(0, self.restore_snapshot)
         self.account_manager = AccountManager("http://localhost:5000")
         self.check_subscription_on_startup()
         self.create_menu()
@@ -54,12 +99,79 @@ class MainWindow(QMainWindow):
         self.stop_icon = QIcon("ui/icons/stop.png")
         self.next_icon = QIcon("ui/icons/next.png")
     
+    def setup_library_watcher(self):
+        self.library_watcher = LibraryWatcher(self.scanner, self.get_display_name, self, self.metadata_editor,
+                                              self.search_index, self.library_table)
+        self.library_watcher.changes_ready.connect(self.on_library_changed)
+        self.library_watcher.apply_settings()
+
+    def on_library_changed(self, delta):
+        """Изменения из отслеживаемых папок"""
+        self.folder_browser.load_index(self.scanner.get_index())
+        if self.scanned_extensions is None:
+            return
+        changes = {
+            change: [path for path in delta[change] if os.path.splitext(path)[1].lower() in self.scanned_extensions]
+            for change in ('added', 'removed', 'modified')
+        }
+        if not any(changes.values()):
+            return
+        changes['names'] = delta['names']
+        self.apply_scan_delta(changes)
+        self.statusBar().showMessage(
+            f"Библиотека обновлена: +{len(changes['added'])}, -{len(changes['removed'])}, "
+            f"~{len(changes['modified'])}"
+        )
+
     def setup_player_connections(self):
-        if hasattr(self.player, 'finished'):
-            self.player.finished.connect(self.on_track_finished)
-    
-    def on_track_finished(self):
-        self.next_track()
+        # Длительность, смена трека и состояние приходят событиями libvlc: без таймера опроса
+        self.player_events = PlayerEvents(self.player, self)
+        # Очередь и для вызовов из потока окна: play() испускает сигнал раньше, чем окно запомнит трек
+        self.player_events.track_changed.connect(self.on_track_changed, Qt.QueuedConnection)
+        self.player_events.length_changed.connect(self.on_length_changed)
+        self.player_events.finished.connect(self.on_playback_finished)
+        self.player_events.error.connect(self.on_player_error)
+        # Прогресс перерисовывается по своим часам и только в видимом окне
+        self.progress_scheduler = ProgressScheduler(self.player, self.player_events, self, self.show_progress)
+
+    def on_track_changed(self, file_path):
+        """Трек, который плеер включил сам после окончания предыдущего"""
+        if file_path == self.current_track:
+            return
+        self.current_track = file_path
+        self.load_track_info()
+        self.highlight_current_track()
+
+    def sync_with_player(self):
+        """Окно открыто поверх идущего воспроизведения: трек, длительность и кнопка из плеера"""
+        self.current_track = self.player.current_path
+        self.on_length_changed(max(self.player.get_length(), 0))
+        self.load_track_info()
+        self.highlight_current_track()
+        if self.player.is_playing():
+            self.play_btn.setIcon(self.pause_icon)
+            self.play_btn.setToolTip("Пауза")
+        else:
+            self.play_btn.setIcon(self.play_icon)
+            self.play_btn.setToolTip("Воспроизвести")
+
+    def show_progress(self, time):
+        if self.track_length > 0 and not self._slider_pressed:
+            self.progress_slider.setValue(int(time * 1000 / self.track_length))
+            current_sec = time // 1000
+            self.position_label.setText(f"{current_sec//60}:{current_sec%60:02d}")
+
+    def on_length_changed(self, length):
+        self.track_length = length
+        total_sec = length // 1000
+        self.duration_label.setText(f"{total_sec//60}:{total_sec%60:02d}")
+
+    def on_playback_finished(self):
+        self.play_btn.setIcon(self.play_icon)
+        self.play_btn.setToolTip("Воспроизвести")
+
+    def on_player_error(self, file_path):
+        self.statusBar().showMessage(f"Не удалось воспроизвести: {os.path.basename(file_path)}")
     
     def setup_ui(self):
         self.setWindowTitle("Музыкальный Плеер")
@@ -98,15 +210,60 @@ class MainWindow(QMainWindow):
         self.scan_all_btn = QPushButton("Все")
         self.scan_all_btn.clicked.connect(self.scan_all_files)
         scan_layout.addWidget(self.scan_all_btn)
+
+        self.cancel_scan_btn = QPushButton("Отмена")
+        self.cancel_scan_btn.setEnabled(False)
+        self.cancel_scan_btn.clicked.connect(self.cancel_scan)
+        scan_layout.addWidget(self.cancel_scan_btn)
         
         layout.addLayout(scan_layout)
         
-        self.files_list = QListWidget()
-        self.files_list.itemClicked.connect(self.play_selected_track)
+        # Список библиотеки — модель путей, а не QListWidgetItem на каждый трек:
+        # сортировка и фильтр поиска не пересоздают и не перебирают элементы
+        self.files_model = TrackListModel(self)
+        self.files_list = QListView()
+        self.files_list.setModel(self.files_model)
+        self.files_list.setUniformItemSizes(True)
+        self.files_list.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.files_list.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.files_list.clicked.connect(self.play_selected_track)
         self.files_list.setContextMenuPolicy(Qt.CustomContextMenu)
         self.files_list.customContextMenuRequested.connect(self.show_context_menu)
-        layout.addWidget(QLabel("Файлы:"))
-        layout.addWidget(self.files_list)
+        self.cover_loader.watch_list(self.files_list)
+
+        self.folder_browser = FolderBrowser()
+        self.folder_browser.file_activated.connect(self.play_folder_track)
+        self.folder_browser.load_index(self.scanner.get_index())
+
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Поиск: название, исполнитель, альбом, файл...")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self.on_search_text_changed)
+
+        self.sort_combo = QComboBox()
+        for label, _ in self.SORT_ORDERS:
+            self.sort_combo.addItem(label)
+        settings = QSettings("MusicPlayer", "Settings")
+        sort_index = settings.value("library_sort", 0, type=int)
+        if 0 <= sort_index < len(self.SORT_ORDERS):
+            self.sort_combo.setCurrentIndex(sort_index)
+        self.sort_combo.currentIndexChanged.connect(self.on_sort_changed)
+
+        search_layout = QHBoxLayout()
+        search_layout.addWidget(self.search_edit)
+        search_layout.addWidget(self.sort_combo)
+        layout.addLayout(search_layout)
+
+        # Фильтр применяется после паузы в наборе, а не на каждую букву
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self.apply_search_filter)
+
+        library_tabs = QTabWidget()
+        library_tabs.addTab(self.files_list, "Файлы")
+        library_tabs.addTab(self.folder_browser, "Папки")
+        layout.addWidget(library_tabs)
         
         playlist_btn_layout = QHBoxLayout()
         create_playlist_btn = QPushButton("Создать плейлист")
@@ -136,6 +293,12 @@ class MainWindow(QMainWindow):
         track_info_group = QGroupBox("Сейчас играет")
         track_info_layout = QVBoxLayout(track_info_group)
         
+        self.cover_label = QLabel()
+        self.cover_label.setFixedSize(self.COVER_SIZE, self.COVER_SIZE)
+        self.cover_label.setAlignment(Qt.AlignCenter)
+        self.cover_label.hide()
+        track_info_layout.addWidget(self.cover_label, 0, Qt.AlignCenter)
+
         self.track_info = QLabel("Трек не выбран")
         self.track_info.setStyleSheet("font-size: 32px; font-weight: bold; padding: 15px;")
         self.track_info.setAlignment(Qt.AlignCenter)
@@ -349,60 +512,144 @@ class MainWindow(QMainWindow):
         self.lyrics_area.setVisible(self.lyrics_visible)
         self.lyrics_btn.setChecked(self.lyrics_visible)
     
-    def get_display_name(self, file_path):
-        metadata = self.metadata_editor.get_metadata(file_path)
-        title = metadata.get('title', '').strip()
-        artist = metadata.get('artist', '').strip()
-        
-        if title and artist:
-            return f"{title} - {artist}"
-        elif title:
-            return title
-        elif artist:
-            return f"Неизвестно - {artist}"
-        else:
-            return os.path.splitext(os.path.basename(file_path))[0]
-    
-    def setup_timer(self):
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_display)
-        self.timer.start(100)
+    def get_display_name(self, file_path, metadata=None):
+        """Название из тегов; без переданных метаданных теги читаются один раз на трек"""
+        track = self.player.tracks.get(file_path)
+        if metadata is None and not track.loaded:
+            metadata = self.metadata_editor.get_metadata(file_path, stream_info=False)
+        if metadata is not None:
+            track.update(metadata)
+        return track.display_name
     
-    def scan_files(self, extensions):
-        self.files_list.clear()
+    def scan_files(self, extensions, known=None):
+        self.cancel_scan()
         self.statusBar().showMessage(f"Сканирую {extensions}...")
 
+        rebuild = self.scanned_extensions != set(extensions)
+        if rebuild:
+            self.files_model.clear()
+            self.player.current_playlist = []
+            self.scanned_extensions = None
+
         try:
-            self._extracted_from_scan_files_7(extensions)
+            worker = ScanWorker(self.scanner, extensions, self.get_display_name, rebuild=rebuild, known=known,
+                                metadata_editor=self.metadata_editor, search_index=self.search_index,
+                                library_table=self.library_table)
+            # Слоты — методы окна, а не замыкания: пачку отменённого сканирования узнаём по sender()
+            worker.batch_ready.connect(self.on_scan_batch)
+            worker.scan_finished.connect(self.on_scan_finished)
+            worker.finished.connect(worker.deleteLater)
+            self.scan_worker = worker
+            self.cancel_scan_btn.setEnabled(True)
+            worker.start()
         except Exception as e:
             QMessageBox.warning(self, "Ошибка", f"Ошибка сканирования: {str(e)}")
 
-    def _extracted_from_scan_files_7(self, extensions):
-        files_by_ext = self.scanner.scan_by_extensions(extensions)
-        all_files = []
-        for ext_files in files_by_ext.values():
-            all_files.extend(ext_files)
+    def restore_snapshot(self):
+        """Список из снимка прошлого сканирования и фоновая сверка с диском"""
+        if self.files_model.track_count() or self.scanned_extensions is not None:
+            return
+        snapshot = self.snapshot.load()
+        if snapshot is None:
+            return
+        extensions, tracks = snapshot
 
-        for file_path in all_files:
-            display_name = self.get_display_name(file_path)
-            item = QListWidgetItem(display_name)
-            item.setData(Qt.UserRole, file_path)
-            self.files_list.addItem(item)
+        self.files_model.set_tracks(tracks)
+
+        self.player.current_playlist = [file_path for file_path, _ in tracks]
+        self.scanned_extensions = extensions
+        self.scan_files(sorted(extensions), known=set(self.player.current_playlist.paths()))
+        self.statusBar().showMessage(f"Загружено {len(tracks)} файлов, сверяю с диском...")
+
+    def save_snapshot(self):
+        if self.scanned_extensions is None:
+            return
+        self.snapshot.save(self.scanned_extensions, self.files_model.items())
+
+    def cancel_scan(self):
+        """Отмена текущего сканирования"""
+        if self.scan_worker is not None and self.scan_worker.isRunning():
+            self.scan_worker.cancel()
+            self.scan_worker.wait()
+            # Пачки отменённого сканирования могли не дойти до списка
+            self.scanned_extensions = None
+        self.scan_worker = None
+        self.cancel_scan_btn.setEnabled(False)
+
+    def on_scan_batch(self, batch):
+        # Отменённый воркер мог быть уже удалён: тогда sender() — None
+        if self.scan_worker is None or self.sender() is not self.scan_worker:
+            return
+        self.apply_scan_delta(batch)
+        self.statusBar().showMessage(
+            f"Сканирую... папок: {batch['dirs']}, найдено: {batch['found']}, "
+            f"в списке: {len(self.player.current_playlist)}"
+        )
+
+    def on_scan_finished(self, cancelled):
+        worker = self.sender()
+        if worker is None or worker is not self.scan_worker:
+            return
+        extensions = set(worker.extensions)
+        self.scan_worker = None
+        self.cancel_scan_btn.setEnabled(False)
+        if cancelled:
+            self.scanned_extensions = None
+            self.statusBar().showMessage(f"Сканирование отменено, в списке {len(self.player.current_playlist)} файлов")
+        else:
+            self.scanned_extensions = extensions
+            # Новые файлы приходили в конец списка, их место определяет сортировка
+            self.apply_sort()
+            self.save_snapshot()
+            self.metadata_editor.cache.flush()
+            self.folder_browser.load_index(self.scanner.get_index())
+            message = f"Найдено {len(self.player.current_playlist)} файлов"
+            skipped = self.scanner.describe_scan_stats()
+            self.statusBar().showMessage(f"{message} ({skipped})" if skipped else message)
+
+    def apply_scan_delta(self, delta):
+        """Применение изменений библиотеки к списку без его перестроения"""
+        names = delta.get('names', {})
+        removed = set(delta['removed'])
+        modified = set(delta['modified'])
+
+        self.files_model.remove_paths(removed)
+        if modified:
+            self.files_model.set_names({file_path: names.get(file_path) or self.get_display_name(file_path)
+                                        for file_path in modified})
+        self.files_model.append((file_path, names.get(file_path) or self.get_display_name(file_path))
+                                for file_path in delta['added'])
+
+        # Плейлист читают поток переключения треков и кроссфейд: меняем его под lock плеера
+        with self.player.lock:
+            if removed:
+                self.player.current_playlist.remove_paths(removed)
+            self.player.current_playlist.extend(delta['added'])
+
+            if removed or self.current_track in delta['added']:
+                if self.current_track in self.player.current_playlist:
+                    self.player.current_index = self.player.current_playlist.index(self.current_track)
+        self.refresh_search_filter()
 
-        self.player.current_playlist = all_files
-        self.statusBar().showMessage(f"Найдено {len(all_files)} файлов")
-    
     def scan_all_files(self):
         self.scan_files(['.mp3', '.wav', '.ogg', '.flac', '.m4a', '.aac'])
     
     def play_selected_track(self, item):
-        if not item:
+        if not item.isValid():
+            return
+        # Ctrl/Shift+клик только выделяет треки
+        if QApplication.keyboardModifiers() & (Qt.ControlModifier | Qt.ShiftModifier):
             return
         file_path = item.data(Qt.UserRole)
         if file_path and os.path.exists(file_path):
             self._extracted_from_play_selected_track_5(file_path)
         self.highlight_current_track()
 
+    def play_folder_track(self, file_path):
+        if os.path.exists(file_path):
+            self._extracted_from_play_selected_track_5(file_path)
+        self.highlight_current_track()
+
     def _extracted_from_play_selected_track_5(self, file_path):
         if file_path in self.player.current_playlist:
             self.player.current_index = self.player.current_playlist.index(file_path)
@@ -416,7 +663,7 @@ class MainWindow(QMainWindow):
     def next_track(self):
         self.player.next_track()
         if self.player.current_playlist:
-            self.current_track = self.player.current_playlist[self.player.current_index]
+            self.current_track = self.player.current_playlist[self.player.current_index].path
             self.load_track_info()
             self.play_btn.setIcon(self.pause_icon)
             self.play_btn.setToolTip("Пауза")
@@ -425,7 +672,7 @@ class MainWindow(QMainWindow):
     def previous_track(self):
         self.player.previous_track()
         if self.player.current_playlist:
-            self.current_track = self.player.current_playlist[self.player.current_index]
+            self.current_track = self.player.current_playlist[self.player.current_index].path
             self.load_track_info()
             self.play_btn.setIcon(self.pause_icon)
             self.play_btn.setToolTip("Пауза")
@@ -433,12 +680,15 @@ class MainWindow(QMainWindow):
         
     def highlight_current_track(self):
         if self.player.current_playlist and self.player.current_index >= 0:
-            for i in range(self.files_list.count()):
-                item = self.files_list.item(i)
-                file_path = item.data(Qt.UserRole)
-                if file_path == self.current_track:
-                    self.files_list.setCurrentRow(i)
-                    break
+            # Строки списка идут в порядке плейлиста: позиция трека и есть номер строки
+            if self.current_track in self.player.current_playlist:
+                row = self.player.current_playlist.index(self.current_track)
+                if self.files_model.path_at(row) == self.current_track:
+                    self.files_list.setCurrentIndex(self.files_model.index(row))
+                    return
+            row = self.files_model.row_of(self.current_track)
+            if row >= 0:
+                self.files_list.setCurrentIndex(self.files_model.index(row))
     
     def toggle_play(self):
         if self.player.is_playing():
@@ -461,7 +711,7 @@ class MainWindow(QMainWindow):
             if not verifier.verify_license():
                 return
 
-        metadata = self.metadata_editor.get_metadata(self.current_track) if self.current_track else {}
+        metadata = self.metadata_editor.get_metadata(self.current_track, stream_info=False) if self.current_track else {}
 
         artist = metadata.get('artist', '')
         title = metadata.get('title', '')
@@ -527,30 +777,15 @@ class MainWindow(QMainWindow):
         self._slider_pressed = False
         position = self.progress_slider.value()
         self.player.set_position(position / 1000.0)
-    
-    def update_display(self):
-        if self.player.is_playing():
-            length = self.player.get_length()
-            position = self.player.get_position()
-            
-            if length > 0 and not self._slider_pressed:
-                self.progress_slider.setValue(int(position * 1000))
-                
-                current_sec = int(position * length / 1000)
-                total_sec = int(length / 1000)
-                
-                self.position_label.setText(f"{current_sec//60}:{current_sec%60:02d}")
-                self.duration_label.setText(f"{total_sec//60}:{total_sec%60:02d}")
-            
-            if position >= 0.999:
-                self.next_track()
+        self.progress_scheduler.seek(int(position * self.track_length / 1000))
     
     def load_track_info(self):
         if self.current_track:
-            display_name = self.get_display_name(self.current_track)
+            metadata = self.metadata_editor.get_metadata(self.current_track, stream_info=False)
+            display_name = self.get_display_name(self.current_track, metadata)
             self.track_info.setText(display_name)
+            self.cover_loader.request(self.current_track, self.COVER_SIZE)
             
-            metadata = self.metadata_editor.get_metadata(self.current_track)
             self.metadata_title.setText(metadata.get('title', ''))
             self.metadata_artist.setText(metadata.get('artist', ''))
             self.metadata_album.setText(metadata.get('album', ''))
@@ -581,12 +816,8 @@ class MainWindow(QMainWindow):
         }
 
         if self.metadata_editor.set_metadata(self.current_track, metadata):
-            self.load_track_info()
-            for i in range(self.files_list.count()):
-                item = self.files_list.item(i)
-                if item.data(Qt.UserRole) == self.current_track:
-                    item.setText(self.get_display_name(self.current_track))
-                    break
+            metadata = self.metadata_editor.get_metadata(self.current_track, stream_info=False)
+            self.on_tags_updated({self.current_track: metadata})
         else:
             QMessageBox.warning(self, "Ошибка", "Не удалось сохранить метаданные")
     
@@ -635,12 +866,11 @@ class MainWindow(QMainWindow):
     
     def load_playlist_by_name(self, name):
         if playlist_data := self.playlist_manager.get_playlist(name):
+            self.cancel_scan()
             self.player.current_playlist = playlist_data.get('tracks', [])
-            self.files_list.clear()
-            for track in self.player.current_playlist:
-                item = QListWidgetItem(os.path.basename(track))
-                item.setData(Qt.UserRole, track)
-                self.files_list.addItem(item)
+            self.scanned_extensions = None
+            self.files_model.set_tracks((track.path, os.path.basename(track.path))
+                                        for track in self.player.current_playlist)
             self.statusBar().showMessage(f"Загружен плейлист: {name}")
     
     def load_playlist(self, item):
@@ -653,12 +883,18 @@ class MainWindow(QMainWindow):
         self.playlists_list.addItems(playlists)
 
     def show_context_menu(self, position):
-        item = self.files_list.itemAt(position)
-        if not item:
+        item = self.files_list.indexAt(position)
+        if not item.isValid():
             return
 
         menu = QMenu(self)
 
+        selected = self.files_list.selectionModel().selectedIndexes() or [item]
+        edit_tags_action = QAction(f"Изменить теги ({len(selected)})...", self)
+        edit_tags_action.triggered.connect(lambda: self.edit_tags([i.data(Qt.UserRole) for i in selected]))
+        menu.addAction(edit_tags_action)
+        menu.addSeparator()
+
         if playlists := self.playlist_manager.get_all_playlists():
             for playlist_name in playlists:
                 action = QAction(f"Добавить в '{playlist_name}'", self)
@@ -709,6 +945,15 @@ class MainWindow(QMainWindow):
         account_action.triggered.connect(self.open_account)
         settings_menu.addAction(account_action)
         
+        library_menu = menubar.addMenu('Библиотека')
+        duplicates_action = QAction('Найти дубликаты', self)
+        duplicates_action.triggered.connect(self.find_duplicates)
+        library_menu.addAction(duplicates_action)
+
+        self.loudness_action = QAction('Анализ громкости', self)
+        self.loudness_action.triggered.connect(self.analyze_loudness)
+        library_menu.addAction(self.loudness_action)
+
         subscription_menu = menubar.addMenu('Подписка')
         buy_action = QAction('Купить подписку', self)
         buy_action.triggered.connect(self.open_payment)
@@ -718,6 +963,182 @@ class MainWindow(QMainWindow):
         check_action.triggered.connect(self.check_subscription)
         subscription_menu.addAction(check_action)
     
+    def find_duplicates(self):
+        paths = self.library_paths()
+        if not paths:
+            QMessageBox.information(self, "Дубликаты", "Сначала отсканируйте библиотеку")
+            return
+
+        self.duplicates_dialog = DuplicatesDialog(paths, self)
+        self.duplicates_dialog.files_removed.connect(self.on_duplicates_removed)
+        self.duplicates_dialog.show()
+
+    def edit_tags(self, paths):
+        verifier = PaymentVerifier()
+        if not verifier.verify_license():
+            dialog = SubscriptionDialog(self)
+            dialog.exec()
+            if not verifier.verify_license():
+                return
+
+        self.bulk_tag_dialog = BulkTagDialog(paths, self.metadata_editor, self)
+        self.bulk_tag_dialog.tags_updated.connect(self.on_tags_updated)
+        self.bulk_tag_dialog.show()
+
+    def on_tags_updated(self, metadata):
+        """Обновление названий только у изменённых треков по уже прочитанным тегам {путь: метаданные}"""
+        self.search_index.update(metadata.items())
+        self.library_table.update(metadata.items())
+        self.files_model.set_names({file_path: self.get_display_name(file_path, file_metadata)
+                                    for file_path, file_metadata in metadata.items()})
+        if self.current_track in metadata:
+            self.load_track_info()
+        self.refresh_search_filter()
+
+    def on_cover_ready(self, file_path, size, image):
+        if size != self.COVER_SIZE or file_path != self.current_track:
+            return
+        if image is None:
+            self.cover_label.clear()
+            self.cover_label.hide()
+        else:
+            self.cover_label.setPixmap(QPixmap.fromImage(image))
+            self.cover_label.show()
+
+    def on_search_text_changed(self, text):
+        self.search_timer.start()
+
+    def refresh_search_filter(self):
+        """Повторное применение фильтра после изменения списка"""
+        if self.search_edit.text().strip():
+            self.search_timer.start()
+
+    def apply_search_filter(self):
+        """Скрытие треков, не подходящих под строку поиска"""
+        query = self.search_edit.text().strip()
+        matches = None
+        # Однобуквенный запрос совпадает с большей частью библиотеки и ничего не отсеивает
+        if len(query) >= self.MIN_SEARCH_LENGTH:
+            matches = set(self.search_index.search(query))
+
+        # Модель пересобирает список видимых путей; строки виджета по одной не перебираются
+        self.files_model.set_filter(matches)
+        self.highlight_current_track()
+
+        if matches is not None:
+            self.statusBar().showMessage(f"Найдено: {self.files_model.rowCount()}")
+
+    def library_paths(self):
+        paths = []
+        for ext_files in self.scanner.get_indexed_files(self.scanner.audio_extensions).values():
+            paths.extend(ext_files)
+        return paths or self.player.current_playlist.paths()
+
+    def analyze_loudness(self):
+        """Фоновый анализ громкости всей библиотеки (EBU R128 через ffmpeg)"""
+        if self.loudness_worker is not None:
+            self.loudness_worker.cancel()
+            return
+        if not self.loudness.is_available():
+            QMessageBox.warning(self, "Анализ громкости", "FFmpeg не найден. Установите FFmpeg для анализа громкости.")
+            return
+        paths = self.library_paths()
+        if not paths:
+            QMessageBox.information(self, "Анализ громкости", "Сначала отсканируйте библиотеку")
+            return
+
+        settings = QSettings("MusicPlayer", "Settings")
+        write_tags = settings.value("write_replaygain", False, type=bool)
+        worker = LoudnessWorker(self.loudness, paths, self.metadata_editor, write_tags)
+        worker.progress.connect(
+            lambda done, total: self.statusBar().showMessage(f"Анализ громкости: {done} из {total}"))
+        worker.analysis_finished.connect(self.on_loudness_finished)
+        worker.finished.connect(worker.deleteLater)
+        self.loudness_worker = worker
+        self.loudness_action.setText('Остановить анализ громкости')
+        worker.start()
+
+    def on_loudness_finished(self, analyzed, failed, cancelled):
+        self.loudness_worker = None
+        self.loudness_action.setText('Анализ громкости')
+        message = "Анализ громкости остановлен" if cancelled else "Анализ громкости завершён"
+        message += f": новых {analyzed}"
+        if failed:
+            message += f", не удалось разобрать {failed}"
+        self.statusBar().showMessage(message)
+
+    def apply_crossfade_settings(self):
+        """Длительность кроссфейда из настроек; 0 — переход встык"""
+        settings = QSettings("MusicPlayer", "Settings")
+        duration = 0
+        if settings.value("crossfade", True, type=bool):
+            duration = settings.value("crossfade_duration", 5, type=int)
+        self.player.crossfader.set_duration(duration)
+
+    def get_track_gain(self, file_path):
+        """Усиление трека для выравнивания громкости, если оно включено в настройках"""
+        settings = QSettings("MusicPlayer", "Settings")
+        if not settings.value("normalize_volume", True, type=bool):
+            return None
+        metadata = self.metadata_editor.get_metadata(file_path, stream_info=False)
+        return self.loudness.get_gain(file_path, metadata)
+
+    def on_sort_changed(self, index):
+        settings = QSettings("MusicPlayer", "Settings")
+        settings.setValue("library_sort", index)
+        self.apply_sort()
+        self.save_snapshot()
+
+    def apply_sort(self):
+        """Упорядочивание списка по выбранным полям; сортирует LibraryTable, а не виджет"""
+        keys = self.SORT_ORDERS[self.sort_combo.currentIndex()][1]
+        if not keys or not self.files_model.track_count():
+            return
+        paths = self.files_model.paths
+
+        # Например, список передан из мини-плеера и таблица его ещё не видела:
+        # теги читаются в фоне, по готовности сортировка повторяется
+        missing = [file_path for file_path in paths if file_path not in self.library_table]
+        if missing:
+            self.fill_library_table(missing)
+            return
+        ordered = self.library_table.order(paths, keys)
+        if ordered == paths:
+            return
+
+        # Модель только меняет порядок путей: элементы списка не пересоздаются
+        self.files_model.set_order(ordered)
+        playlist = TrackList(self.player.tracks, ordered)
+        with self.player.lock:
+            self.player.current_playlist = playlist
+            if self.current_track in playlist:
+                self.player.current_index = playlist.index(self.current_track)
+        self.highlight_current_track()
+
+    def fill_library_table(self, paths):
+        if self.table_worker is not None:
+            return
+        worker = TableFillWorker(self.library_table, self.metadata_editor, paths)
+        worker.filled.connect(self.on_library_table_filled)
+        worker.finished.connect(worker.deleteLater)
+        self.table_worker = worker
+        worker.start()
+
+    def on_library_table_filled(self, cancelled):
+        self.table_worker = None
+        if not cancelled:
+            self.apply_sort()
+            self.save_snapshot()
+
+    def on_duplicates_removed(self, paths):
+        self.apply_scan_delta({'added': [], 'removed': paths, 'modified': []})
+        self.search_index.remove(paths)
+        self.library_table.remove(paths)
+        # Во время сканирования индекс занят, изменения подхватит следующий проход
+        if self.scan_worker is None:
+            self.scanner.refresh_dirs(sorted({os.path.dirname(path) for path in paths}))
+            self.folder_browser.load_index(self.scanner.get_index())
+
     def check_subscription_on_startup(self):
         if self.try_auto_login():
             result = self.account_manager.check_subscription()
@@ -811,3 +1232,18 @@ class MainWindow(QMainWindow):
     
     def disable_premium_features(self):
         self.has_premium = False
+
+    def closeEvent(self, event):
+        self.cancel_scan()
+        if self.table_worker is not None:
+            self.table_worker.cancel()
+            self.table_worker.wait()
+        self.player_events.detach()
+        if self.loudness_worker is not None:
+            self.loudness_worker.cancel()
+            self.loudness_worker.wait()
+        self.library_watcher.stop()
+        self.save_snapshot()
+        self.metadata_editor.close()
+        self.cover_loader.shutdown()
+        super().closeEvent(event)
@@ -2,33 +2,55 @@ import os
 from PyQt5.QtWidgets import (QMainWindow, QVBoxLayout, QHBoxLayout,
                             QPushButton, QListWidget, QSlider, QLabel,
                             QWidget, QMessageBox, QListWidgetItem)
-from PyQt5.QtCore import Qt, QTimer, QSize, QEvent
-from PyQt5.QtGui import QIcon
+from PyQt5.QtCore import Qt, QSize, QEvent, QSettings
+from PyQt5.QtGui import QIcon, QPixmap
 import sys
 
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from core.player import MusicPlayer
 from core.file_scanner import FileScanner
+from core.library_snapshot import LibrarySnapshot
 from core.metadata_editor import MetadataEditor
+from core.loudness import LoudnessAnalyzer
 from ui.main_window import MainWindow
+from ui.scan_worker import ScanWorker
+from ui.library_watcher import LibraryWatcher
+from ui.cover_loader import CoverLoader
+from ui.player_events import PlayerEvents
+from ui.progress_scheduler import ProgressScheduler
+from ui.scan_settings import ScanSettings
 from ui.themes import ThemeManager
 
 class MiniPlayer(QMainWindow):
+    COVER_SIZE = 96
+
     def __init__(self):
         super().__init__()
-        self.player = MusicPlayer()
+        self.player = MusicPlayer.shared()
         self.scanner = FileScanner()
+        ScanSettings.apply(self.scanner)
+        self.snapshot = LibrarySnapshot()
+        self.cover_loader = CoverLoader(parent=self)
+        self.cover_loader.cover_ready.connect(self.on_cover_ready)
         self.metadata_editor = MetadataEditor()
+        self.loudness = LoudnessAnalyzer()
+        self.player.gain_lookup = self.get_track_gain
+        self.player.silence_lookup = self.loudness.get_silence
+        self.apply_crossfade_settings()
         self.current_track = None
+        self.scanned_extensions = None
+        self.scan_worker = None
         self._slider_pressed = False
+        self.track_length = 0
 
         ThemeManager.load_theme_from_settings()
 
         self.load_icons()
         self.setup_ui()
-        self.setup_timer()
         self.setup_player_connections()
+        self.setup_library_watcher()
+        self.restore_snapshot()
 
     def load_icons(self):
         self.prev_icon = QIcon("ui/icons/previous.png")
@@ -37,12 +59,64 @@ class MiniPlayer(QMainWindow):
         self.stop_icon = QIcon("ui/icons/stop.png")
         self.next_icon = QIcon("ui/icons/next.png")
 
+    def setup_library_watcher(self):
+        self.library_watcher = LibraryWatcher(self.scanner, self.get_display_name, self, self.metadata_editor)
+        self.library_watcher.changes_ready.connect(self.on_library_changed)
+        self.library_watcher.apply_settings()
+
+    def on_library_changed(self, delta):
+        """Изменения из отслеживаемых папок"""
+        if self.scanned_extensions is None:
+            return
+        changes = {
+            change: [path for path in delta[change] if os.path.splitext(path)[1].lower() in self.scanned_extensions]
+            for change in ('added', 'removed', 'modified')
+        }
+        if not any(changes.values()):
+            return
+        changes['names'] = delta['names']
+        self.apply_scan_delta(changes)
+        self.statusBar().showMessage(
+            f"Библиотека обновлена: +{len(changes['added'])}, -{len(changes['removed'])}, "
+            f"~{len(changes['modified'])}"
+        )
+
     def setup_player_connections(self):
-        if hasattr(self.player, 'finished'):
-            self.player.finished.connect(self.on_track_finished)
+        # Длительность, смена трека и состояние приходят событиями libvlc: без таймера опроса
+        self.player_events = PlayerEvents(self.player, self)
+        # Очередь и для вызовов из потока окна: play() испускает сигнал раньше, чем окно запомнит трек
+        self.player_events.track_changed.connect(self.on_track_changed, Qt.QueuedConnection)
+        self.player_events.length_changed.connect(self.on_length_changed)
+        self.player_events.finished.connect(self.on_playback_finished)
+        self.player_events.error.connect(self.on_player_error)
+        # Прогресс перерисовывается по своим часам и только в видимом окне
+        self.progress_scheduler = ProgressScheduler(self.player, self.player_events, self, self.show_progress)
+
+    def on_track_changed(self, file_path):
+        """Трек, который плеер включил сам после окончания предыдущего"""
+        if file_path == self.current_track:
+            return
+        self.current_track = file_path
+        self.load_track_info()
+        self.highlight_current_track()
 
-    def on_track_finished(self):
-        self.next_track()
+    def show_progress(self, time):
+        if self.track_length > 0 and not self._slider_pressed:
+            self.progress_slider.setValue(int(time * 1000 / self.track_length))
+            current_sec = time // 1000
+            self.position_label.setText(f"{current_sec//60}:{current_sec%60:02d}")
+
+    def on_length_changed(self, length):
+        self.track_length = length
+        total_sec = length // 1000
+        self.duration_label.setText(f"{total_sec//60}:{total_sec%60:02d}")
+
+    def on_playback_finished(self):
+        self.play_btn.setIcon(self.play_icon)
+        self.play_btn.setToolTip("Воспроизвести")
+
+    def on_player_error(self, file_path):
+        self.statusBar().showMessage(f"Не удалось воспроизвести: {os.path.basename(file_path)}")
 
     def setup_ui(self):
         self.setWindowTitle("Мини Плеер")
@@ -64,13 +138,22 @@ class MiniPlayer(QMainWindow):
 
         self.files_list = QListWidget()
         self.files_list.itemClicked.connect(self.play_selected_track)
+        self.cover_loader.watch_list(self.files_list)
         main_layout.addWidget(QLabel("Треки:"))
         main_layout.addWidget(self.files_list)
 
+        track_layout = QHBoxLayout()
+        self.cover_label = QLabel()
+        self.cover_label.setFixedSize(self.COVER_SIZE, self.COVER_SIZE)
+        self.cover_label.setAlignment(Qt.AlignCenter)
+        self.cover_label.hide()
+        track_layout.addWidget(self.cover_label)
+
         self.track_info = QLabel("Трек не выбран")
         self.track_info.setStyleSheet("font-size: 18px; font-weight: bold; padding: 10px;")
         self.track_info.setAlignment(Qt.AlignCenter)
-        main_layout.addWidget(self.track_info)
+        track_layout.addWidget(self.track_info, 1)
+        main_layout.addLayout(track_layout)
 
         progress_layout = QHBoxLayout()
         self.position_label = QLabel("0:00")
@@ -139,30 +222,127 @@ class MiniPlayer(QMainWindow):
         volume_layout.addWidget(self.volume_label)
         main_layout.addLayout(volume_layout)
 
-    def setup_timer(self):
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_display)
-        self.timer.start(100)
-
     def scan_mp3_files(self):
-        self.files_list.clear()
+        if self.scan_worker is not None:
+            self.cancel_scan()
+            self.statusBar().showMessage("Сканирование отменено")
+            return
+
         self.statusBar().showMessage("Сканирую MP3...")
+        self.start_scan({'.mp3'})
+
+    def start_scan(self, extensions, known=None):
+        rebuild = self.scanned_extensions != extensions
+        if rebuild:
+            self.files_list.clear()
+            self.player.current_playlist = []
 
         try:
-            files_by_ext = self.scanner.scan_by_extensions(['.mp3'])
-            mp3_files = files_by_ext.get('.mp3', [])
+            worker = ScanWorker(self.scanner, sorted(extensions), self.get_display_name,
+                                rebuild=rebuild, known=known, metadata_editor=self.metadata_editor)
+            # Слоты — методы окна, а не замыкания: пачку отменённого сканирования узнаём по sender()
+            worker.batch_ready.connect(self.on_scan_batch)
+            worker.scan_finished.connect(self.on_scan_finished)
+            worker.finished.connect(worker.deleteLater)
+            self.scan_worker = worker
+            self.scan_btn.setText("Отменить сканирование")
+            worker.start()
+        except Exception as e:
+            QMessageBox.warning(self, "Ошибка", f"Ошибка сканирования: {str(e)}")
+
+    def restore_snapshot(self):
+        """Список из снимка прошлого сканирования и фоновая сверка с диском"""
+        snapshot = self.snapshot.load()
+        if snapshot is None:
+            return
+        extensions, tracks = snapshot
 
-            for file_path in mp3_files:
-                display_name = self.get_display_name(file_path)
-                item = QListWidgetItem(display_name)
-                item.setData(Qt.UserRole, file_path)
-                self.files_list.addItem(item)
+        self.files_list.setUpdatesEnabled(False)
+        for file_path, display_name in tracks:
+            item = QListWidgetItem(display_name)
+            item.setData(Qt.UserRole, file_path)
+            self.files_list.addItem(item)
+        self.files_list.setUpdatesEnabled(True)
 
-            self.player.current_playlist = mp3_files
-            self.statusBar().showMessage(f"Найдено {len(mp3_files)} MP3 файлов")
+        self.player.current_playlist = [file_path for file_path, _ in tracks]
+        self.scanned_extensions = extensions
+        self.start_scan(extensions, known=set(self.player.current_playlist.paths()))
+        self.statusBar().showMessage(f"Загружено {len(tracks)} файлов, сверяю с диском...")
 
-        except Exception as e:
-            QMessageBox.warning(self, "Ошибка", f"Ошибка сканирования: {str(e)}")
+    def save_snapshot(self):
+        if self.scanned_extensions is None:
+            return
+        tracks = [
+            (self.files_list.item(row).data(Qt.UserRole), self.files_list.item(row).text())
+            for row in range(self.files_list.count())
+        ]
+        self.snapshot.save(self.scanned_extensions, tracks)
+
+    def cancel_scan(self):
+        """Отмена текущего сканирования"""
+        if self.scan_worker is not None and self.scan_worker.isRunning():
+            self.scan_worker.cancel()
+            self.scan_worker.wait()
+            # Пачки отменённого сканирования могли не дойти до списка
+            self.scanned_extensions = None
+        self.scan_worker = None
+        self.scan_btn.setText("Сканировать MP3")
+
+    def on_scan_batch(self, batch):
+        # Отменённый воркер мог быть уже удалён: тогда sender() — None
+        if self.scan_worker is None or self.sender() is not self.scan_worker:
+            return
+        self.apply_scan_delta(batch)
+        self.statusBar().showMessage(f"Сканирую MP3... найдено: {len(self.player.current_playlist)}")
+
+    def on_scan_finished(self, cancelled):
+        worker = self.sender()
+        if worker is None or worker is not self.scan_worker:
+            return
+        extensions = set(worker.extensions)
+        self.scan_worker = None
+        self.scan_btn.setText("Сканировать MP3")
+        if cancelled:
+            self.scanned_extensions = None
+            self.statusBar().showMessage("Сканирование отменено")
+        else:
+            self.scanned_extensions = extensions
+            self.save_snapshot()
+            self.metadata_editor.cache.flush()
+            files = "MP3 файлов" if extensions == {'.mp3'} else "файлов"
+            message = f"Найдено {len(self.player.current_playlist)} {files}"
+            skipped = self.scanner.describe_scan_stats()
+            self.statusBar().showMessage(f"{message} ({skipped})" if skipped else message)
+
+    def apply_scan_delta(self, delta):
+        """Применение изменений библиотеки к списку без его перестроения"""
+        names = delta.get('names', {})
+        removed = set(delta['removed'])
+        modified = set(delta['modified'])
+
+        if removed or modified:
+            for row in range(self.files_list.count() - 1, -1, -1):
+                item = self.files_list.item(row)
+                file_path = item.data(Qt.UserRole)
+                if file_path in removed:
+                    self.files_list.takeItem(row)
+                elif file_path in modified:
+                    item.setText(names.get(file_path) or self.get_display_name(file_path))
+
+        for file_path in delta['added']:
+            item = QListWidgetItem(names.get(file_path) or self.get_display_name(file_path))
+            item.setData(Qt.UserRole, file_path)
+            self.files_list.addItem(item)
+
+        # Плейлист читают поток переключения треков и кроссфейд: меняем его под lock плеера
+        with self.player.lock:
+            if removed:
+                self.player.current_playlist.remove_paths(removed)
+            self.player.current_playlist.extend(delta['added'])
+
+            if removed or self.current_track in delta['added']:
+                if self.current_track in self.player.current_playlist:
+                    self.player.current_index = self.player.current_playlist.index(self.current_track)
 
     def play_selected_track(self, item):
         if not item:
@@ -182,7 +362,7 @@ class MiniPlayer(QMainWindow):
     def next_track(self):
         self.player.next_track()
         if self.player.current_playlist:
-            self.current_track = self.player.current_playlist[self.player.current_index]
+            self.current_track = self.player.current_playlist[self.player.current_index].path
             self.load_track_info()
             self.play_btn.setIcon(self.pause_icon)
             self.play_btn.setToolTip("Пауза")
@@ -191,7 +371,7 @@ class MiniPlayer(QMainWindow):
     def previous_track(self):
         self.player.previous_track()
         if self.player.current_playlist:
-            self.current_track = self.player.current_playlist[self.player.current_index]
+            self.current_track = self.player.current_playlist[self.player.current_index].path
             self.load_track_info()
             self.play_btn.setIcon(self.pause_icon)
             self.play_btn.setToolTip("Пауза")
@@ -199,6 +379,13 @@ class MiniPlayer(QMainWindow):
 
     def highlight_current_track(self):
         if self.player.current_playlist and self.player.current_index >= 0:
+            # Строки списка идут в порядке плейлиста: позиция трека и есть номер строки
+            if self.current_track in self.player.current_playlist:
+                row = self.player.current_playlist.index(self.current_track)
+                item = self.files_list.item(row)
+                if item is not None and item.data(Qt.UserRole) == self.current_track:
+                    self.files_list.setCurrentRow(row)
+                    return
             for i in range(self.files_list.count()):
                 item = self.files_list.item(i)
                 file_path = item.data(Qt.UserRole)
@@ -219,6 +406,22 @@ class MiniPlayer(QMainWindow):
         self.play_btn.setIcon(icon)
         self.play_btn.setToolTip(tooltip)
 
+    def apply_crossfade_settings(self):
+        """Длительность кроссфейда из настроек; 0 — переход встык"""
+        settings = QSettings("MusicPlayer", "Settings")
+        duration = 0
+        if settings.value("crossfade", True, type=bool):
+            duration = settings.value("crossfade_duration", 5, type=int)
+        self.player.crossfader.set_duration(duration)
+
+    def get_track_gain(self, file_path):
+        """Усиление трека для выравнивания громкости, если оно включено в настройках"""
+        settings = QSettings("MusicPlayer", "Settings")
+        if not settings.value("normalize_volume", True, type=bool):
+            return None
+        metadata = self.metadata_editor.get_metadata(file_path, stream_info=False)
+        return self.loudness.get_gain(file_path, metadata)
+
     def set_volume(self, value):
         if value == 0:
             volume = 0
@@ -240,42 +443,41 @@ class MiniPlayer(QMainWindow):
         self._slider_pressed = False
         position = self.progress_slider.value()
         self.player.set_position(position / 1000.0)
-
-    def update_display(self):
-        if self.player.is_playing():
-            length = self.player.get_length()
-            position = self.player.get_position()
-
-            if length > 0 and not self._slider_pressed:
-                self.progress_slider.setValue(int(position * 1000))
-
-                current_sec = int(position * length / 1000)
-                total_sec = int(length / 1000)
-
-                self.position_label.setText(f"{current_sec//60}:{current_sec%60:02d}")
-                self.duration_label.setText(f"{total_sec//60}:{total_sec%60:02d}")
-
-            if position >= 0.999:
-                self.next_track()
-
-    def get_display_name(self, file_path):
-        metadata = self.metadata_editor.get_metadata(file_path)
-        title = metadata.get('title', '').strip()
-        artist = metadata.get('artist', '').strip()
-
-        if title and artist:
-            return f"{title} - {artist}"
-        elif title:
-            return title
-        elif artist:
-            return f"Неизвестно - {artist}"
-        else:
-            return os.path.splitext(os.path.basename(file_path))[0]
-
+        self.progress_scheduler.seek(int(position * self.track_length / 1000))
+
+    def get_display_name(self, file_path, metadata=None):
+        """Название из тегов; без переданных метаданных теги читаются один раз на трек"""
+        track = self.player.tracks.get(file_path)
+        if metadata is None and not track.loaded:
+            metadata = self.metadata_editor.get_metadata(file_path, stream_info=False)
+        if metadata is not None:
+            track.update(metadata)
+        return track.display_name
+    
     def load_track_info(self):
         if self.current_track:
             display_name = self.get_display_name(self.current_track)
             self.track_info.setText(display_name)
+            self.cover_loader.request(self.current_track, self.COVER_SIZE)
+
+    def on_cover_ready(self, file_path, size, image):
+        if size != self.COVER_SIZE or file_path != self.current_track:
+            return
+        if image is None:
+            self.cover_label.clear()
+            self.cover_label.hide()
+        else:
+            self.cover_label.setPixmap(QPixmap.fromImage(image))
+            self.cover_label.show()
+
+    def closeEvent(self, event):
+        self.cancel_scan()
+        self.player_events.detach()
+        self.library_watcher.stop()
+        self.save_snapshot()
+        self.metadata_editor.close()
+        self.cover_loader.shutdown()
+        super().closeEvent(event)
 
     def changeEvent(self, event):
         if event.type() == QEvent.WindowStateChange:
@@ -284,6 +486,7 @@ class MiniPlayer(QMainWindow):
         super().changeEvent(event)
 
     def switch_to_main_window(self):
+        self.cancel_scan()
         main_window = MainWindow()
 
         if self.player.current_playlist:
@@ -292,25 +495,14 @@ class MiniPlayer(QMainWindow):
         self.close()
 
     def _extracted_from_switch_to_main_window_5(self, main_window):
-        main_window.player.current_playlist = self.player.current_playlist
-        main_window.player.current_index = self.player.current_index
-        main_window.current_track = self.current_track
+        # Плеер у окон общий: очередь, позиция и звук не прерываются
+        main_window.scanned_extensions = self.scanned_extensions
+        main_window.volume_slider.setValue(self.volume_slider.value())
 
-        main_window.files_list.clear()
-        for track_path in self.player.current_playlist:
-            display_name = main_window.get_display_name(track_path)
-            item = QListWidgetItem(display_name)
-            item.setData(Qt.UserRole, track_path)
-            main_window.files_list.addItem(item)
-
-        if self.player.current_playlist and self.player.current_index >= 0:
-            main_window.files_list.setCurrentRow(self.player.current_index)
+        # Названия уже вычислены, повторно теги не читаем
+        main_window.files_model.set_tracks(
+            (self.files_list.item(row).data(Qt.UserRole), self.files_list.item(row).text())
+            for row in range(self.files_list.count())
+        )
 
-        main_window.load_track_info()
-
-        if self.player.is_playing():
-            main_window.play_btn.setIcon(main_window.pause_icon)
-            main_window.play_btn.setToolTip("Пауза")
-        else:
-            main_window.play_btn.setIcon(main_window.play_icon)
-            main_window.play_btn.setToolTip("Воспроизвести")
+        main_window.sync_with_player()
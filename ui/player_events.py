@@ -0,0 +1,34 @@
+import os
+import sys
+from PyQt5.QtCore import QObject, pyqtSignal
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from core.player import MusicPlayer
+
+class PlayerEvents(QObject):
+    """События MusicPlayer сигналами Qt.
+
+    Плеер вызывает обработчики из потоков libvlc; испущенный там сигнал
+    Qt доставляет в поток окна через очередь событий, так что слоты могут
+    свободно обращаться к виджетам и плееру.
+    """
+    track_changed = pyqtSignal(str)
+    length_changed = pyqtSignal(int)
+    finished = pyqtSignal()
+    error = pyqtSignal(str)
+    state_changed = pyqtSignal(bool)
+
+    def __init__(self, player, parent=None):
+        super().__init__(parent)
+        self.player = player
+        # Ссылки на emit храним: по ним же обработчики снимаются в detach
+        self.callbacks = [(event, getattr(self, event).emit) for event in MusicPlayer.EVENTS]
+        for event, callback in self.callbacks:
+            self.player.add_listener(event, callback)
+
+    def detach(self):
+        """Отписка от плеера; вызывать до удаления объекта"""
+        for event, callback in self.callbacks:
+            self.player.remove_listener(event, callback)
+        self.callbacks = []
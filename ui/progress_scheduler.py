@@ -0,0 +1,94 @@
+import os
+import sys
+from PyQt5.QtCore import Qt, QObject, QEvent, QTimer
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from core.progress_clock import ProgressClock
+
+class ProgressScheduler(QObject):
+    """Обновление полосы прогресса окна только тогда, когда его видно.
+
+    Пока трек играет, а окно показано и не свёрнуто, таймер перерисовывает
+    прогресс по ProgressClock; время у libvlc запрашивается раз в
+    RESYNC_INTERVAL секунд и при смене состояния. На паузе, после остановки
+    и в скрытом окне таймер стоит. Период подбирается по длине трека: чаще,
+    чем ползунок сдвигается на одно деление, перерисовывать незачем.
+    """
+    RESYNC_INTERVAL = 2.0
+    MIN_INTERVAL = 50
+    MAX_INTERVAL = 500
+    # Делений у ползунка прогресса
+    SLIDER_STEPS = 1000
+
+    def __init__(self, player, player_events, window, callback):
+        super().__init__(window)
+        self.player = player
+        self.window = window
+        self.callback = callback
+        self.clock = ProgressClock()
+        # Плеер общий для окон: новое окно может открыться посреди трека
+        self.length = max(player.get_length(), 0)
+        self.clock.sync(player.get_time(), player.is_playing())
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.CoarseTimer)
+        self.timer.timeout.connect(self.refresh)
+        player_events.state_changed.connect(self.on_state_changed)
+        player_events.track_changed.connect(self.on_track_changed)
+        player_events.length_changed.connect(self.on_length_changed)
+        player_events.finished.connect(self.on_finished)
+        window.installEventFilter(self)
+
+    def eventFilter(self, watched, event):
+        if watched is self.window and event.type() in (QEvent.Show, QEvent.Hide, QEvent.WindowStateChange):
+            self.update_timer()
+        return False
+
+    def is_visible(self) -> bool:
+        return self.window.isVisible() and not self.window.isMinimized()
+
+    def update_timer(self):
+        """Запуск или остановка таймера по состоянию плеера и окна"""
+        if self.clock.running and self.is_visible():
+            self.timer.setInterval(max(self.MIN_INTERVAL, min(self.length // self.SLIDER_STEPS, self.MAX_INTERVAL)))
+            if not self.timer.isActive():
+                self.resync()
+                self.timer.start()
+        else:
+            self.timer.stop()
+
+    def resync(self):
+        self.clock.sync(self.player.get_time(), self.clock.running)
+        self.refresh()
+
+    def refresh(self):
+        if self.clock.running and self.clock.since_sync() >= self.RESYNC_INTERVAL:
+            self.clock.sync(self.player.get_time(), True)
+        track_time = self.clock.time()
+        if self.length > 0:
+            track_time = min(track_time, self.length)
+        self.callback(track_time)
+
+    def seek(self, track_time: int):
+        """Перемотка: время известно, не ждём, пока его применит libvlc"""
+        self.clock.sync(track_time, self.clock.running)
+        if self.is_visible():
+            self.refresh()
+
+    def on_state_changed(self, playing):
+        self.clock.sync(self.player.get_time(), playing)
+        if self.is_visible():
+            self.refresh()
+        self.update_timer()
+
+    def on_track_changed(self, file_path):
+        self.clock.sync(0, True)
+        self.update_timer()
+
+    def on_length_changed(self, length):
+        self.length = length
+        self.update_timer()
+
+    def on_finished(self):
+        self.clock.sync(self.clock.time(), False)
+        self.update_timer()
@@ -0,0 +1,43 @@
+import json
+from PyQt5.QtCore import QSettings
+
+from core.file_scanner import FileScanner
+
+class ScanSettings:
+    """Корни, исключения и лимит библиотеки в QSettings"""
+
+    @staticmethod
+    def load():
+        settings = QSettings("MusicPlayer", "Settings")
+        try:
+            roots = json.loads(settings.value("scan_roots", "null", type=str)) or None
+        except ValueError:
+            roots = None
+        if roots is None:
+            roots = [(str(path), None) for path in FileScanner.get_default_scan_paths()]
+
+        try:
+            exclude = json.loads(settings.value("scan_exclude", "null", type=str))
+        except ValueError:
+            exclude = None
+        if exclude is None:
+            exclude = list(FileScanner.DEFAULT_EXCLUDE)
+
+        # Прежний ключ library_limit хранил размер библиотеки в МБ: как число треков
+        # он не годится, поэтому лимит треков хранится под новым ключом, а старый удаляется
+        if settings.contains("library_limit"):
+            settings.remove("library_limit")
+        limit = settings.value("library_track_limit", 0, type=int)
+        return [(root, depth) for root, depth in roots], exclude, limit
+
+    @staticmethod
+    def save(roots, exclude, limit):
+        settings = QSettings("MusicPlayer", "Settings")
+        settings.setValue("scan_roots", json.dumps([[root, depth] for root, depth in roots]))
+        settings.setValue("scan_exclude", json.dumps(exclude))
+        settings.setValue("library_track_limit", limit)
+
+    @staticmethod
+    def apply(scanner):
+        roots, exclude, limit = ScanSettings.load()
+        scanner.configure(roots, exclude, limit)
@@ -0,0 +1,120 @@
+import threading
+from PyQt5.QtCore import QThread, pyqtSignal
+
+class ScanWorker(QThread):
+    """Фоновое сканирование библиотеки с выдачей результатов пачками"""
+    batch_ready = pyqtSignal(object)
+    scan_finished = pyqtSignal(bool)
+
+    def __init__(self, scanner, extensions, display_name, rebuild=False, batch_size=200, known=None,
+                 metadata_editor=None, search_index=None, library_table=None):
+        super().__init__()
+        self.scanner = scanner
+        self.extensions = extensions
+        self.display_name = display_name
+        # Если задан, теги пачки читаются параллельно через get_metadata_many
+        self.metadata_editor = metadata_editor
+        # Поисковый индекс обновляется по тем же метаданным, что и названия
+        self.search_index = search_index
+        # Таблица для сортировки списка, тоже по метаданным пачек
+        self.library_table = library_table
+        self.rebuild = rebuild
+        # Пути, уже показанные в списке (например, из снимка): сначала сверяются с индексом
+        self.known = known
+        self.batch_size = batch_size
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def is_cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def run(self):
+        try:
+            if self.rebuild:
+                # Сначала то, что уже есть в индексе, затем изменения на диске
+                indexed = []
+                for ext_files in self.scanner.get_indexed_files(self.extensions).values():
+                    indexed.extend(ext_files)
+
+                for start in range(0, len(indexed), self.batch_size):
+                    if self.is_cancelled():
+                        break
+                    chunk = indexed[start:start + self.batch_size]
+                    self.emit_batch({'added': chunk, 'removed': [], 'modified': [],
+                                     'dirs': 0, 'found': start + len(chunk)})
+
+            elif self.known is not None:
+                indexed = set()
+                for ext_files in self.scanner.get_indexed_files(self.extensions).values():
+                    indexed.update(ext_files)
+                added = sorted(indexed - self.known)
+                removed = sorted(self.known - indexed)
+                if removed:
+                    self.emit_batch({'added': [], 'removed': removed, 'modified': [], 'dirs': 0, 'found': 0})
+                for start in range(0, len(added), self.batch_size):
+                    if self.is_cancelled():
+                        break
+                    chunk = added[start:start + self.batch_size]
+                    self.emit_batch({'added': chunk, 'removed': [], 'modified': [],
+                                     'dirs': 0, 'found': start + len(chunk)})
+
+            if not self.is_cancelled():
+                for batch in self.scanner.iter_scan(self.extensions, self.batch_size, self.cancel_event):
+                    self.emit_batch(batch)
+
+            if self.metadata_editor is not None and not self.is_cancelled():
+                # Файлы, не попавшие в пачки (например, из снимка), добавляются в поиск и таблицу здесь
+                indexed = []
+                for ext_files in self.scanner.get_indexed_files(self.extensions).values():
+                    indexed.extend(ext_files)
+                if self.search_index is not None:
+                    self.search_index.sync(indexed, self.metadata_editor, self.cancel_event)
+                if self.library_table is not None:
+                    self.library_table.sync(indexed, self.metadata_editor, self.cancel_event)
+        except Exception as e:
+            print(f"Ошибка сканирования: {e}")
+        finally:
+            self.scan_finished.emit(self.is_cancelled())
+
+    def emit_batch(self, batch):
+        paths = batch['added'] + batch['modified']
+        if self.metadata_editor is not None:
+            results = list(self.metadata_editor.get_metadata_many(paths, self.cancel_event, stream_info=False))
+            batch['names'] = {
+                file_path: self.display_name(file_path, metadata) for file_path, metadata in results
+            }
+            if self.search_index is not None:
+                self.search_index.update(results)
+                self.search_index.remove(batch['removed'])
+            if self.library_table is not None:
+                self.library_table.update(results)
+                self.library_table.remove(batch['removed'])
+        else:
+            batch['names'] = {file_path: self.display_name(file_path) for file_path in paths}
+        self.batch_ready.emit(batch)
+
+class TableFillWorker(QThread):
+    """Строки LibraryTable для путей, которых таблица ещё не видела (список из плейлиста или мини-плеера)"""
+    filled = pyqtSignal(bool)
+
+    def __init__(self, library_table, metadata_editor, paths):
+        super().__init__()
+        self.library_table = library_table
+        self.metadata_editor = metadata_editor
+        self.paths = paths
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        try:
+            missing = [file_path for file_path in self.paths if file_path not in self.library_table]
+            self.library_table.update(list(self.metadata_editor.get_metadata_many(
+                missing, self.cancel_event, stream_info=False)))
+        except Exception as e:
+            print(f"Ошибка чтения метаданных: {e}")
+        finally:
+            self.filled.emit(self.cancel_event.is_set())
@@ -1,8 +1,12 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
                             QPushButton, QComboBox, QCheckBox, QSlider,
-                            QGroupBox, QSpinBox, QMessageBox, QApplication)
+                            QGroupBox, QSpinBox, QMessageBox, QApplication,
+                            QListWidget, QListWidgetItem, QLineEdit, QFileDialog)
 from PyQt5.QtCore import Qt, QSettings
 
+from core.file_scanner import FileScanner
+from ui.scan_settings import ScanSettings
+
 class SettingsWindow(QWidget):
     def __init__(self, main_window):
         super().__init__()
@@ -12,7 +16,7 @@ class SettingsWindow(QWidget):
     
     def init_ui(self):
         self.setWindowTitle("Настройки")
-        self.setGeometry(300, 300, 500, 600)
+        self.setGeometry(300, 300, 500, 800)
         
         layout = QVBoxLayout()
         
@@ -39,8 +43,17 @@ class SettingsWindow(QWidget):
         playback_layout = QVBoxLayout()
         
         self.crossfade_check = QCheckBox("Кроссфейд между треками")
+        crossfade_layout = QHBoxLayout()
+        crossfade_layout.addWidget(QLabel("Длительность кроссфейда:"))
+        self.crossfade_spin = QSpinBox()
+        self.crossfade_spin.setRange(1, 12)
+        self.crossfade_spin.setSuffix(" с")
+        self.crossfade_check.toggled.connect(self.crossfade_spin.setEnabled)
+        crossfade_layout.addWidget(self.crossfade_spin)
         self.auto_play_check = QCheckBox("Автовоспроизведение следующего трека")
         self.volume_save_check = QCheckBox("Сохранять уровень громкости")
+        self.normalize_check = QCheckBox("Выравнивать громкость треков (EBU R128 / ReplayGain)")
+        self.write_replaygain_check = QCheckBox("Записывать результаты анализа громкости в теги ReplayGain")
         
         volume_layout = QHBoxLayout()
         volume_layout.addWidget(QLabel("Усиление громкости:"))
@@ -51,8 +64,11 @@ class SettingsWindow(QWidget):
         volume_layout.addWidget(QLabel("100%"))
         
         playback_layout.addWidget(self.crossfade_check)
+        playback_layout.addLayout(crossfade_layout)
         playback_layout.addWidget(self.auto_play_check)
         playback_layout.addWidget(self.volume_save_check)
+        playback_layout.addWidget(self.normalize_check)
+        playback_layout.addWidget(self.write_replaygain_check)
         playback_layout.addLayout(volume_layout)
         playback_group.setLayout(playback_layout)
         
@@ -63,15 +79,45 @@ class SettingsWindow(QWidget):
         self.watch_folder_check = QCheckBox("Отслеживать изменения в папках")
         
         limit_layout = QHBoxLayout()
-        limit_layout.addWidget(QLabel("Макс. размер библиотеки (МБ):"))
+        limit_layout.addWidget(QLabel("Макс. треков в библиотеке:"))
         self.limit_spin = QSpinBox()
-        self.limit_spin.setRange(100, 10000)
-        self.limit_spin.setValue(1000)
+        self.limit_spin.setRange(0, 1000000)
+        self.limit_spin.setSingleStep(1000)
+        self.limit_spin.setSpecialValueText("Без ограничения")
         limit_layout.addWidget(self.limit_spin)
-        
+
+        self.roots_list = QListWidget()
+        self.roots_list.currentRowChanged.connect(self.on_root_selected)
+
+        roots_buttons = QHBoxLayout()
+        add_root_btn = QPushButton("Добавить папку")
+        add_root_btn.clicked.connect(self.add_root)
+        remove_root_btn = QPushButton("Удалить")
+        remove_root_btn.clicked.connect(self.remove_root)
+        roots_buttons.addWidget(add_root_btn)
+        roots_buttons.addWidget(remove_root_btn)
+
+        depth_layout = QHBoxLayout()
+        depth_layout.addWidget(QLabel("Глубина обхода папки:"))
+        self.depth_spin = QSpinBox()
+        self.depth_spin.setRange(-1, 64)
+        self.depth_spin.setSpecialValueText("Без ограничения")
+        self.depth_spin.setEnabled(False)
+        self.depth_spin.valueChanged.connect(self.on_depth_changed)
+        depth_layout.addWidget(self.depth_spin)
+
+        self.exclude_edit = QLineEdit()
+        self.exclude_edit.setPlaceholderText(".git, node_modules, */Podcasts")
+
         library_layout.addWidget(self.auto_scan_check)
         library_layout.addWidget(self.watch_folder_check)
         library_layout.addLayout(limit_layout)
+        library_layout.addWidget(QLabel("Папки для сканирования:"))
+        library_layout.addWidget(self.roots_list)
+        library_layout.addLayout(roots_buttons)
+        library_layout.addLayout(depth_layout)
+        library_layout.addWidget(QLabel("Исключить папки (шаблоны через запятую):"))
+        library_layout.addWidget(self.exclude_edit)
         library_group.setLayout(library_layout)
         
         button_layout = QHBoxLayout()
@@ -104,13 +150,20 @@ class SettingsWindow(QWidget):
         # self.lang_combo.setCurrentIndex(lang_index)
 
         self.crossfade_check.setChecked(settings.value("crossfade", True, type=bool))
+        self.crossfade_spin.setValue(settings.value("crossfade_duration", 5, type=int))
+        self.crossfade_spin.setEnabled(self.crossfade_check.isChecked())
         self.auto_play_check.setChecked(settings.value("auto_play", True, type=bool))
         self.volume_save_check.setChecked(settings.value("volume_save", True, type=bool))
+        self.normalize_check.setChecked(settings.value("normalize_volume", True, type=bool))
+        self.write_replaygain_check.setChecked(settings.value("write_replaygain", False, type=bool))
         self.volume_boost_slider.setValue(settings.value("volume_boost", 100, type=int))
 
         self.auto_scan_check.setChecked(settings.value("auto_scan", True, type=bool))
         self.watch_folder_check.setChecked(settings.value("watch_folder", False, type=bool))
-        self.limit_spin.setValue(settings.value("library_limit", 1000, type=int))
+        roots, exclude, limit = ScanSettings.load()
+        self.limit_spin.setValue(limit)
+        self.set_roots(roots)
+        self.exclude_edit.setText(", ".join(exclude))
 
         self.apply_theme()
 
@@ -121,19 +174,75 @@ class SettingsWindow(QWidget):
         # settings.setValue("language", self.lang_combo.currentIndex())
 
         settings.setValue("crossfade", self.crossfade_check.isChecked())
+        settings.setValue("crossfade_duration", self.crossfade_spin.value())
         settings.setValue("auto_play", self.auto_play_check.isChecked())
         settings.setValue("volume_save", self.volume_save_check.isChecked())
+        settings.setValue("normalize_volume", self.normalize_check.isChecked())
+        settings.setValue("write_replaygain", self.write_replaygain_check.isChecked())
         settings.setValue("volume_boost", self.volume_boost_slider.value())
 
         settings.setValue("auto_scan", self.auto_scan_check.isChecked())
         settings.setValue("watch_folder", self.watch_folder_check.isChecked())
-        settings.setValue("library_limit", self.limit_spin.value())
+        ScanSettings.save(self.get_roots(), self.get_exclude(), self.limit_spin.value())
 
         self.apply_theme()
+        if hasattr(self.main_window, 'scanner'):
+            ScanSettings.apply(self.main_window.scanner)
+        if hasattr(self.main_window, 'library_watcher'):
+            self.main_window.library_watcher.apply_settings()
+        if hasattr(self.main_window, 'apply_crossfade_settings'):
+            self.main_window.apply_crossfade_settings()
 
         QMessageBox.information(self, "Сохранено", "Настройки сохранены")
         self.close()
 
+    def set_roots(self, roots):
+        self.roots_list.clear()
+        for root, depth in roots:
+            item = QListWidgetItem()
+            item.setData(Qt.UserRole, root)
+            self.roots_list.addItem(item)
+            self.set_root_depth(item, depth)
+
+    def set_root_depth(self, item, depth):
+        item.setData(Qt.UserRole + 1, depth)
+        root = item.data(Qt.UserRole)
+        item.setText(root if depth is None else f"{root} (глубина {depth})")
+
+    def get_roots(self):
+        return [
+            (self.roots_list.item(row).data(Qt.UserRole), self.roots_list.item(row).data(Qt.UserRole + 1))
+            for row in range(self.roots_list.count())
+        ]
+
+    def get_exclude(self):
+        return [pattern.strip() for pattern in self.exclude_edit.text().split(",") if pattern.strip()]
+
+    def add_root(self):
+        folder = QFileDialog.getExistingDirectory(self, "Папка с музыкой")
+        if folder and folder not in [root for root, _ in self.get_roots()]:
+            self.set_roots(self.get_roots() + [(folder, None)])
+            self.roots_list.setCurrentRow(self.roots_list.count() - 1)
+
+    def remove_root(self):
+        row = self.roots_list.currentRow()
+        if row >= 0:
+            self.roots_list.takeItem(row)
+
+    def on_root_selected(self, row):
+        item = self.roots_list.item(row)
+        self.depth_spin.setEnabled(item is not None)
+        if item is not None:
+            depth = item.data(Qt.UserRole + 1)
+            self.depth_spin.blockSignals(True)
+            self.depth_spin.setValue(-1 if depth is None else depth)
+            self.depth_spin.blockSignals(False)
+
+    def on_depth_changed(self, value):
+        item = self.roots_list.currentItem()
+        if item is not None:
+            self.set_root_depth(item, None if value < 0 else value)
+
     def apply_theme(self):
         theme_index = self.theme_combo.currentIndex()
         app = QApplication.instance()
@@ -316,11 +425,16 @@ class SettingsWindow(QWidget):
     def load_defaults(self):
         """Загрузка настроек по умолчанию"""
         self.theme_combo.setCurrentIndex(0)
-        self.lang_combo.setCurrentIndex(0)
+        # self.lang_combo.setCurrentIndex(0)
         self.crossfade_check.setChecked(True)
+        self.crossfade_spin.setValue(5)
         self.auto_play_check.setChecked(True)
         self.volume_save_check.setChecked(True)
+        self.normalize_check.setChecked(True)
+        self.write_replaygain_check.setChecked(False)
         self.volume_boost_slider.setValue(100)
         self.auto_scan_check.setChecked(True)
         self.watch_folder_check.setChecked(False)
-        self.limit_spin.setValue(1000)
\ No newline at end of file
+        self.set_roots([(str(path), None) for path in FileScanner.get_default_scan_paths()])
+        self.exclude_edit.setText(", ".join(FileScanner.DEFAULT_EXCLUDE))
+        self.limit_spin.setValue(0)
\ No newline at end of file
@@ -37,7 +37,7 @@ class ThemeManager:
                     padding: 5px;
                     color: #003366;
                 }
-                QListWidget {
+                QListView {
                     background-color: #ffffff;
                     border: 2px solid #66b3ff;
                     border-radius: 5px;
@@ -94,7 +94,7 @@ class ThemeManager:
                     padding: 5px;
                     color: #e6f2ff;
                 }
-                QListWidget {
+                QListView {
                     background-color: #00264d;
                     border: 2px solid #004080;
                     border-radius: 5px;
@@ -0,0 +1,174 @@
+import os
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from PyQt5.QtCore import Qt, QStringListModel
+
+class TrackListModel(QStringListModel):
+    """Список треков окна для QListView: названия в QStringListModel, пути — списком Python.
+
+    Строки и их число отдаёт C++-часть модели, поэтому раскладка списка
+    не вызывает Python на каждую строку. Фильтр поиска — множество
+    подходящих путей: при его смене пересобирается только список видимых
+    путей и названий одним setStringList, без обхода строк виджета.
+    Прочие роли (обложки) хранятся по пути трека.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.paths: List[str] = []
+        self.names: Dict[str, str] = {}
+        self.roles: Dict[int, Dict[str, object]] = {}
+        self.matches: Optional[Set[str]] = None
+        self.visible: List[str] = []
+        # Номера видимых строк и позиции в полном списке строятся по требованию
+        self._rows: Optional[Dict[str, int]] = None
+        self._positions: Optional[Dict[str, int]] = None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return super().data(index, role)
+        if not index.isValid() or index.row() >= len(self.visible):
+            return None
+        file_path = self.visible[index.row()]
+        if role == Qt.UserRole:
+            return file_path
+        values = self.roles.get(role)
+        return values.get(file_path) if values is not None else None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or index.row() >= len(self.visible) or role == Qt.UserRole:
+            return False
+        file_path = self.visible[index.row()]
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            self.names[file_path] = value
+            return super().setData(index, value, role)
+        self.roles.setdefault(role, {})[file_path] = value
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def track_count(self) -> int:
+        """Число треков в списке вместе со скрытыми фильтром"""
+        return len(self.paths)
+
+    def path_at(self, row: int) -> Optional[str]:
+        return self.visible[row] if 0 <= row < len(self.visible) else None
+
+    def row_of(self, file_path: str) -> int:
+        """Номер видимой строки трека; -1, если его нет или он скрыт фильтром"""
+        if self._rows is None:
+            self._rows = {}
+            for row, path in enumerate(self.visible):
+                self._rows.setdefault(path, row)
+        return self._rows.get(file_path, -1)
+
+    def display_name(self, file_path: str) -> str:
+        return self.names.get(file_path) or os.path.basename(file_path)
+
+    def items(self) -> List[Tuple[str, str]]:
+        """(путь, название) всех треков в порядке списка"""
+        return [(file_path, self.display_name(file_path)) for file_path in self.paths]
+
+    def set_tracks(self, items: Iterable[Tuple[str, str]]):
+        """Замена всего списка парами (путь, название)"""
+        self.paths = []
+        self.names = {}
+        self.roles = {}
+        for file_path, display_name in items:
+            self.paths.append(file_path)
+            self.names[file_path] = display_name
+        self._positions = None
+        self._update_visible()
+
+    def clear(self):
+        self.set_tracks(())
+
+    def append(self, items: Iterable[Tuple[str, str]]):
+        """Добавление треков в конец; при активном фильтре они скрыты до его пересчёта"""
+        items = list(items)
+        if not items:
+            return
+        for file_path, display_name in items:
+            if self._positions is not None:
+                self._positions.setdefault(file_path, len(self.paths))
+            self.paths.append(file_path)
+            self.names[file_path] = display_name
+        if self.matches is not None:
+            return
+        first = len(self.visible)
+        self.visible.extend(file_path for file_path, _ in items)
+        self._rows = None
+        self.insertRows(first, len(items))
+        for row, (file_path, display_name) in enumerate(items, first):
+            super().setData(self.index(row), self.display_name(file_path))
+
+    def remove_paths(self, paths: Iterable[str]):
+        """Удаление треков; строки снимаются непрерывными диапазонами, выделение остальных сохраняется"""
+        paths = set(paths)
+        if not paths:
+            return
+        self.paths = [file_path for file_path in self.paths if file_path not in paths]
+        for file_path in paths:
+            self.names.pop(file_path, None)
+            for values in self.roles.values():
+                values.pop(file_path, None)
+        self._positions = None
+
+        rows = [row for row, file_path in enumerate(self.visible) if file_path in paths]
+        # Снизу вверх, чтобы номера ещё не снятых строк не сдвигались
+        end = None
+        for row in reversed(rows):
+            if end is None:
+                start = end = row
+            elif row == start - 1:
+                start = row
+            else:
+                self._remove_rows(start, end)
+                start = end = row
+        if end is not None:
+            self._remove_rows(start, end)
+
+    def _remove_rows(self, start: int, end: int):
+        self.removeRows(start, end - start + 1)
+        del self.visible[start:end + 1]
+        self._rows = None
+
+    def set_names(self, names: Dict[str, str]):
+        """Новые названия треков (например, после правки тегов)"""
+        for file_path, display_name in names.items():
+            if file_path not in self.names:
+                continue
+            self.names[file_path] = display_name
+            row = self.row_of(file_path)
+            if row >= 0:
+                super().setData(self.index(row), display_name)
+
+    def set_order(self, paths: Iterable[str]):
+        """Новый порядок тех же треков; названия и обложки остаются при путях"""
+        self.paths = list(paths)
+        self._positions = None
+        self._update_visible()
+
+    def set_filter(self, matches: Optional[Set[str]]):
+        """Показывать только пути из matches; None — все треки"""
+        if matches is None and self.matches is None:
+            return
+        self.matches = matches
+        self._update_visible()
+
+    def _update_visible(self):
+        if self.matches is None:
+            self.visible = list(self.paths)
+        elif len(self.matches) * 8 < len(self.paths):
+            # Узкий запрос: упорядочиваем найденное, а не просматриваем весь список
+            if self._positions is None:
+                self._positions = {}
+                for position, file_path in enumerate(self.paths):
+                    self._positions.setdefault(file_path, position)
+            positions = self._positions
+            self.visible = sorted((file_path for file_path in self.matches if file_path in positions),
+                                  key=positions.__getitem__)
+        else:
+            matches = self.matches
+            self.visible = [file_path for file_path in self.paths if file_path in matches]
+        self._rows = None
+        names = self.names
+        self.setStringList([names.get(file_path) or os.path.basename(file_path) for file_path in self.visible])
@@ -0,0 +1,7 @@
+def format_size(size: int) -> str:
+    """Размер файла в удобочитаемом виде"""
+    for unit in ("Б", "КБ", "МБ"):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} ГБ"